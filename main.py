@@ -31,6 +31,10 @@ async def main():
         host=cfg["udp_host"],
         port=cfg["udp_port"],
         max_buffer=cfg["max_buffer_size"],
+        decode_mode=cfg.get("decode_mode", "full"),
+        decode_extra_keys=cfg.get("decode_extra_keys", []),
+        capture_dir=cfg.get("capture_dir") or None,
+        dedupe_window=cfg.get("dedupe_window", 4),
     )
 
     # Callback to broadcast updates when data arrives
@@ -0,0 +1,51 @@
+"""Benchmark full vs selective msgpack decoding on captured packets.
+
+Capture decrypted payloads by setting "capture_dir" in settings.json, play
+through a career load, then run:
+
+    python scripts/bench_msgpack_decode.py <capture_dir or .msgpack files>
+"""
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.msgpack_select import unpack_full, unpack_selective  # noqa: E402
+from src.udp_listener import CarrotBlenderListener  # noqa: E402
+
+
+def _collect(args):
+    files = []
+    for arg in args:
+        path = Path(arg)
+        if path.is_dir():
+            files.extend(sorted(path.glob("response_*.msgpack")))
+        elif path.exists():
+            files.append(path)
+    return files
+
+
+def main() -> int:
+    files = _collect(sys.argv[1:])
+    if not files:
+        print(__doc__)
+        return 1
+    allow = CarrotBlenderListener("127.0.0.1", 0).decode_allow_keys()
+    print(f"{'packet':<40} {'bytes':>9} {'full ms':>9} {'sel ms':>9} {'speedup':>8} {'skipped':>8}")
+    total_full = total_sel = 0.0
+    for path in files:
+        data = path.read_bytes()
+        runs = max(3, min(200, 2_000_000 // max(len(data), 1)))
+        full = min(timeit.repeat(lambda: unpack_full(data), number=runs, repeat=3)) / runs
+        sel = min(timeit.repeat(lambda: unpack_selective(data, allow), number=runs, repeat=3)) / runs
+        _, _, skipped = unpack_selective(data, allow)
+        total_full += full
+        total_sel += sel
+        print(f"{path.name[:40]:<40} {len(data):>9} {full * 1e3:>9.3f} {sel * 1e3:>9.3f} {full / sel:>7.2f}x {skipped:>8}")
+    print(f"{'total':<40} {'':>9} {total_full * 1e3:>9.3f} {total_sel * 1e3:>9.3f} {total_full / total_sel:>7.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,94 @@
+"""Benchmark bundle.js preset parsing: legacy scan vs single-pass scanner vs cache.
+
+    python scripts/bench_presets.py [path/to/bundle.js]
+
+Defaults to the vendored static/umalator/bundle.js.
+"""
+import json
+import re
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.umalator_presets import BundlePresetCache, _extract_presets  # noqa: E402
+
+
+LEGACY_MARKERS = ["Capricorn Cup", "Sagittarius Cup", "Scorpio Cup", "Libra Cup", "Virgo Cup",
+                  "Leo Cup", "Cancer Cup", "Gemini Cup", "Taurus Cup"]
+
+
+def legacy_extract_presets(text: str) -> list:
+    """Character-by-character bracket matcher used before the cache existed."""
+    start = text.find("var ci=")
+    if start == -1:
+        positions = [pos for pos in (text.find(m) for m in LEGACY_MARKERS) if pos != -1]
+        if positions:
+            pattern = re.compile(r"(?:var|let|const)\s+[A-Za-z_$][\w$]*\s*=\s*\[")
+            matches = list(pattern.finditer(text[:min(positions)]))
+            if matches:
+                start = matches[-1].start()
+    if start == -1:
+        return []
+    start = text.find("[", start)
+    level = 0
+    end = None
+    for i in range(start, len(text)):
+        ch = text[i]
+        if ch == "[":
+            level += 1
+        elif ch == "]":
+            level -= 1
+            if level == 0:
+                end = i
+                break
+    if end is None:
+        return []
+    raw = text[start:end + 1]
+    raw = re.sub(r"([,{])\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*:", r'\1"\2":', raw)
+    raw = raw.replace("undefined", "null")
+    return json.loads(raw)
+
+
+def _best(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def main() -> int:
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else ROOT / "static" / "umalator" / "bundle.js"
+    data = path.read_bytes()
+    text = data.decode("utf-8")
+    # A renamed preset variable forces the marker-based fallback search
+    renamed = text.replace("var ci=", "var zq=", 1)
+    for variant in (text, renamed):
+        assert legacy_extract_presets(variant) == _extract_presets(variant), "scanner output differs"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cold_path = Path(tmp) / "cold.json"
+
+        def cold() -> None:
+            cold_path.unlink(missing_ok=True)
+            BundlePresetCache(cold_path).get_or_parse(data)
+
+        warm_cache = BundlePresetCache(Path(tmp) / "warm.json")
+        warm_cache.get_or_parse(data)
+
+        rows = [
+            ("legacy scan", _best(lambda: legacy_extract_presets(text), 50)),
+            ("single-pass scan", _best(lambda: _extract_presets(text), 50)),
+            ("legacy scan (marker fallback)", _best(lambda: legacy_extract_presets(renamed), 20)),
+            ("single-pass (marker fallback)", _best(lambda: _extract_presets(renamed), 20)),
+            ("cache miss (decode+parse+save)", _best(cold, 20)),
+            ("cache hit (sha256 + lookup)", _best(lambda: warm_cache.get_or_parse(data), 50)),
+        ]
+    print(f"{path} ({len(data):,} bytes, {len(_extract_presets(text))} presets)")
+    for label, seconds in rows:
+        print(f"  {label:<32} {seconds * 1e3:8.3f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,202 @@
+"""Benchmark veteran_utils.build_veteran_items on large rosters.
+
+Compares the batched builder against the previous per-horse loop (kept
+here as ``build_reference``) and checks both produce identical items:
+
+    python scripts/bench_veteran_build.py [horses ...]
+
+Uses master.mdb when it is available; otherwise the mdb_utils lookup
+tables are seeded with synthetic factors, skills and cards.
+"""
+import random
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src import constants, image_proxy, mdb_utils, veteran_utils  # noqa: E402
+
+CARD_IDS = [100101 + 100 * i for i in range(120)]
+
+
+def build_reference(trained_array):
+    """The pre-batching builder: one lookup per horse, factor and skill."""
+    items = []
+    for entry in trained_array:
+        card_id = entry.get("card_id")
+        growth = mdb_utils.get_card_growth(card_id) if card_id else None
+        chara_id = growth.get("chara_id") if growth else None
+        chara_name = mdb_utils.get_chara_name(chara_id) if chara_id else None
+        portrait_card_id = entry.get("race_cloth_id") or entry.get("chara_dress_id") or entry.get("dress_id") or card_id
+        card_text = mdb_utils.get_card_text(card_id) if card_id else None
+        sparks = {"distance": 0, "track": 0, "unique": 0, "skill": 0, "total": 0}
+        for factor_id in entry.get("factor_id_array", []) or []:
+            info = mdb_utils.get_succession_factor(factor_id)
+            if not info:
+                continue
+            rarity = int(info.get("rarity") or 0)
+            sparks["total"] += rarity
+            factor_type, group_id = info.get("factor_type"), info.get("group_id")
+            if factor_type == 2:
+                if group_id in (31, 32, 33, 34):
+                    sparks["distance"] += rarity
+                elif group_id in (11, 12):
+                    sparks["track"] += rarity
+            elif factor_type == 3:
+                sparks["unique"] += rarity
+            elif factor_type == 4:
+                sparks["skill"] += rarity
+        rank = lambda key: constants.APTITUDE_RANK.get(int(entry.get(key, 0)), "?")
+        parent_chara_ids = [
+            ((mdb_utils.get_card_growth(parent.get("card_id")) if parent.get("card_id") else None) or {}).get("chara_id")
+            for parent in entry.get("succession_chara_array", []) or []
+            if parent.get("position_id") in (10, 20)
+        ]
+        first, second = (parent_chara_ids + [None, None])[:2]
+        items.append({
+            "trained_chara_id": entry.get("trained_chara_id"),
+            "card_id": card_id,
+            "chara_id": chara_id,
+            "name": chara_name or f"Chara {chara_id}",
+            "title": card_text.get("title") if card_text else None,
+            "subtitle": None,
+            "full_name": card_text.get("full_name") if card_text else None,
+            "portrait_url": image_proxy.trained_chara_url(portrait_card_id),
+            "portrait_fallback_url": image_proxy.chara_icon_url(chara_id),
+            "portrait_card_id": portrait_card_id,
+            "race_cloth_id": entry.get("race_cloth_id"),
+            "is_locked": entry.get("is_locked", 0),
+            "rank_score": entry.get("rank_score", 0),
+            "rank": entry.get("rank", 0),
+            "rank_label": constants.HORSE_RANK.get(int(entry.get("rank", 0)), "?"),
+            "skill_count": len(entry.get("skill_array", [])),
+            "factor_ids": list(entry.get("factor_id_array", []) or []),
+            "parent_chara_ids": parent_chara_ids,
+            "parent_affinity": (
+                mdb_utils.get_affinity(chara_id, first) + mdb_utils.get_affinity(chara_id, second)
+                + mdb_utils.get_affinity(first, second)
+            ),
+            "fans": entry.get("fans", 0),
+            "legacy_sparks": sparks,
+            "stats": {
+                "speed": entry.get("speed", 0),
+                "stamina": entry.get("stamina", 0),
+                "power": entry.get("power", 0),
+                "guts": entry.get("guts", 0),
+                "wit": entry.get("wiz", 0),
+            },
+            "running_style": constants.RUNNING_STYLE.get(entry.get("running_style"), "Unknown"),
+            "aptitudes": {
+                "track": {"Turf": rank("proper_ground_turf"), "Dirt": rank("proper_ground_dirt")},
+                "distance": {
+                    "Sprint": rank("proper_distance_short"),
+                    "Mile": rank("proper_distance_mile"),
+                    "Medium": rank("proper_distance_middle"),
+                    "Long": rank("proper_distance_long"),
+                },
+                "style": {
+                    "Front": rank("proper_running_style_nige"),
+                    "Pace": rank("proper_running_style_senko"),
+                    "Late": rank("proper_running_style_sashi"),
+                    "End": rank("proper_running_style_oikomi"),
+                },
+            },
+            "skills": [
+                {
+                    "id": s.get("skill_id"),
+                    "name": mdb_utils.get_skill_name(s.get("skill_id")) or f"Skill {s.get('skill_id')}",
+                    "level": s.get("level", 1),
+                    "icon_url": image_proxy.skill_icon_url(mdb_utils.get_skill_icon_id(s.get("skill_id"))),
+                }
+                for s in entry.get("skill_array", [])
+            ],
+        })
+    return items
+
+
+def _seed_synthetic_mdb(rng):
+    factors = {}
+    for factor_id in range(101, 3000, 1):
+        factors[factor_id] = {
+            "group_id": rng.choice((11, 12, 21, 22, 23, 24, 31, 32, 33, 34, 1, 2, 3)),
+            "rarity": rng.randint(1, 3),
+            "factor_type": rng.randint(1, 5),
+        }
+    mdb_utils._succession_factor_dict.update(factors)
+    for skill_id in range(200000, 202000):
+        mdb_utils._skill_name_dict[skill_id] = f"Skill {skill_id}"
+        mdb_utils._skill_icon_dict[skill_id] = 10010 + skill_id % 50
+    for index, card_id in enumerate(CARD_IDS):
+        chara_id = 1001 + index
+        mdb_utils._chara_name_dict[chara_id] = f"Chara {chara_id}"
+        mdb_utils._card_growth_dict[card_id] = {"chara_id": chara_id, "rarity": 3, "available_skill_set_id": None}
+        mdb_utils._card_text_dict[card_id] = {"title": f"Title {index}", "full_name": f"[Title {index}] Chara"}
+    charas = [1001 + index for index in range(len(CARD_IDS))]
+    for relation_type in range(1, 400):
+        mdb_utils._relation_point_dict[relation_type] = rng.randint(1, 7)
+        mdb_utils._relation_member_dict[relation_type] = rng.sample(charas, rng.choice((2, 3, 4, 8)))
+
+
+def synthetic_roster(rng, horses):
+    factor_ids = list(mdb_utils.get_succession_factors()) or [0]
+    skill_ids = list(mdb_utils._skill_name_dict) or [200000]
+    aptitude = lambda: rng.randint(1, 8)
+    return [
+        {
+            "trained_chara_id": 1 + i,
+            "card_id": rng.choice(CARD_IDS),
+            "rank_score": rng.randint(5000, 20000),
+            "rank": rng.randint(1, 20),
+            "fans": rng.randint(1000, 300000),
+            "speed": rng.randint(300, 1200),
+            "stamina": rng.randint(300, 1200),
+            "power": rng.randint(300, 1200),
+            "guts": rng.randint(300, 1200),
+            "wiz": rng.randint(300, 1200),
+            "running_style": rng.randint(1, 4),
+            "proper_ground_turf": aptitude(),
+            "proper_ground_dirt": aptitude(),
+            "proper_distance_short": aptitude(),
+            "proper_distance_mile": aptitude(),
+            "proper_distance_middle": aptitude(),
+            "proper_distance_long": aptitude(),
+            "proper_running_style_nige": aptitude(),
+            "proper_running_style_senko": aptitude(),
+            "proper_running_style_sashi": aptitude(),
+            "proper_running_style_oikomi": aptitude(),
+            "factor_id_array": rng.sample(factor_ids, min(len(factor_ids), 18)),
+            "succession_chara_array": [
+                {"position_id": position, "card_id": rng.choice(CARD_IDS)} for position in (10, 20)
+            ],
+            "skill_array": [{"skill_id": skill_id, "level": 1} for skill_id in rng.sample(skill_ids, min(len(skill_ids), 30))],
+        }
+        for i in range(horses)
+    ]
+
+
+def main() -> int:
+    rng = random.Random(7)
+    try:
+        mdb_utils.get_succession_factors()
+        source = "master.mdb"
+    except Exception:
+        _seed_synthetic_mdb(rng)
+        source = "synthetic"
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 3000, 6000]
+    print(f"lookups: {source}")
+    print(f"{'horses':>7} {'reference ms':>13} {'batched ms':>11} {'speedup':>8}")
+    for horses in sizes:
+        roster = synthetic_roster(rng, horses)
+        if build_reference(roster) != veteran_utils.build_veteran_items(roster):
+            print(f"{horses:>7} MISMATCH between reference and batched builders")
+            return 1
+        reference = min(timeit.repeat(lambda: build_reference(roster), number=1, repeat=3))
+        batched = min(timeit.repeat(lambda: veteran_utils.build_veteran_items(roster), number=1, repeat=3))
+        print(f"{horses:>7} {reference * 1e3:>13.1f} {batched * 1e3:>11.1f} {reference / batched:>7.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,169 @@
+"""Compare JSON and msgpack /ws state frames on career states.
+
+Pass saved states (``last_state.json`` in the app data dir is written on
+every update) or run without arguments to use the current
+``last_state.json`` plus a synthetic mid-career state:
+
+    python scripts/bench_ws_framing.py [state.json ...]
+
+Reports full-frame size (raw and deflated, as permessage-deflate would
+send it), Python encode time through ws_hub.TopicCache (cold, i.e. once
+per revision) and Python decode time. When ``node`` is on PATH it also
+times ``JSON.parse`` against static/js/msgpack-decode.js.
+"""
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+import zlib
+from pathlib import Path
+
+import msgpack
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.config import STATE_CACHE_PATH  # noqa: E402
+from src.ws_hub import ALL_TOPICS, TopicCache  # noqa: E402
+
+NODE_BENCH = r"""
+const fs = require('fs');
+const { msgpackDecode } = require(process.argv[2]);
+const text = fs.readFileSync(process.argv[3], 'utf8');
+const bin = new Uint8Array(fs.readFileSync(process.argv[4]));
+function bench(fn) {
+    for (let i = 0; i < 50; i++) fn();
+    let runs = 0;
+    const start = process.hrtime.bigint();
+    let elapsed = 0n;
+    while (elapsed < 300000000n) {
+        fn();
+        runs++;
+        elapsed = process.hrtime.bigint() - start;
+    }
+    return Number(elapsed) / runs / 1e6;
+}
+console.log(JSON.stringify({ json: bench(() => JSON.parse(text)), msgpack: bench(() => msgpackDecode(bin)) }));
+"""
+
+
+class _Conn:
+    def __init__(self, encoding):
+        self.topics = ALL_TOPICS
+        self.revs = {}
+        self.encoding = encoding
+
+
+def synthetic_state() -> dict:
+    """A mid-career state shaped like GameState.to_dict()."""
+    skill = lambda i: {"id": 200000 + i, "name": f"Skill {i}", "level": 1 + i % 5,
+                       "icon_url": f"/img/gametora/skill_icons/utx_ico_skill_{10010 + i}.png"}
+    tip = lambda i: {"group_id": 2000 + i, "rarity": 1 + i % 2, "name": f"Tip {i}", "level": i % 5,
+                     "skill_id": 200100 + i, "need_skill_point": 120 + i, "discount_rate": 0.1 * (i % 4),
+                     "discounted_skill_point": 100 + i, "skill_category": i % 5, "skill_rarity": 1,
+                     "skill_group_id": 2000 + i, "icon_url": f"/img/gametora/skill_icons/utx_ico_skill_{20010 + i}.png"}
+    command = lambda i: {"command_type": 1, "command_id": 101 + i, "is_enable": 1, "training_partner_array": [1, 2, 3],
+                         "tips_event_partner_array": [], "params_inc_dec_info_array": [
+                             {"target_type": t, "value": 5 + t} for t in range(1, 7)],
+                         "failure_rate": i * 3, "level": 1 + i % 5}
+    race = lambda i: {"turn": 12 + i * 2, "program_id": 1000 + i, "race_id": 100 + i, "name": f"Race {i}",
+                      "grade": "G1" if i % 3 == 0 else "G2", "distance": 1600 + 200 * (i % 6),
+                      "ground": "Turf", "banner_url": f"/img/gametora/en/race_banners/thum_race_rt_000_{1000 + i:04d}_00.png",
+                      "is_objective": i % 4 == 0, "requirement": None}
+    stats = {"speed": 812, "stamina": 544, "power": 701, "guts": 388, "wisdom": 455,
+             "skill_pts": 612, "energy": 74, "motivation": 4}
+    return {
+        "connected": True,
+        "in_training": True,
+        "training": {"horse_name": "Special Week", "current_turn": 41, "max_turns": 78, "stats": stats,
+                     "fans": 52310, "scenario": "URA Finals", "last_update": "2026-01-01T12:00:00"},
+        "last_packet_type": "response",
+        "skills_tab": {"name": "Special Week", "skills": [skill(i) for i in range(24)],
+                       "skill_tips": [tip(i) for i in range(18)],
+                       "available_skills": [dict(tip(i), unlocked=i % 2 == 0) for i in range(40)]},
+        "supporters": [{"position": i + 1, "support_card_id": 30000 + i, "name": f"Support {i}", "evaluation": 40 + i * 7,
+                        "icon_url": f"/img/gametora/characters/icons/chr_icon_{1001 + i}.png", "type": "speed",
+                        "command_id": 101} for i in range(6)],
+        "event_choices": [{"choice_id": i, "effects": [{"type": "stat", "value": 10}] * 3} for i in range(3)],
+        "veteran": [],
+        "race_agenda": [race(i) for i in range(8)],
+        "race_objectives": [race(i) for i in range(10)],
+        "race_combined": [race(i) for i in range(30)],
+        "misc_data": {"user_info": {"viewer_id": 123456789, "name": "Trainer"}, "tp_info": {"current_tp": 80},
+                      "coin_info": {"fcoin": 1200}, "common_define": {f"k{i}": i for i in range(40)}},
+        "scenario_metrics": {},
+        "raw_data": {"data": {
+            "chara_info": dict(stats, max_vital=100, scenario_id=1, skill_point=612,
+                               skill_array=[{"skill_id": 200000 + i, "level": 1} for i in range(24)],
+                               support_card_array=[{"position": i + 1, "support_card_id": 30000 + i} for i in range(6)],
+                               evaluation_info_array=[{"training_partner_id": i, "evaluation": 40 + i} for i in range(10)],
+                               skill_tips_array=[{"group_id": 2000 + i, "rarity": 1, "level": 2} for i in range(18)]),
+            "home_info": {"command_info_array": [command(i) for i in range(5)]},
+        }},
+    }
+
+
+def _load(args):
+    states = []
+    for arg in args:
+        path = Path(arg)
+        states.append((path.name, json.loads(path.read_text(encoding="utf-8"))))
+    if not args:
+        if STATE_CACHE_PATH.exists():
+            states.append((STATE_CACHE_PATH.name, json.loads(STATE_CACHE_PATH.read_text(encoding="utf-8"))))
+        states.append(("synthetic", synthetic_state()))
+    return states
+
+
+def _encode(state, encoding):
+    cache = TopicCache()
+    cache.update(state)
+    return cache.render(_Conn(encoding))
+
+
+def _best(fn, runs):
+    return min(timeit.repeat(fn, number=runs, repeat=3)) / runs
+
+
+def _node_decode(text: str, data: bytes):
+    node = shutil.which("node")
+    if not node:
+        return None
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        (tmp / "bench.js").write_text(NODE_BENCH, encoding="utf-8")
+        (tmp / "frame.json").write_text(text, encoding="utf-8")
+        (tmp / "frame.msgpack").write_bytes(data)
+        decoder = ROOT / "static" / "js" / "msgpack-decode.js"
+        out = subprocess.run(
+            [node, str(tmp / "bench.js"), str(decoder), str(tmp / "frame.json"), str(tmp / "frame.msgpack")],
+            capture_output=True, text=True, check=True,
+        )
+        return json.loads(out.stdout)
+
+
+def main() -> int:
+    print(f"{'state':<20} {'fmt':<8} {'bytes':>9} {'deflate':>9} {'py enc ms':>10} {'py dec ms':>10} {'js dec ms':>10}")
+    for name, state in _load(sys.argv[1:]):
+        text = _encode(state, "json")
+        data = _encode(state, "msgpack")
+        runs = max(5, min(500, 5_000_000 // max(len(text), 1)))
+        enc_json = _best(lambda: _encode(state, "json"), runs)
+        enc_pack = _best(lambda: _encode(state, "msgpack"), runs)
+        dec_json = _best(lambda: json.loads(text), runs)
+        dec_pack = _best(lambda: msgpack.unpackb(data, raw=False, strict_map_key=False), runs)
+        js = _node_decode(text, data) or {}
+        raw_json = text.encode("utf-8")
+        for fmt, payload, enc, dec in (("json", raw_json, enc_json, dec_json), ("msgpack", data, enc_pack, dec_pack)):
+            js_ms = js.get(fmt)
+            print(
+                f"{name[:20]:<20} {fmt:<8} {len(payload):>9} {len(zlib.compress(payload, 6)):>9} "
+                f"{enc * 1e3:>10.3f} {dec * 1e3:>10.3f} {(f'{js_ms:.3f}' if js_ms is not None else '-'):>10}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
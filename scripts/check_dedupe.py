@@ -0,0 +1,74 @@
+"""Check that packet dedupe never leaves state on a superseded packet.
+
+Replays payloads A, B, A through the listener and asserts the resulting
+state matches applying A alone (the second A must not be skipped just
+because A was seen before B), that a response repeated across a request
+(req1, X, req2, X) is applied again, and that an immediate exact repeat
+is still skipped:
+
+    python scripts/check_dedupe.py
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+import msgpack
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src import metrics  # noqa: E402
+from src.models import GameState, game_state  # noqa: E402
+from src.udp_listener import CarrotBlenderListener  # noqa: E402
+
+
+def _payload(speed: int, choices: list) -> bytes:
+    return msgpack.packb({"data": {
+        "chara_info": {"speed": speed, "stamina": 300, "turn": 12},
+        "choice_reward_array": choices,
+    }})
+
+
+def _request(turn: int) -> bytes:
+    return msgpack.packb({"command_type": 1, "current_turn": turn})
+
+
+def _replay(packets, cache_dir: Path, dedupe_window: int = 4) -> dict:
+    """Apply (payload, packet_type) pairs, or bare payloads as responses."""
+    game_state.__dict__.update(GameState().__dict__)
+    listener = CarrotBlenderListener("127.0.0.1", 0, dedupe_window=dedupe_window)
+    listener._cache_path = cache_dir / "last_state.json"
+    for packet in packets:
+        data, packet_type = packet if isinstance(packet, tuple) else (packet, "response")
+        listener._parse_msgpack(data, packet_type)
+    state = game_state.to_dict()
+    # Timestamps differ between replays and are not part of the comparison
+    state.get("training", {}).pop("last_update", None)
+    return state
+
+
+def main() -> int:
+    a = _payload(500, [])
+    b = _payload(650, [{"select_index": 1, "effect": "speed+10"}])
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        expected = _replay([a], tmp_path)
+        replayed = _replay([a, b, a], tmp_path)
+        if replayed != expected:
+            print("FAIL: state after A, B, A differs from state after A")
+            return 1
+        interleaved = [(_request(12), "request"), (b, "response"), (_request(13), "request"), (b, "response")]
+        if _replay(interleaved, tmp_path) != _replay(interleaved, tmp_path, dedupe_window=0):
+            print("FAIL: response X after req1, X, req2 was skipped")
+            return 1
+        metrics.reset()
+        _replay([a, a], tmp_path)
+        skipped = metrics.snapshot()["counters"].get("dedupe.response.skipped", 0)
+        if skipped != 1:
+            print(f"FAIL: expected the repeated A to be skipped once, skipped {skipped}")
+            return 1
+    print("OK: A, B, A ends on A; req1, X, req2, X ends on X; A, A skips the repeat")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -14,7 +14,15 @@ CONFIG_PATH = APPDATA_PROJECT_DIR / "settings.json"
 LOG_PATH = APPDATA_PROJECT_DIR / "log.log"
 STATE_CACHE_PATH = APPDATA_PROJECT_DIR / "last_state.json"
 VETERAN_CACHE_PATH = APPDATA_PROJECT_DIR / "veteran_cache.json"
+VETERAN_DB_PATH = APPDATA_PROJECT_DIR / "veteran.sqlite3"
 VETERAN_SELECTION_PATH = APPDATA_PROJECT_DIR / "veteran_selection.json"
+PRESET_CACHE_PATH = APPDATA_PROJECT_DIR / "umalator_presets.json"
+BUNDLE_PRESET_CACHE_PATH = APPDATA_PROJECT_DIR / "bundle_presets.json"
+STATIC_BUILD_DIR = APPDATA_PROJECT_DIR / "static_build"
+SPRITE_BUILD_DIR = APPDATA_PROJECT_DIR / "sprites"
+IMAGE_CACHE_DIR = APPDATA_PROJECT_DIR / "image_cache"
+AFFINITY_CACHE_PATH = APPDATA_PROJECT_DIR / "affinity.npz"
+SIM_CACHE_PATH = APPDATA_PROJECT_DIR / "sim_cache.sqlite3"
 
 
 DEFAULT_CONFIG = {
@@ -24,6 +32,14 @@ DEFAULT_CONFIG = {
     "web_port": 8080,
     "max_buffer_size": 262144,
     "log_level": "INFO",
+    "decode_mode": "full",
+    "decode_extra_keys": [],
+    "capture_dir": "",
+    "dedupe_window": 4,
+    "image_cache_mb": 256,
+    "sim_cache_mb": 64,
+    "ws_send_timeout": 5.0,
+    "ws_queue_size": 16,
     "preset_source": "global",
     "calculator": {
         "enabled": True,
@@ -50,12 +50,15 @@ HORSE_RANK = {
 }
 
 # Scenario-specific values (UmaLauncher parity)
+# "reduce" selects how scenario_metrics aggregates the paths: "values"
+# (default, raw leaves per path), "len" (element count) or "sum".
 SCENARIO_SPECIFIC_FIELDS = {
     2: {
         "name": "Unity Cup (Aoharu)",
         "features": [
             {
                 "name": "Unity training partner count",
+                "reduce": "len",
                 "data_set": "team_data_set",
                 "paths": [
                     "team_data_set.command_info_array[*].guide_event_partner_array",
@@ -74,6 +77,7 @@ SCENARIO_SPECIFIC_FIELDS = {
             },
             {
                 "name": "Spirit Burst partner count",
+                "reduce": "len",
                 "data_set": "team_data_set",
                 "paths": [
                     "team_data_set.command_info_array[*].soul_event_partner_array",
@@ -96,6 +100,7 @@ SCENARIO_SPECIFIC_FIELDS = {
             },
             {
                 "name": "Grand Live tokens total",
+                "reduce": "sum",
                 "data_set": "live_data_set",
                 "paths": [
                     "live_data_set.command_info_array[*].performance_inc_dec_info_array[*].value",
@@ -140,6 +145,7 @@ SCENARIO_SPECIFIC_FIELDS = {
             },
             {
                 "name": "L'Arc aptitude points gained",
+                "reduce": "sum",
                 "data_set": "arc_data_set",
                 "paths": [
                     "arc_data_set.command_info_array[*].add_global_exp",
@@ -148,6 +154,7 @@ SCENARIO_SPECIFIC_FIELDS = {
             },
             {
                 "name": "L'Arc aptitude points total",
+                "reduce": "sum",
                 "data_set": "arc_data_set",
                 "paths": [
                     "arc_data_set.arc_info.global_exp",
@@ -187,6 +194,7 @@ SCENARIO_SPECIFIC_FIELDS = {
             },
             {
                 "name": "UAF competition wins",
+                "reduce": "len",
                 "data_set": "sport_data_set",
                 "paths": [
                     "sport_data_set.competition_result_array[*].win_command_id_array[*]",
@@ -195,6 +203,7 @@ SCENARIO_SPECIFIC_FIELDS = {
             },
             {
                 "name": "UAF consultations left",
+                "reduce": "len",
                 "data_set": "sport_data_set",
                 "paths": [
                     "sport_data_set.item_id_array[*]",
@@ -208,6 +217,7 @@ SCENARIO_SPECIFIC_FIELDS = {
         "features": [
             {
                 "name": "GFF vegetable gain",
+                "reduce": "sum",
                 "data_set": "cook_data_set",
                 "paths": [
                     "cook_data_set.material_harvest_info_array[*].harvest_num",
@@ -247,6 +257,7 @@ SCENARIO_SPECIFIC_FIELDS = {
         "features": [
             {
                 "name": "Research level total",
+                "reduce": "sum",
                 "data_set": "mecha_data_set",
                 "paths": [
                     "mecha_data_set.command_info_array[*].point_up_info_array[*].value",
@@ -283,6 +294,7 @@ SCENARIO_SPECIFIC_FIELDS = {
         "features": [
             {
                 "name": "Points distribution",
+                "reduce": "sum",
                 "data_set": "onsen_data_set",
                 "paths": [
                     "onsen_data_set.command_info_array[*].dig_info_array[*].dig_value",
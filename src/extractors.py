@@ -0,0 +1,85 @@
+"""Declarative extractor registry used to dispatch parsed packets."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Tuple
+
+from . import metrics
+
+_PLAN_CACHE_LIMIT = 256
+
+
+@dataclass(frozen=True)
+class Extractor:
+    """A packet extractor and the keys/state slices it touches.
+
+    `consumes` lists the top-level packet keys the extractor reads; an
+    extractor runs when any of them is present. An empty tuple means the
+    extractor runs on every packet. `produces` names the state slices (or
+    context entries) it writes, for documentation and introspection.
+    """
+    name: str
+    func: Callable[..., None]
+    consumes: Tuple[str, ...] = ()
+    produces: Tuple[str, ...] = ()
+
+
+class ExtractorRegistry:
+    """Ordered extractor collection with a per-key-set dispatch plan cache."""
+
+    def __init__(self) -> None:
+        self._extractors: List[Extractor] = []
+        self._plans: Dict[FrozenSet[str], Tuple[Extractor, ...]] = {}
+
+    def register(
+        self,
+        name: str,
+        consumes: Iterable[str] = (),
+        produces: Iterable[str] = (),
+    ) -> Callable[[Callable[..., None]], Callable[..., None]]:
+        """Decorator registering `func(target, inner, ctx)` as an extractor.
+
+        Extractors run in registration order, so producers of context
+        entries must be registered before their consumers.
+        """
+        def decorator(func: Callable[..., None]) -> Callable[..., None]:
+            self.add(Extractor(name, func, tuple(consumes), tuple(produces)))
+            return func
+        return decorator
+
+    def add(self, extractor: Extractor) -> None:
+        if any(item.name == extractor.name for item in self._extractors):
+            raise ValueError(f"Extractor already registered: {extractor.name}")
+        self._extractors.append(extractor)
+        self._plans.clear()
+
+    @property
+    def extractors(self) -> Tuple[Extractor, ...]:
+        return tuple(self._extractors)
+
+    def plan(self, keys: Iterable[str]) -> Tuple[Extractor, ...]:
+        """Return the extractors relevant to a packet with the given keys."""
+        key_set = frozenset(keys)
+        plan = self._plans.get(key_set)
+        if plan is not None:
+            return plan
+        plan = tuple(
+            item for item in self._extractors
+            if not item.consumes or not key_set.isdisjoint(item.consumes)
+        )
+        if len(self._plans) >= _PLAN_CACHE_LIMIT:
+            self._plans.clear()
+        self._plans[key_set] = plan
+        return plan
+
+    def dispatch(self, target: Any, inner: dict, ctx: dict) -> None:
+        """Run the planned extractors for `inner`, timing each one."""
+        for item in self.plan(inner.keys()):
+            with metrics.timed(f"extractor.{item.name}"):
+                item.func(target, inner, ctx)
+
+    def describe(self) -> List[dict]:
+        return [
+            {"name": item.name, "consumes": list(item.consumes), "produces": list(item.produces)}
+            for item in self._extractors
+        ]
@@ -0,0 +1,308 @@
+"""Local disk-backed proxy for remote skill icons, portraits and banners.
+
+Extractors emit ``/img/<upstream>/<path>`` URLs instead of third-party
+ones. The first request for an image fetches it through one pooled
+``httpx.AsyncClient`` and stores it in a bounded LRU cache directory;
+later requests (and UI reloads) are served from disk. Concurrent
+requests for the same image share a single upstream fetch, and upstream
+404s are remembered for a while so missing portraits do not hammer the
+remote site. Upstream base URLs are injectable so the proxy can be
+pointed at a local stub server.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Set
+
+import httpx
+from loguru import logger
+
+from . import metrics
+from .config import IMAGE_CACHE_DIR
+
+URL_PREFIX = "/img"
+
+# upstream key -> remote base URL
+UPSTREAMS = {
+    "gametora": "https://gametora.com/images/umamusume/",
+    "chronogenesis": "https://chronogenesis.net/images/",
+}
+
+USER_AGENT = "ProjectBifrost/1.0"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+NEGATIVE_TTL = 600.0
+IMAGE_CACHE_CONTROL = "public, max-age=86400"
+
+_PATH_RE = re.compile(r"^[\w-]+(?:/[\w.-]+)*\.(?:png|jpg|jpeg|webp|gif)$")
+_MEDIA_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".webp": "image/webp",
+    ".gif": "image/gif",
+}
+
+
+def proxy_url(upstream: str, path: str) -> str:
+    return f"{URL_PREFIX}/{upstream}/{path}"
+
+
+def skill_icon_url(icon_id: Any) -> Optional[str]:
+    return proxy_url("gametora", f"skill_icons/utx_ico_skill_{icon_id}.png") if icon_id else None
+
+
+def chara_icon_url(chara_id: Any) -> Optional[str]:
+    return proxy_url("gametora", f"characters/icons/chr_icon_{chara_id}.png") if chara_id else None
+
+
+def trained_chara_url(card_id: Any) -> Optional[str]:
+    return proxy_url("chronogenesis", f"trained_chara/{card_id}.png") if card_id else None
+
+
+def race_banner_url(race_id: Any) -> Optional[str]:
+    if not race_id:
+        return None
+    return proxy_url("gametora", f"en/race_banners/thum_race_rt_000_{int(race_id):04d}_00.png")
+
+
+def to_proxy_url(url: Optional[str]) -> Optional[str]:
+    """Rewrite a remote URL under a known upstream to its proxy URL."""
+    if not url:
+        return url
+    for upstream, base in UPSTREAMS.items():
+        if url.startswith(base):
+            return proxy_url(upstream, url[len(base):])
+    return url
+
+
+def collect_urls(obj: Any, found: Optional[Set[str]] = None) -> Set[str]:
+    """Every proxy URL referenced anywhere inside a state dict."""
+    if found is None:
+        found = set()
+    if isinstance(obj, dict):
+        for value in obj.values():
+            collect_urls(value, found)
+    elif isinstance(obj, list):
+        for value in obj:
+            collect_urls(value, found)
+    elif isinstance(obj, str) and obj.startswith(URL_PREFIX + "/"):
+        found.add(obj)
+    return found
+
+
+class ImageProxy:
+    """Fetch-through LRU disk cache for proxied images."""
+
+    def __init__(
+        self,
+        cache_dir: Path = IMAGE_CACHE_DIR,
+        upstreams: Optional[Dict[str, str]] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_concurrency: int = 8,
+        timeout: float = 10.0,
+        negative_ttl: float = NEGATIVE_TTL,
+    ):
+        self.cache_dir = cache_dir
+        self.upstreams = dict(UPSTREAMS if upstreams is None else upstreams)
+        self.max_bytes = max_bytes
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.negative_ttl = negative_ttl
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._index_loaded = False
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._missing: Dict[str, float] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # Background prefetch and mtime-flush tasks, held until they finish
+        self._tasks: Set[asyncio.Task] = set()
+        # Cache files whose mtime (the on-disk LRU order) is still to be bumped
+        self._touched: Set[str] = set()
+        self._touch_task: Optional[asyncio.Task] = None
+
+    def resolve(self, upstream: str, path: str) -> Optional[str]:
+        """Remote URL for a proxy path, or None if it is not allowed."""
+        base = self.upstreams.get(upstream)
+        if not base or ".." in path or not _PATH_RE.match(path):
+            return None
+        return base + path
+
+    def _cache_name(self, upstream: str, path: str) -> str:
+        digest = hashlib.sha1(f"{upstream}/{path}".encode()).hexdigest()
+        return digest + Path(path).suffix.lower()
+
+    def _load_index(self) -> None:
+        if self._index_loaded:
+            return
+        self._index_loaded = True
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entries = []
+        for path in self.cache_dir.iterdir():
+            if path.is_file() and not path.name.endswith(".tmp"):
+                stat = path.stat()
+                entries.append((stat.st_mtime, path.name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._index[name] = size
+            self._total_bytes += size
+        self._evict()
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _touch(self, name: str) -> None:
+        """Mark a hit; the mtime that restores LRU order on restart is bumped off the loop."""
+        self._index.move_to_end(name)
+        self._touched.add(name)
+        if self._touch_task is None or self._touch_task.done():
+            self._touch_task = self._spawn(self._flush_touches())
+
+    async def _flush_touches(self) -> None:
+        while self._touched:
+            names, self._touched = self._touched, set()
+            await asyncio.to_thread(self._utime, names)
+
+    def _utime(self, names: Iterable[str]) -> None:
+        for name in names:
+            try:
+                os.utime(self.cache_dir / name)
+            except OSError:
+                pass
+
+    def _store(self, name: str, data: bytes) -> Path:
+        target = self.cache_dir / name
+        tmp = target.with_name(name + ".tmp")
+        tmp.write_bytes(data)
+        tmp.replace(target)
+        self._total_bytes += len(data) - self._index.pop(name, 0)
+        self._index[name] = len(data)
+        self._evict()
+        return target
+
+    def _evict(self) -> None:
+        while self._total_bytes > self.max_bytes and len(self._index) > 1:
+            name, size = self._index.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                (self.cache_dir / name).unlink()
+            except OSError:
+                pass
+            metrics.incr("image_proxy.evicted")
+        metrics.set_gauge("image_proxy.cache_bytes", self._total_bytes)
+        metrics.set_gauge("image_proxy.cache_files", len(self._index))
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                headers={"User-Agent": USER_AGENT},
+                limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    def is_cached(self, upstream: str, path: str) -> bool:
+        self._load_index()
+        return self._cache_name(upstream, path) in self._index
+
+    async def get(self, upstream: str, path: str) -> Optional[Path]:
+        """Local path of the image, fetching it on a cache miss."""
+        url = self.resolve(upstream, path)
+        if url is None:
+            return None
+        self._load_index()
+        name = self._cache_name(upstream, path)
+        if name in self._index:
+            self._touch(name)
+            metrics.incr("image_proxy.hit")
+            return self.cache_dir / name
+
+        expires = self._missing.get(name)
+        if expires is not None:
+            if expires > time.monotonic():
+                metrics.incr("image_proxy.negative")
+                return None
+            del self._missing[name]
+
+        future = self._inflight.get(name)
+        if future is not None:
+            metrics.incr("image_proxy.coalesced")
+            return await asyncio.shield(future)
+
+        metrics.incr("image_proxy.miss")
+        future = asyncio.ensure_future(self._fetch(url, name))
+        self._inflight[name] = future
+        future.add_done_callback(lambda _: self._inflight.pop(name, None))
+        return await asyncio.shield(future)
+
+    async def _fetch(self, url: str, name: str) -> Optional[Path]:
+        client = self._get_client()
+        async with self._semaphore:
+            try:
+                with metrics.timed("image_proxy.fetch"):
+                    resp = await client.get(url)
+            except httpx.HTTPError as e:
+                metrics.incr("image_proxy.error")
+                logger.debug(f"Image fetch failed for {url}: {e}")
+                return None
+        if resp.status_code == 404:
+            self._missing[name] = time.monotonic() + self.negative_ttl
+            return None
+        if resp.status_code != 200 or not resp.headers.get("content-type", "").startswith("image/"):
+            metrics.incr("image_proxy.error")
+            logger.debug(f"Image fetch for {url} returned {resp.status_code}")
+            return None
+        try:
+            return self._store(name, resp.content)
+        except OSError as e:
+            logger.error(f"Failed to cache image {url}: {e}")
+            return None
+
+    def prefetch(self, urls: Iterable[str]) -> int:
+        """Schedule background fetches for uncached proxy URLs. Returns the count."""
+        self._load_index()
+        scheduled = 0
+        for url in urls:
+            if not url.startswith(URL_PREFIX + "/"):
+                continue
+            upstream, _, path = url[len(URL_PREFIX) + 1:].partition("/")
+            if self.resolve(upstream, path) is None:
+                continue
+            name = self._cache_name(upstream, path)
+            if name in self._index or name in self._inflight:
+                continue
+            if self._missing.get(name, 0.0) > time.monotonic():
+                continue
+            self._spawn(self.get(upstream, path))
+            scheduled += 1
+        if scheduled:
+            metrics.incr("image_proxy.prefetch", scheduled)
+        return scheduled
+
+    @staticmethod
+    def media_type(path: str) -> str:
+        return _MEDIA_TYPES.get(Path(path).suffix.lower(), "application/octet-stream")
+
+    async def close(self) -> None:
+        for task in list(self._tasks):
+            if task is not self._touch_task:
+                task.cancel()
+        if self._touched:
+            names, self._touched = self._touched, set()
+            await asyncio.to_thread(self._utime, names)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+proxy = ImageProxy()
@@ -4,7 +4,13 @@ from __future__ import annotations
 import os
 import sqlite3
 from pathlib import Path
-from typing import Dict, Tuple, Optional
+from typing import Dict, Iterable, Tuple, Optional
+
+import numpy as np
+from loguru import logger
+
+from . import skill_conditions
+from .config import AFFINITY_CACHE_PATH
 
 
 _LOCAL_DB_PATH = Path(__file__).parent.parent / "data" / "master.mdb"
@@ -46,12 +52,28 @@ _course_set_dict: Dict[int, dict] = {}
 _card_skill_set_dict: Dict[int, Optional[int]] = {}
 _available_skill_set_dict: Dict[int, list] = {}
 _skill_need_point_dict: Dict[int, int] = {}
+_relation_point_dict: Dict[int, int] = {}
+_relation_member_dict: Dict[int, list] = {}
+_factor_skill_dict: Dict[int, int] = {}
+_card_aptitude_dict: Dict[int, Optional[dict]] = {}
+_skill_predicate_dict: Dict[int, skill_conditions.SkillPredicate] = {}
+# Dense uint16 affinity tables over every chara in a succession relation (see _load_affinity)
+_affinity_chara_ids: Optional[np.ndarray] = None
+_affinity_index: Dict[int, int] = {}
+_affinity_pair: Optional[np.ndarray] = None
+_affinity_triple: Optional[np.ndarray] = None
 
 
 def _connect() -> sqlite3.Connection:
     return sqlite3.connect(_resolve_db_path())
 
 
+def _chunks(ids: list, size: int = 500):
+    """Split an id list to stay under SQLite's bound-parameter limit."""
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
 def _load_skill_names() -> None:
     if _skill_name_dict:
         return
@@ -153,6 +175,19 @@ def _load_support_card_meta() -> None:
             _support_card_command_dict[support_card_id] = command_id
 
 
+def _growth_from_row(row: tuple) -> dict:
+    return {
+        "chara_id": row[0],
+        "rarity": row[1],
+        "growth_speed": row[2],
+        "growth_stamina": row[3],
+        "growth_power": row[4],
+        "growth_guts": row[5],
+        "growth_wit": row[6],
+        "available_skill_set_id": row[7],
+    }
+
+
 def _load_card_growth(card_id: int) -> Optional[dict]:
     if card_id in _card_growth_dict:
         return _card_growth_dict[card_id]
@@ -168,20 +203,33 @@ def _load_card_growth(card_id: int) -> Optional[dict]:
     if not row:
         _card_growth_dict[card_id] = None
         return None
-    growth = {
-        "chara_id": row[0],
-        "rarity": row[1],
-        "growth_speed": row[2],
-        "growth_stamina": row[3],
-        "growth_power": row[4],
-        "growth_guts": row[5],
-        "growth_wit": row[6],
-        "available_skill_set_id": row[7],
-    }
+    growth = _growth_from_row(row)
     _card_growth_dict[card_id] = growth
     return growth
 
 
+def _load_card_growths(card_ids: Iterable[int]) -> None:
+    """Fetch every uncached card's growth row in one query."""
+    missing = sorted({card_id for card_id in card_ids if card_id and card_id not in _card_growth_dict})
+    if not missing:
+        return
+    rows = []
+    with _connect() as con:
+        cur = con.cursor()
+        for chunk in _chunks(missing):
+            cur.execute(
+                f"""SELECT id, chara_id, default_rarity, talent_speed, talent_stamina,
+                           talent_pow, talent_guts, talent_wiz, available_skill_set_id
+                    FROM card_data WHERE id IN ({",".join("?" * len(chunk))})""",
+                chunk,
+            )
+            rows.extend(cur.fetchall())
+    for card_id in missing:
+        _card_growth_dict[card_id] = None
+    for row in rows:
+        _card_growth_dict[row[0]] = _growth_from_row(row[1:])
+
+
 def _load_card_skill_set(card_id: int) -> Optional[int]:
     if card_id in _card_skill_set_dict:
         return _card_skill_set_dict[card_id]
@@ -217,6 +265,25 @@ def _load_available_skill_set(available_skill_set_id: int) -> list:
     return skills
 
 
+def _card_text_from_rows(rows: Iterable[tuple]) -> dict:
+    title = None
+    full_name = None
+    for category, text in rows:
+        if category == 4:
+            full_name = text
+        elif category == 5:
+            title = text
+    if title and title.startswith("[") and title.endswith("]"):
+        title = title[1:-1]
+    if not title and full_name:
+        if full_name.startswith("[") and "]" in full_name:
+            title = full_name[1:full_name.index("]")]
+    return {
+        "title": title,
+        "full_name": full_name,
+    }
+
+
 def _load_card_text(card_id: int) -> Optional[dict]:
     if card_id in _card_text_dict:
         return _card_text_dict[card_id]
@@ -229,25 +296,32 @@ def _load_card_text(card_id: int) -> Optional[dict]:
                  AND category IN (4, 5)""",
             (card_id,),
         )
-        title = None
-        full_name = None
-        for category, text in cur.fetchall():
-            if category == 4:
-                full_name = text
-            elif category == 5:
-                title = text
-        if title and title.startswith("[") and title.endswith("]"):
-            title = title[1:-1]
-        if not title and full_name:
-            if full_name.startswith("[") and "]" in full_name:
-                title = full_name[1:full_name.index("]")]
-        _card_text_dict[card_id] = {
-            "title": title,
-            "full_name": full_name,
-        }
+        _card_text_dict[card_id] = _card_text_from_rows(cur.fetchall())
         return _card_text_dict[card_id]
 
 
+def _load_card_texts(card_ids: Iterable[int]) -> None:
+    """Fetch every uncached card's title and full name in one query."""
+    missing = sorted({card_id for card_id in card_ids if card_id and card_id not in _card_text_dict})
+    if not missing:
+        return
+    rows_by_card: Dict[int, list] = {card_id: [] for card_id in missing}
+    with _connect() as con:
+        cur = con.cursor()
+        for chunk in _chunks(missing):
+            cur.execute(
+                f"""SELECT "index", category, text
+                    FROM text_data
+                    WHERE "index" IN ({",".join("?" * len(chunk))})
+                      AND category IN (4, 5)""",
+                chunk,
+            )
+            for card_id, category, text in cur.fetchall():
+                rows_by_card[card_id].append((category, text))
+    for card_id, rows in rows_by_card.items():
+        _card_text_dict[card_id] = _card_text_from_rows(rows)
+
+
 def _load_dress_title(dress_id: int) -> Optional[str]:
     if dress_id in _dress_title_dict:
         return _dress_title_dict[dress_id]
@@ -355,22 +429,151 @@ def _load_succession_factors() -> None:
             }
 
 
+def _load_succession_relations() -> None:
+    if _relation_point_dict:
+        return
+    with _connect() as con:
+        cur = con.cursor()
+        cur.execute("""SELECT relation_type, relation_point FROM succession_relation""")
+        for relation_type, point in cur.fetchall():
+            _relation_point_dict[relation_type] = int(point or 0)
+        cur.execute("""SELECT relation_type, chara_id FROM succession_relation_member""")
+        for relation_type, chara_id in cur.fetchall():
+            _relation_member_dict.setdefault(relation_type, []).append(chara_id)
+
+
+def _db_stamp() -> Optional[Tuple[int, int]]:
+    try:
+        stat = _resolve_db_path().stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _build_affinity() -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(sorted chara ids, pair matrix, triple tensor) summed over relation groups."""
+    points, members = get_succession_relations()
+    chara_ids = np.array(sorted({c for group in members.values() for c in group}), dtype=np.int32)
+    index = {int(c): i for i, c in enumerate(chara_ids)}
+    size = len(chara_ids)
+    pair = np.zeros((size, size), dtype=np.uint16)
+    triple = np.zeros((size, size, size), dtype=np.uint16)
+    for relation_type, group in members.items():
+        rows = np.array(sorted({index[c] for c in group}), dtype=np.intp)
+        point = points.get(relation_type, 0)
+        pair[np.ix_(rows, rows)] += point
+        triple[np.ix_(rows, rows, rows)] += point
+    return chara_ids, pair, triple
+
+
+def _load_affinity() -> None:
+    """Load the affinity tables from the sidecar cache, rebuilding when master.mdb changes."""
+    global _affinity_chara_ids, _affinity_pair, _affinity_triple
+    if _affinity_chara_ids is not None:
+        return
+    stamp = _db_stamp()
+    tables = None
+    if stamp and AFFINITY_CACHE_PATH.exists():
+        try:
+            with np.load(AFFINITY_CACHE_PATH) as data:
+                if tuple(data["stamp"].tolist()) == stamp:
+                    tables = (data["chara_ids"], data["pair"], data["triple"])
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable {AFFINITY_CACHE_PATH.name}: {e}")
+    if tables is None:
+        tables = _build_affinity()
+        if stamp:
+            AFFINITY_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            with AFFINITY_CACHE_PATH.open("wb") as f:
+                np.savez_compressed(
+                    f, stamp=np.array(stamp, dtype=np.int64), chara_ids=tables[0], pair=tables[1], triple=tables[2]
+                )
+    chara_ids, pair, triple = tables
+    # A trailing zero row/column lets index -1 (no relation) look up as 0
+    _affinity_chara_ids = chara_ids
+    _affinity_pair = np.pad(pair, ((0, 1), (0, 1)))
+    _affinity_triple = np.pad(triple, ((0, 1), (0, 1), (0, 1)))
+    _affinity_index.clear()
+    _affinity_index.update({int(c): i for i, c in enumerate(_affinity_chara_ids)})
+
+
+def _load_factor_skills() -> None:
+    if _factor_skill_dict:
+        return
+    with _connect() as con:
+        cur = con.cursor()
+        # target_type 41: the factor grants a hint for the skill in value_1
+        cur.execute(
+            """SELECT sf.factor_id, sfe.value_1
+               FROM succession_factor sf
+               INNER JOIN succession_factor_effect sfe
+                 ON sf.factor_group_id = sfe.factor_group_id
+               WHERE sfe.target_type = 41"""
+        )
+        for factor_id, skill_id in cur.fetchall():
+            _factor_skill_dict[factor_id] = skill_id
+
+
+def _load_card_aptitudes(card_id: int) -> Optional[dict]:
+    if card_id in _card_aptitude_dict:
+        return _card_aptitude_dict[card_id]
+    with _connect() as con:
+        cur = con.cursor()
+        cur.execute(
+            """SELECT proper_ground_turf, proper_ground_dirt,
+                      proper_distance_short, proper_distance_mile, proper_distance_middle, proper_distance_long,
+                      proper_running_style_nige, proper_running_style_senko,
+                      proper_running_style_sashi, proper_running_style_oikomi
+               FROM card_rarity_data WHERE card_id = ?
+               ORDER BY rarity ASC LIMIT 1""",
+            (card_id,),
+        )
+        row = cur.fetchone()
+    if not row:
+        _card_aptitude_dict[card_id] = None
+        return None
+    keys = ("Turf", "Dirt", "Sprint", "Mile", "Medium", "Long", "Front", "Pace", "Late", "End")
+    _card_aptitude_dict[card_id] = dict(zip(keys, row))
+    return _card_aptitude_dict[card_id]
+
+
 def _load_course_sets() -> None:
     if _course_set_dict:
         return
     with _connect() as con:
         cur = con.cursor()
         cur.execute(
-            """SELECT id, distance, ground
+            """SELECT id, distance, ground, race_track_id, turn
                FROM race_course_set"""
         )
-        for course_set_id, distance, ground in cur.fetchall():
+        for course_set_id, distance, ground, race_track_id, turn in cur.fetchall():
             _course_set_dict[int(course_set_id)] = {
                 "distance_m": int(distance) if distance is not None else None,
                 "ground": int(ground) if ground is not None else None,
+                "race_track_id": int(race_track_id) if race_track_id is not None else None,
+                "turn": int(turn) if turn is not None else None,
             }
 
 
+def _load_skill_conditions() -> None:
+    if _skill_predicate_dict:
+        return
+    with _connect() as con:
+        cur = con.cursor()
+        cur.execute(
+            """SELECT id, precondition_1, condition_1, precondition_2, condition_2
+               FROM skill_data"""
+        )
+        for skill_id, pre1, cond1, pre2, cond2 in cur.fetchall():
+            # The second effect block is unused when its condition is empty
+            blocks = [(pre1, cond1)] + ([(pre2, cond2)] if cond2 else [])
+            try:
+                _skill_predicate_dict[int(skill_id)] = skill_conditions.compile_skill(blocks)
+            except ValueError as e:
+                logger.warning(f"Skill {skill_id} condition not understood, keeping it applicable: {e}")
+                _skill_predicate_dict[int(skill_id)] = skill_conditions.ALWAYS
+
+
 def _load_skill_need_points() -> None:
     if _skill_need_point_dict:
         return
@@ -466,10 +669,22 @@ def get_card_growth(card_id: int) -> Optional[dict]:
     return _load_card_growth(card_id)
 
 
+def get_card_growths(card_ids: Iterable[int]) -> Dict[int, Optional[dict]]:
+    """Growth rows for many cards, fetched with one query."""
+    _load_card_growths(card_ids)
+    return _card_growth_dict
+
+
 def get_card_text(card_id: int) -> Optional[dict]:
     return _load_card_text(card_id)
 
 
+def get_card_texts(card_ids: Iterable[int]) -> Dict[int, Optional[dict]]:
+    """Title and full name for many cards, fetched with one query."""
+    _load_card_texts(card_ids)
+    return _card_text_dict
+
+
 def get_dress_title(dress_id: int) -> Optional[str]:
     return _load_dress_title(dress_id)
 
@@ -525,6 +740,65 @@ def get_succession_factor(factor_id: int) -> Optional[dict]:
     return _succession_factor_dict.get(factor_id)
 
 
+def get_succession_factors() -> Dict[int, dict]:
+    """Every succession factor keyed by factor_id."""
+    _load_succession_factors()
+    return _succession_factor_dict
+
+
+def get_succession_relations() -> Tuple[Dict[int, int], Dict[int, list]]:
+    """(relation_type -> point, relation_type -> member chara ids)."""
+    _load_succession_relations()
+    return _relation_point_dict, _relation_member_dict
+
+
+def get_affinity(chara_a: int, chara_b: int) -> int:
+    """Summed relation points of every group containing both charas."""
+    _load_affinity()
+    a, b = _affinity_index.get(chara_a), _affinity_index.get(chara_b)
+    if a is None or b is None:
+        return 0
+    return int(_affinity_pair[a, b])
+
+
+def get_affinity3(chara_a: int, chara_b: int, chara_c: int) -> int:
+    """Summed relation points of every group containing all three charas."""
+    _load_affinity()
+    a, b, c = _affinity_index.get(chara_a), _affinity_index.get(chara_b), _affinity_index.get(chara_c)
+    if a is None or b is None or c is None:
+        return 0
+    return int(_affinity_triple[a, b, c])
+
+
+def affinity_indices(chara_ids: Iterable[Optional[int]]) -> np.ndarray:
+    """Matrix indices for chara ids; -1 for charas without any relation."""
+    _load_affinity()
+    return np.array([_affinity_index.get(c, -1) if c else -1 for c in chara_ids], dtype=np.intp)
+
+
+def get_affinity_tables() -> Tuple[np.ndarray, np.ndarray]:
+    """(pair, triple) tables indexed by affinity_indices(); index -1 yields 0."""
+    _load_affinity()
+    return _affinity_pair, _affinity_triple
+
+
+def get_affinities(chara_a: Iterable[Optional[int]], chara_b: Iterable[Optional[int]]) -> np.ndarray:
+    """Batch get_affinity over two equal-length chara id sequences."""
+    pair, _ = get_affinity_tables()
+    return pair[affinity_indices(chara_a), affinity_indices(chara_b)].astype(np.int64)
+
+
+def get_factor_skills() -> Dict[int, int]:
+    """factor_id -> skill_id for white (skill hint) sparks."""
+    _load_factor_skills()
+    return _factor_skill_dict
+
+
+def get_card_aptitudes(card_id: int) -> Optional[dict]:
+    """Base aptitude ranks of a card at its initial rarity, keyed like veteran items."""
+    return _load_card_aptitudes(card_id)
+
+
 def get_course_set_info(course_set_id: int) -> Optional[dict]:
     _load_course_sets()
     return _course_set_dict.get(course_set_id)
@@ -570,3 +844,28 @@ def get_available_skills(available_skill_set_id: int) -> list:
 def get_skill_need_points(skill_id: int) -> Optional[int]:
     _load_skill_need_points()
     return _skill_need_point_dict.get(int(skill_id))
+
+
+def get_skill_predicates() -> Dict[int, skill_conditions.SkillPredicate]:
+    """skill_id -> compiled static activation predicate."""
+    _load_skill_conditions()
+    return _skill_predicate_dict
+
+
+def filter_applicable_skills(
+    skill_ids: Iterable[int],
+    course_set_id: Optional[int] = None,
+    racedef: Optional[dict] = None,
+    strategy: Optional[str] = None,
+) -> list:
+    """Skills whose conditions can fire on this course, racedef and running style.
+
+    Order is kept; skills unknown to skill_data are kept.
+    """
+    course = get_course_set_info(int(course_set_id)) if course_set_id else None
+    facts = skill_conditions.race_facts(course, racedef, strategy)
+    predicates = get_skill_predicates()
+    return [
+        skill_id for skill_id in skill_ids
+        if predicates.get(int(skill_id), skill_conditions.ALWAYS).possible(facts)
+    ]
@@ -0,0 +1,78 @@
+"""In-process counters and timings exposed via /api/metrics."""
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+_counters: Dict[str, int] = {}
+_timings: Dict[str, dict] = {}
+_gauges: Dict[str, float] = {}
+
+
+def incr(name: str, amount: int = 1) -> None:
+    _counters[name] = _counters.get(name, 0) + amount
+
+
+def set_gauge(name: str, value: float) -> None:
+    _gauges[name] = value
+
+
+def record_timing(name: str, seconds: float) -> None:
+    ms = seconds * 1000.0
+    entry = _timings.get(name)
+    if entry is None:
+        entry = {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0}
+        _timings[name] = entry
+    entry["count"] += 1
+    entry["total_ms"] += ms
+    entry["last_ms"] = ms
+    if ms > entry["max_ms"]:
+        entry["max_ms"] = ms
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(name, time.perf_counter() - start)
+
+
+def _hit_rates() -> Dict[str, float]:
+    rates = {}
+    for name, hits in _counters.items():
+        if not name.endswith(".hit"):
+            continue
+        base = name[: -len(".hit")]
+        misses = _counters.get(f"{base}.miss", 0)
+        total = hits + misses
+        if total:
+            rates[base] = round(hits / total, 4)
+    return rates
+
+
+def snapshot() -> dict:
+    """Return a JSON-friendly copy of all metrics."""
+    timings = {}
+    for name, entry in _timings.items():
+        count = entry["count"]
+        timings[name] = {
+            "count": count,
+            "avg_ms": round(entry["total_ms"] / count, 4) if count else 0.0,
+            "max_ms": round(entry["max_ms"], 4),
+            "last_ms": round(entry["last_ms"], 4),
+        }
+    return {
+        "counters": dict(_counters),
+        "hit_rates": _hit_rates(),
+        "gauges": dict(_gauges),
+        "timings": timings,
+    }
+
+
+def reset() -> None:
+    _counters.clear()
+    _timings.clear()
+    _gauges.clear()
@@ -56,6 +56,7 @@ class GameState:
     race_objectives: list = field(default_factory=list)
     race_combined: list = field(default_factory=list)
     misc_data: dict = field(default_factory=dict)
+    scenario_metrics: dict = field(default_factory=dict)
 
     def to_dict(self) -> dict:
         return {
@@ -71,6 +72,7 @@ class GameState:
             "race_objectives": self.race_objectives,
             "race_combined": self.race_combined,
             "misc_data": self.misc_data,
+            "scenario_metrics": self.scenario_metrics,
             "raw_data": self.raw_data,
         }
 
@@ -114,4 +116,5 @@ def apply_cached_state(payload: dict) -> None:
     game_state.race_objectives = payload.get("race_objectives", []) or []
     game_state.race_combined = payload.get("race_combined", []) or []
     game_state.misc_data = payload.get("misc_data", {}) or {}
+    game_state.scenario_metrics = payload.get("scenario_metrics", {}) or {}
     game_state.raw_data = payload.get("raw_data")
@@ -0,0 +1,63 @@
+"""Selective msgpack decoding for large game responses.
+
+Responses look like ``{"data_headers": {...}, "data": {...}}`` where
+``data`` can hold big subtrees nothing reads (item inventories, story
+logs). ``unpack_selective`` walks the outer maps with the streaming
+``Unpacker`` API and ``skip()``s every ``data`` entry whose key is not in
+the allow-list, so those subtrees are never materialized.
+"""
+from __future__ import annotations
+
+from typing import Any, FrozenSet, Tuple
+
+from msgpack import Unpacker
+
+
+def _unpacker(data: bytes) -> Unpacker:
+    unpacker = Unpacker(raw=False, strict_map_key=False)
+    unpacker.feed(data)
+    return unpacker
+
+
+def unpack_full(data: bytes) -> Tuple[Any, int, int]:
+    """Decode the first object. Returns (obj, consumed_bytes, skipped_keys)."""
+    unpacker = _unpacker(data)
+    parsed = unpacker.unpack()
+    return parsed, unpacker.tell(), 0
+
+
+def unpack_selective(data: bytes, allow_keys: FrozenSet[str]) -> Tuple[Any, int, int]:
+    """Decode the first object, keeping only allow-listed keys under ``data``.
+
+    Falls back to a full decode when the payload is not a map. Returns
+    (obj, consumed_bytes, skipped_keys).
+    """
+    unpacker = _unpacker(data)
+    try:
+        outer_len = unpacker.read_map_header()
+    except ValueError:
+        return unpack_full(data)
+
+    skipped = 0
+    parsed = {}
+    for _ in range(outer_len):
+        key = unpacker.unpack()
+        if key != "data":
+            parsed[key] = unpacker.unpack()
+            continue
+        try:
+            inner_len = unpacker.read_map_header()
+        except ValueError:
+            # Not a map; keep whatever it is.
+            parsed[key] = unpacker.unpack()
+            continue
+        inner = {}
+        for _ in range(inner_len):
+            inner_key = unpacker.unpack()
+            if inner_key in allow_keys:
+                inner[inner_key] = unpacker.unpack()
+            else:
+                unpacker.skip()
+                skipped += 1
+        parsed[key] = inner
+    return parsed, unpacker.tell(), skipped
@@ -0,0 +1,185 @@
+"""Best-parent-pair search over the veteran roster.
+
+Scores every unordered pair of veterans as parents for a target uma and
+returns the top k. A pair's score is
+
+    W_AFFINITY * affinity
+    + sum over requested aptitudes of
+        W_APTITUDE * pink stars + W_FIX * min(pink stars, STARS_PER_RANK * ranks below A)
+    + W_SKILL * white stars on requested skills
+
+where affinity follows the in-game formula over mdb_utils' precomputed
+affinity tables: child-parent relations for both parents, the
+parent-parent relation, and the child-parent-grandparent triples for
+each parent's own parents (when the packet carried them).
+
+Per-roster data (affinity indices, star columns) is
+built once per item list. Each query scores the pair matrix in row
+blocks with NumPy and keeps a bounded heap of the best pairs, so memory
+stays at one block regardless of roster size.
+"""
+from __future__ import annotations
+
+import heapq
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import mdb_utils
+
+# Pink (factor_type 2) spark factor_group_id per aptitude
+APTITUDE_GROUPS = {
+    "Turf": 11,
+    "Dirt": 12,
+    "Front": 21,
+    "Pace": 22,
+    "Late": 23,
+    "End": 24,
+    "Sprint": 31,
+    "Mile": 32,
+    "Medium": 33,
+    "Long": 34,
+}
+APTITUDE_A = 7
+
+W_AFFINITY = 1.0
+W_APTITUDE = 2.0
+W_FIX = 6.0
+W_SKILL = 3.0
+STARS_PER_RANK = 3
+BLOCK_ROWS = 256
+MAX_K = 200
+
+Pair = Tuple[float, int, int]
+
+
+def _flatten_factors(items: Sequence[dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """(owner row, factor id) for every factor of every horse."""
+    lengths = np.fromiter((len(item.get("factor_ids") or []) for item in items), dtype=np.int64, count=len(items))
+    factors = np.fromiter(
+        (int(factor_id or 0) for item in items for factor_id in item.get("factor_ids") or []),
+        dtype=np.int64,
+        count=int(lengths.sum()),
+    )
+    return np.repeat(np.arange(len(items)), lengths), factors
+
+
+class ParentSearch:
+    """Roster-wide arrays for pair scoring, built once per item list."""
+
+    def __init__(self, items: List[dict]):
+        self.items = items
+        self.size = len(items)
+
+        self.chara_ids = np.array([item.get("chara_id") or 0 for item in items], dtype=np.int64)
+        # Indices into the mdb affinity tables; -1 (no relation) looks up as 0
+        self.charas = mdb_utils.affinity_indices(self.chara_ids.tolist())
+        self.grandparents = mdb_utils.affinity_indices(
+            chara_id for item in items for chara_id in ((item.get("parent_chara_ids") or []) + [None, None])[:2]
+        ).reshape(-1, 2)
+        self.pair_relation, self.triple_relation = mdb_utils.get_affinity_tables()
+
+        owners, factors = _flatten_factors(items)
+        info = mdb_utils.get_succession_factors()
+        factor_info = [info.get(int(factor_id)) or {} for factor_id in factors]
+        pink = np.fromiter((f.get("factor_type") == 2 for f in factor_info), dtype=bool, count=len(factors))
+        groups = np.fromiter((f.get("group_id") or 0 for f in factor_info), dtype=np.int64, count=len(factors))
+        rarities = np.fromiter((f.get("rarity") or 0 for f in factor_info), dtype=np.int64, count=len(factors))
+        self.pink = {}
+        for label, group in APTITUDE_GROUPS.items():
+            hit = pink & (groups == group)
+            self.pink[label] = np.bincount(owners[hit], weights=rarities[hit], minlength=self.size)
+        factor_skills = mdb_utils.get_factor_skills()
+        skill_ids = np.fromiter((factor_skills.get(int(f), 0) for f in factors), dtype=np.int64, count=len(factors))
+        self._white = (owners, skill_ids, rarities)
+
+    def horse_affinity(self, chara_id: Optional[int]) -> np.ndarray:
+        """Per-horse child-parent plus child-parent-grandparent affinity."""
+        child = mdb_utils.affinity_indices([chara_id])[0]
+        affinity = self.pair_relation[child, self.charas].astype(np.int64)
+        triple = self.triple_relation[child]
+        for slot in range(2):
+            affinity += triple[self.charas, self.grandparents[:, slot]]
+        return affinity
+
+    def skill_stars(self, skill_ids: Iterable[int]) -> np.ndarray:
+        owners, factor_skills, rarities = self._white
+        wanted = np.isin(factor_skills, np.fromiter(skill_ids, dtype=np.int64))
+        return np.bincount(owners[wanted], weights=rarities[wanted], minlength=self.size)
+
+    def search(
+        self,
+        chara_id: Optional[int] = None,
+        aptitudes: Optional[Dict[str, int]] = None,
+        targets: Sequence[str] = (),
+        skills: Sequence[int] = (),
+        k: int = 20,
+    ) -> List[dict]:
+        """Top-k parent pairs for a child chara.
+
+        `aptitudes` are the child's base ranks (1-8) used to weigh fixes;
+        `targets` are the aptitude labels to cover (e.g. Turf, Medium).
+        """
+        k = max(1, min(k, MAX_K))
+        if self.size < 2:
+            return []
+        horse_aff = self.horse_affinity(chara_id)
+        needs = {label: max(0, APTITUDE_A - int((aptitudes or {}).get(label) or APTITUDE_A)) for label in targets}
+        white = self.skill_stars(skills) if skills else np.zeros(self.size)
+        # Terms that add up per parent can be summed per horse once
+        solo = W_AFFINITY * horse_aff + W_SKILL * white
+        fixes = [(self.pink[label], STARS_PER_RANK * need) for label, need in needs.items() if need]
+        for label in targets:
+            solo = solo + W_APTITUDE * self.pink[label]
+
+        excluded = self.chara_ids == 0
+        if chara_id:
+            excluded |= self.chara_ids == chara_id
+        valid = np.flatnonzero(~excluded)
+        heap: List[Pair] = []
+        for start in range(0, len(valid), BLOCK_ROWS):
+            rows = valid[start:start + BLOCK_ROWS]
+            # Only the upper triangle: columns from this block's first row onward
+            cols = valid[start:]
+            scores = solo[rows][:, None] + solo[cols][None, :]
+            scores += W_AFFINITY * self.pair_relation[self.charas[rows][:, None], self.charas[cols][None, :]]
+            for stars, cap in fixes:
+                scores += W_FIX * np.minimum(stars[rows][:, None] + stars[cols][None, :], cap)
+            # Unordered pairs of different charas only
+            scores[cols[None, :] <= rows[:, None]] = -np.inf
+            scores[self.chara_ids[rows][:, None] == self.chara_ids[cols][None, :]] = -np.inf
+            flat = scores.ravel()
+            take = min(k, flat.size)
+            best = np.argpartition(flat, -take)[-take:]
+            for pos in best.tolist():
+                score = float(flat[pos])
+                if score == -np.inf:
+                    continue
+                pair = (score, int(rows[pos // len(cols)]), int(cols[pos % len(cols)]))
+                if len(heap) < k:
+                    heapq.heappush(heap, pair)
+                elif pair > heap[0]:
+                    heapq.heapreplace(heap, pair)
+
+        results = []
+        for score, i, j in sorted(heap, reverse=True):
+            affinity = horse_aff[i] + horse_aff[j] + self.pair_relation[self.charas[i], self.charas[j]]
+            results.append({
+                "score": round(score, 2),
+                "affinity": int(affinity),
+                "aptitude_stars": {label: int(self.pink[label][i] + self.pink[label][j]) for label in targets},
+                "skill_stars": int(white[i] + white[j]),
+                "parents": [self.items[i], self.items[j]],
+            })
+        return results
+
+
+_search: Optional[ParentSearch] = None
+
+
+def get_search(items: List[dict]) -> ParentSearch:
+    """Search arrays for `items`, rebuilt only when a different list is passed."""
+    global _search
+    if _search is None or _search.items is not items:
+        _search = ParentSearch(items)
+    return _search
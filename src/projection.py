@@ -0,0 +1,79 @@
+"""Field projections for REST responses (``?fields=a.b,c``).
+
+A field list is a comma-separated set of dotted paths. Paths select
+nested dict keys; lists are projected element-wise, so
+``skills_tab.skill_tips.name`` keeps only the names of every tip. A
+shorter path wins over a longer one under it (``training`` keeps the
+whole training dict even if ``training.stats`` is also listed).
+Compiled projections are cached per normalized field set.
+"""
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+
+_FIELD_RE = re.compile(r"^[A-Za-z0-9_]+(?:\.[A-Za-z0-9_]+)*$")
+MAX_FIELDS = 64
+
+Projection = Callable[[Any], Any]
+
+
+def normalize_fields(raw: Optional[str]) -> Tuple[str, ...]:
+    """Parse a fields parameter into a sorted, de-duplicated path tuple.
+
+    Raises ValueError on malformed paths.
+    """
+    fields = sorted({part.strip() for part in (raw or "").split(",") if part.strip()})
+    if len(fields) > MAX_FIELDS:
+        raise ValueError(f"Too many fields (max {MAX_FIELDS})")
+    for field in fields:
+        if not _FIELD_RE.match(field):
+            raise ValueError(f"Invalid field {field!r}")
+    return tuple(fields)
+
+
+def _build_tree(fields: Tuple[str, ...]) -> Dict[str, Any]:
+    tree: Dict[str, Any] = {}
+    # Shorter paths sort first, so a whole-subtree selection is seen before its children
+    for field in sorted(fields, key=lambda f: f.count(".")):
+        node = tree
+        keys = field.split(".")
+        for key in keys[:-1]:
+            child = node.setdefault(key, {})
+            if child is None:
+                break
+            node = child
+        else:
+            node[keys[-1]] = None
+    return tree
+
+
+def _compile_tree(tree: Dict[str, Any]) -> Projection:
+    children = [(key, _compile_tree(sub) if sub is not None else None) for key, sub in tree.items()]
+
+    def project(value: Any) -> Any:
+        if isinstance(value, list):
+            return [project(item) for item in value]
+        if not isinstance(value, dict):
+            return value
+        out = {}
+        for key, child in children:
+            if key in value:
+                out[key] = value[key] if child is None else child(value[key])
+        return out
+    return project
+
+
+@lru_cache(maxsize=128)
+def compile_fields(fields: Tuple[str, ...]) -> Projection:
+    """Compile a normalized field tuple into a projection function."""
+    return _compile_tree(_build_tree(fields))
+
+
+def project(value: Any, raw_fields: Optional[str]) -> Any:
+    """Apply a raw ``fields`` parameter to `value` (no-op when empty)."""
+    fields = normalize_fields(raw_fields)
+    if not fields:
+        return value
+    return compile_fields(fields)(value)
@@ -0,0 +1,175 @@
+"""Compiled path expressions for constants.SCENARIO_SPECIFIC_FIELDS.
+
+Paths are dotted key chains evaluated against the packet's inner data,
+e.g. ``live_data_set.command_info_array[*].performance_inc_dec_info_array[*].value``.
+A ``[*]`` suffix fans out over every element of a list and ``[N]`` picks
+one element. Each feature's paths are compiled once into closures and
+reduced with the feature's ``reduce`` mode:
+
+- ``values`` (default): leaves per path, keyed by the path's last key
+- ``len``: total element count (list leaves count their length)
+- ``sum``: total of numeric leaves
+"""
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, Tuple
+
+from loguru import logger
+
+from . import constants
+
+PathFn = Callable[[Any], List[Any]]
+
+_SEGMENT_RE = re.compile(r"^([A-Za-z_][A-Za-z0-9_]*)((?:\[(?:\*|\d+)\])*)$")
+_INDEX_RE = re.compile(r"\[(\*|\d+)\]")
+
+
+def _parse_path(path: str) -> List[Tuple[str, Any]]:
+    steps: List[Tuple[str, Any]] = []
+    for segment in path.split("."):
+        match = _SEGMENT_RE.match(segment.strip())
+        if not match:
+            raise ValueError(f"Invalid path segment {segment!r} in {path!r}")
+        steps.append(("key", match.group(1)))
+        for index in _INDEX_RE.findall(match.group(2)):
+            steps.append(("all", None) if index == "*" else ("index", int(index)))
+    return steps
+
+
+def _key_step(name: str, nxt: PathFn) -> PathFn:
+    def step(node: Any) -> List[Any]:
+        if not isinstance(node, dict):
+            return []
+        value = node.get(name)
+        if value is None:
+            return []
+        return nxt(value)
+    return step
+
+
+def _all_step(nxt: PathFn) -> PathFn:
+    def step(node: Any) -> List[Any]:
+        if not isinstance(node, list):
+            return []
+        out: List[Any] = []
+        for item in node:
+            out.extend(nxt(item))
+        return out
+    return step
+
+
+def _index_step(index: int, nxt: PathFn) -> PathFn:
+    def step(node: Any) -> List[Any]:
+        if not isinstance(node, list) or index >= len(node):
+            return []
+        return nxt(node[index])
+    return step
+
+
+def _leaf(node: Any) -> List[Any]:
+    return [node]
+
+
+@lru_cache(maxsize=None)
+def compile_path(path: str) -> PathFn:
+    """Compile a path expression into a closure returning its leaf values."""
+    fn: PathFn = _leaf
+    for kind, arg in reversed(_parse_path(path)):
+        if kind == "key":
+            fn = _key_step(arg, fn)
+        elif kind == "all":
+            fn = _all_step(fn)
+        else:
+            fn = _index_step(arg, fn)
+    return fn
+
+
+def _count(leaves: List[Any]) -> int:
+    total = 0
+    for leaf in leaves:
+        if isinstance(leaf, (list, dict)):
+            total += len(leaf)
+        elif leaf is not None:
+            total += 1
+    return total
+
+
+def _sum(leaves: List[Any]) -> float:
+    total = 0
+    for leaf in leaves:
+        if isinstance(leaf, bool):
+            total += int(leaf)
+        elif isinstance(leaf, (int, float)):
+            total += leaf
+    return total
+
+
+def compile_feature(feature: dict) -> Callable[[dict], Any]:
+    """Compile one feature spec into an evaluator over the inner packet."""
+    paths = list(feature.get("paths") or [])
+    fns = [compile_path(path) for path in paths]
+    mode = feature.get("reduce", "values")
+
+    if mode == "len":
+        def evaluate(inner: dict) -> Any:
+            return sum(_count(fn(inner)) for fn in fns)
+    elif mode == "sum":
+        def evaluate(inner: dict) -> Any:
+            return sum(_sum(fn(inner)) for fn in fns)
+    elif mode == "values":
+        names = []
+        for path in paths:
+            kind, arg = _parse_path(path)[-1]
+            names.append(arg if kind == "key" else path)
+        pairs = list(zip(names, fns))
+
+        def evaluate(inner: dict) -> Any:
+            return {name: fn(inner) for name, fn in pairs}
+    else:
+        raise ValueError(f"Unknown reduce mode {mode!r} for feature {feature.get('name')!r}")
+    return evaluate
+
+
+CompiledFeature = Tuple[int, str, str, Callable[[dict], Any]]
+
+
+@lru_cache(maxsize=1)
+def get_compiled() -> Tuple[CompiledFeature, ...]:
+    """Compile every SCENARIO_SPECIFIC_FIELDS feature (once per process)."""
+    compiled: List[CompiledFeature] = []
+    for scenario_id, spec in constants.SCENARIO_SPECIFIC_FIELDS.items():
+        for feature in spec.get("features", []):
+            try:
+                fn = compile_feature(feature)
+            except ValueError as e:
+                logger.error(f"Skipping scenario feature: {e}")
+                continue
+            compiled.append((scenario_id, feature.get("data_set", ""), feature.get("name", ""), fn))
+    return tuple(compiled)
+
+
+def data_set_keys() -> Tuple[str, ...]:
+    """Top-level packet keys that carry scenario data."""
+    return tuple(sorted({data_set for _, data_set, _, _ in get_compiled() if data_set}))
+
+
+def evaluate(inner: dict) -> Optional[dict]:
+    """Evaluate the features whose data set is present in `inner`."""
+    result: Optional[dict] = None
+    for scenario_id, data_set, name, fn in get_compiled():
+        if data_set not in inner:
+            continue
+        if result is None:
+            result = {
+                "scenario_id": scenario_id,
+                "scenario": constants.SCENARIO_SPECIFIC_FIELDS[scenario_id].get("name"),
+                "features": {},
+            }
+        try:
+            result["features"][name] = fn(inner)
+        except Exception as e:
+            logger.debug(f"Scenario feature {name!r} failed: {e}")
+            result["features"][name] = None
+    return result
@@ -1,29 +1,39 @@
 """FastAPI server with WebSocket for live UI updates."""
 import asyncio
 import json
-import re
-from datetime import datetime
-from html import unescape
-from urllib.request import urlopen, Request
+import time
 from pathlib import Path
-from typing import Set
+from typing import Optional, Set
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from loguru import logger
 
 from .models import game_state, GameState
-from . import veteran_utils, mdb_utils, window_utils
+from . import veteran_utils, mdb_utils, window_utils, metrics, static_assets, sprite_atlas, image_proxy, projection, veteran_index, veteran_store, veteran_import, parent_search, sim_cache
+from .ws_hub import hub
+from .umalator_presets import PresetService
 from .config import VETERAN_SELECTION_PATH, load_config, save_config, STATE_CACHE_PATH
 
 app = FastAPI(title="Project Bifrost", version="0.1.0")
 
-# WebSocket connections
-connected_clients: Set[WebSocket] = set()
-
 # Static files
 STATIC_DIR = Path(__file__).parent.parent / "static"
+
+
+# Registered before the /static mount so it takes precedence over the plain file
+@app.get("/static/umalator/index.html")
+async def umalator_page():
+    """Umalator iframe page pointing at the fingerprinted bundle."""
+    try:
+        html = static_assets.manifest.render_page("umalator/index.html")
+    except Exception as e:
+        logger.error(f"Failed to render Umalator page: {e}")
+        return FileResponse(STATIC_DIR / "umalator" / "index.html")
+    return HTMLResponse(html, headers={"Cache-Control": "no-cache"})
+
+
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 ASSETS_DIR = Path(__file__).parent.parent / "assets"
 app.mount("/assets", StaticFiles(directory=ASSETS_DIR), name="assets")
@@ -32,43 +42,315 @@ ROOT_DIR = Path(__file__).resolve().parents[2]
 VETERAN_PATH = ROOT_DIR / "veteran.txt"
 SELECTION_PATH = VETERAN_SELECTION_PATH
 
+preset_service = PresetService()
+
+
+@app.on_event("startup")
+async def build_static_assets():
+    """Fingerprint UI assets and pack icon sprites (cached by content hash)."""
+    try:
+        await asyncio.to_thread(static_assets.manifest.build)
+    except Exception as e:
+        logger.error(f"Failed to build static assets: {e}")
+    try:
+        await asyncio.to_thread(sprite_atlas.atlas.build)
+    except Exception as e:
+        logger.error(f"Failed to build sprite atlases: {e}")
+    cfg = load_config()
+    image_proxy.proxy.max_bytes = int(cfg.get("image_cache_mb", 256)) * 1024 * 1024
+    sim_cache.cache.max_bytes = int(cfg.get("sim_cache_mb", 64)) * 1024 * 1024
+    hub.send_timeout = float(cfg.get("ws_send_timeout", 5.0))
+    hub.max_queue = int(cfg.get("ws_queue_size", 16))
+
+
+@app.on_event("shutdown")
+async def close_image_proxy():
+    await image_proxy.proxy.close()
+
+
+@app.on_event("shutdown")
+async def close_veteran_store():
+    veteran_store.store.close()
+
+
+@app.on_event("shutdown")
+async def close_sim_cache():
+    sim_cache.cache.close()
+
 
 @app.get("/")
 async def root():
     """Serve main UI page."""
-    return FileResponse(STATIC_DIR / "index.html")
+    try:
+        html = static_assets.manifest.render_index()
+        html = static_assets.insert_before_scripts(html, sprite_atlas.atlas.head_snippet())
+    except Exception as e:
+        logger.error(f"Failed to render index.html: {e}")
+        return FileResponse(STATIC_DIR / "index.html")
+    return HTMLResponse(html, headers={"Cache-Control": "no-cache"})
+
+
+@app.get(sprite_atlas.URL_PREFIX + "/{name}")
+async def get_sprite_file(name: str):
+    """Serve a generated sprite sheet or its stylesheet."""
+    path = sprite_atlas.atlas.lookup(name)
+    if path is None or not path.exists():
+        return Response(status_code=404)
+    return FileResponse(path, headers={"Cache-Control": static_assets.IMMUTABLE_CACHE_CONTROL})
+
+
+@app.get(image_proxy.URL_PREFIX + "/{upstream}/{path:path}")
+async def get_proxied_image(upstream: str, path: str):
+    """Serve a remote icon/portrait from the local image cache."""
+    if image_proxy.proxy.resolve(upstream, path) is None:
+        return Response(status_code=400)
+    local = await image_proxy.proxy.get(upstream, path)
+    if local is None:
+        return Response(status_code=404)
+    return FileResponse(
+        local,
+        media_type=image_proxy.ImageProxy.media_type(path),
+        headers={"Cache-Control": image_proxy.IMAGE_CACHE_CONTROL},
+    )
+
+
+@app.get(static_assets.URL_PREFIX + "/{name}")
+async def get_fingerprinted_asset(name: str, request: Request):
+    """Serve a fingerprinted asset with content negotiation and immutable caching."""
+    asset = static_assets.manifest.lookup(name)
+    if asset is None:
+        return Response(status_code=404)
+    encoding, path = static_assets.manifest.negotiate(asset, request.headers.get("accept-encoding"))
+    etag = asset.etag(encoding)
+    headers = {
+        "Cache-Control": static_assets.IMMUTABLE_CACHE_CONTROL,
+        "ETag": etag,
+        "Vary": "Accept-Encoding",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return FileResponse(path, media_type=asset.media_type, headers=headers)
+
+
+def _project(payload, fields: Optional[str]):
+    """Apply a ?fields= projection, or a 400 response for a bad field list."""
+    try:
+        return projection.project(payload, fields)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
 
 
 @app.get("/api/state")
-async def get_state():
-    """Get current game state."""
-    return game_state.to_dict()
+async def get_state(fields: Optional[str] = None):
+    """Get current game state (optionally projected with ?fields=a.b,c)."""
+    return _project(game_state.to_dict(), fields)
+
+@app.get("/api/state/resources")
+async def get_state_resources():
+    """Current revision of every cold state resource."""
+    publish_state()
+    return hub.topics.cold_revs()
+
+
+@app.get("/api/state/resources/{name}")
+async def get_state_resource(name: str, request: Request):
+    """Body of one cold state resource (large, rarely-changing slice)."""
+    if not hub.topics.resource(name):
+        publish_state()
+    found = hub.topics.resource(name)
+    if found is None:
+        return Response(status_code=404)
+    rev, body = found
+    headers = {"ETag": hub.topics.etag(name), "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    content = f'{{"name":"{name}","rev":{rev},"data":{body}}}'
+    return Response(content, media_type="application/json", headers=headers)
+
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """Get extraction counters, cache hit rates, and timings."""
+    return metrics.snapshot()
+
+
+_veteran_import_lock = asyncio.Lock()
+# Background imports started by POST /api/veteran/import; held so they are not collected mid-run
+_veteran_import_tasks: Set[asyncio.Task] = set()
+
+
+async def _run_veteran_import() -> list:
+    """Stream veteran.txt into the store off the event loop; caller holds the import lock."""
+    try:
+        return await asyncio.to_thread(veteran_import.import_file, VETERAN_PATH)
+    except Exception as e:
+        logger.error(f"Failed to read veteran.txt: {e}")
+        return []
 
-@app.get("/api/veteran")
-async def get_veteran():
-    """Get veteran horses list from veteran.txt."""
+
+async def _import_veteran_file() -> list:
+    """Import veteran.txt, one import at a time."""
+    async with _veteran_import_lock:
+        return await _run_veteran_import()
+
+
+async def _run_locked_veteran_import() -> None:
+    try:
+        await _run_veteran_import()
+    finally:
+        veteran_import.progress["running"] = False
+        _veteran_import_lock.release()
+
+
+async def _load_veteran_items() -> list:
     cached = veteran_utils.load_cache()
     if cached:
-        return {"items": cached}
+        return cached
 
     if not VETERAN_PATH.exists():
-        return {"items": []}
+        return []
+    return await _import_veteran_file()
 
-    try:
-        raw = VETERAN_PATH.read_text(encoding="utf-8")
-        start = raw.find("{")
-        end = raw.rfind("}")
-        if start == -1 or end == -1:
-            return {"items": []}
-        payload = json.loads(raw[start:end + 1])
-        data = payload.get("data", {})
-        trained = data.get("trained_chara_array", [])
-        items = veteran_utils.build_veteran_items(trained)
-        veteran_utils.save_cache(items)
+
+@app.get("/api/veteran")
+async def get_veteran(
+    fields: Optional[str] = None,
+    offset: int = 0,
+    limit: int = 0,
+    deleted: bool = False,
+):
+    """Get veteran horses (?fields= applies per item).
+
+    With `limit` the page is read straight from the veteran store, ordered
+    by rank score; `deleted` includes tombstoned horses.
+    """
+    if limit <= 0 and not deleted:
+        items = _project(await _load_veteran_items(), fields)
+        if isinstance(items, JSONResponse):
+            return items
         return {"items": items}
-    except Exception as e:
-        logger.error(f"Failed to read veteran.txt: {e}")
-        return {"items": []}
+
+    if veteran_store.store.is_empty():
+        await _load_veteran_items()
+    items = _project(veteran_store.store.page(offset, limit, include_deleted=deleted), fields)
+    if isinstance(items, JSONResponse):
+        return items
+    return {
+        "total": veteran_store.store.count(include_deleted=deleted),
+        "offset": offset,
+        "limit": limit,
+        "items": items,
+    }
+
+
+@app.get("/api/veteran/query")
+async def query_veteran(
+    filter_: Optional[str] = Query(None, alias="filter"),
+    sort: Optional[str] = "-rank_score",
+    skills: Optional[str] = None,
+    q: Optional[str] = None,
+    ids: Optional[str] = None,
+    offset: int = 0,
+    limit: int = 50,
+    fields: Optional[str] = None,
+):
+    """Filter, sort and page veteran horses server-side (see veteran_index)."""
+    try:
+        filters = veteran_index.parse_filters(filter_)
+        sort_keys = veteran_index.parse_sort(sort)
+        skill_ids = veteran_index.parse_ints(skills)
+        id_list = veteran_index.parse_ints(ids) if ids is not None else None
+        fields_tuple = projection.normalize_fields(fields)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    index = veteran_index.get_index(await _load_veteran_items())
+    start = time.perf_counter()
+    total, rows = index.query(filters, sort_keys, skill_ids, q or "", id_list, offset, limit)
+    took = time.perf_counter() - start
+    metrics.record_timing("veteran.query", took)
+    items = [index.items[row] for row in rows.tolist()]
+    if fields_tuple:
+        items = projection.compile_fields(fields_tuple)(items)
+    return {
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "took_ms": round(took * 1000, 3),
+        "items": items,
+    }
+
+
+@app.get("/api/veteran/pairs")
+async def search_parent_pairs(
+    card_id: Optional[int] = None,
+    chara_id: Optional[int] = None,
+    targets: Optional[str] = None,
+    skills: Optional[str] = None,
+    k: int = 20,
+    fields: Optional[str] = None,
+):
+    """Rank veteran parent pairs for a child card (see parent_search)."""
+    try:
+        target_list = [part.strip() for part in (targets or "").split(",") if part.strip()]
+        unknown = [label for label in target_list if label not in parent_search.APTITUDE_GROUPS]
+        if unknown:
+            raise ValueError(f"Unknown aptitude {unknown[0]!r}")
+        skill_ids = veteran_index.parse_ints(skills)
+        projection.normalize_fields(fields)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    items = await _load_veteran_items()
+    aptitudes = None
+    if card_id:
+        growth = mdb_utils.get_card_growth(card_id)
+        chara_id = chara_id or (growth or {}).get("chara_id")
+        aptitudes = mdb_utils.get_card_aptitudes(card_id)
+
+    def run():
+        search = parent_search.get_search(items)
+        return search.search(chara_id, aptitudes, target_list, skill_ids, k)
+
+    start = time.perf_counter()
+    results = await asyncio.to_thread(run)
+    took = time.perf_counter() - start
+    metrics.record_timing("veteran.pairs", took)
+    results = _project(results, fields)
+    if isinstance(results, JSONResponse):
+        return results
+    return {
+        "chara_id": chara_id,
+        "horses": len(items),
+        "took_ms": round(took * 1000, 3),
+        "pairs": results,
+    }
+
+
+@app.get("/api/veteran/import")
+async def get_veteran_import():
+    """Progress of the running (or last) veteran.txt import."""
+    return veteran_import.snapshot()
+
+
+@app.post("/api/veteran/import")
+async def start_veteran_import():
+    """Re-import veteran.txt in the background; poll GET for progress."""
+    if not VETERAN_PATH.exists():
+        return JSONResponse({"error": "veteran.txt not found"}, status_code=404)
+    if _veteran_import_lock.locked():
+        return JSONResponse(veteran_import.snapshot(), status_code=409)
+    # Taken here (never waits: checked above with no await in between) so a
+    # second POST sees the import as running before this one returns
+    await _veteran_import_lock.acquire()
+    veteran_import.progress.update(running=True, error=None)
+    task = asyncio.create_task(_run_locked_veteran_import())
+    _veteran_import_tasks.add(task)
+    task.add_done_callback(_veteran_import_tasks.discard)
+    return JSONResponse(veteran_import.snapshot(), status_code=202)
 
 
 @app.get("/api/veteran-selection")
@@ -107,7 +389,7 @@ async def get_settings():
 async def post_settings(payload: dict):
     """Save settings."""
     cfg = load_config()
-    for key in ("udp_host", "udp_port", "web_host", "web_port", "max_buffer_size", "log_level", "calculator", "preset_source"):
+    for key in ("udp_host", "udp_port", "web_host", "web_port", "max_buffer_size", "log_level", "calculator", "preset_source", "decode_mode"):
         if key in payload:
             cfg[key] = payload[key]
     save_config(cfg)
@@ -139,379 +421,10 @@ async def reset_state():
 
 @app.get("/api/umalator-presets")
 async def get_umalator_presets():
-    """Fetch Umalator preset list from bundle.js (alpha123 or GitHub fallback)."""
+    """Get Umalator presets (cached; stale entries refresh in the background)."""
     cfg = load_config()
-    preset_source = cfg.get("preset_source", "global")
-    urls = [
-        "https://alpha123.github.io/uma-tools/umalator-global/bundle.js",
-        "https://raw.githubusercontent.com/alpha123/uma-tools/master/umalator-global/bundle.js",
-    ]
-    course_urls = [
-        "https://alpha123.github.io/uma-tools/umalator-global/course_data.json",
-        "https://raw.githubusercontent.com/alpha123/uma-tools/master/umalator-global/course_data.json",
-    ]
-
-    def _load_course_data() -> dict:
-        headers = {"User-Agent": "ProjectBifrost/0.1"}
-        for url in course_urls:
-            try:
-                req = Request(url, headers=headers)
-                data = json.loads(urlopen(req, timeout=10).read().decode("utf-8"))
-                if data:
-                    return data
-            except Exception as e:
-                logger.error(f"Failed to fetch course data from {url}: {e}")
-                continue
-        try:
-            local_path = STATIC_DIR / "umalator" / "course_data.json"
-            if local_path.exists():
-                return json.loads(local_path.read_text(encoding="utf-8"))
-        except Exception as e:
-            logger.error(f"Failed to read local course data: {e}")
-        return {}
-
-    def _extract_presets(text: str) -> list:
-        start = text.find("var ci=")
-        if start == -1:
-            markers = [
-                "Capricorn Cup",
-                "Sagittarius Cup",
-                "Scorpio Cup",
-                "Libra Cup",
-                "Virgo Cup",
-                "Leo Cup",
-                "Cancer Cup",
-                "Gemini Cup",
-                "Taurus Cup",
-            ]
-            marker_positions = []
-            for marker in markers:
-                pos = text.find(marker)
-                if pos != -1:
-                    marker_positions.append(pos)
-            marker_pos = min(marker_positions) if marker_positions else -1
-            if marker_pos != -1:
-                pattern = re.compile(r"(?:var|let|const)\s+[A-Za-z_$][\w$]*\s*=\s*\[")
-                matches = list(pattern.finditer(text[:marker_pos]))
-                if matches:
-                    start = matches[-1].start()
-        if start == -1:
-            return []
-        start = text.find("[", start)
-        level = 0
-        end = None
-        for i in range(start, len(text)):
-            ch = text[i]
-            if ch == "[":
-                level += 1
-            elif ch == "]":
-                level -= 1
-                if level == 0:
-                    end = i
-                    break
-        if end is None:
-            return []
-        raw = text[start:end + 1]
-        raw = re.sub(r"([,{])\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*:", r'\1"\2":', raw)
-        raw = raw.replace("undefined", "null")
-        raw = re.sub(r",\\s*}", "}", raw)
-        raw = re.sub(r",\\s*]", "]", raw)
-        return json.loads(raw)
-
-    def _fetch_jp_cm_presets(course_data: dict) -> list:
-        url = "https://gametora.com/umamusume/events/champions-meeting"
-        try:
-            req = Request(url, headers={"User-Agent": "ProjectBifrost/0.1"})
-            html_text = urlopen(req, timeout=15).read().decode("utf-8")
-        except Exception as e:
-            logger.error(f"Failed to fetch JP CM list from {url}: {e}")
-            return []
-
-        section_marker = "Champions Meeting History (Japanese server)"
-        marker_idx = html_text.find(section_marker)
-        if marker_idx == -1:
-            return []
-        snippet = html_text[marker_idx:]
-        snippet = unescape(snippet)
-        snippet = re.sub(r"<!--.*?-->", "", snippet, flags=re.DOTALL)
-        snippet = snippet.replace("\n", " ").replace("\xa0", " ")
-
-        dash = r"[\\u2013\\u2014-]"
-        pattern = re.compile(
-            r"<div[^>]*>\\s*<div><b>(?P<name>[^<]+)</b></div>\\s*"
-            rf"<div[^>]*>\\s*<span>(?P<start>[^<]+)</span>\\s*{dash}\\s*<span>(?P<end>[^<]+)</span>\\s*</div>\\s*"
-            rf"<div>(?P<track>[^<]+)\\s*{dash}\\s*(?P<surface>[^<]+)</div>\\s*"
-            rf"<div>(?P<distance>\\d+)\\s*m\\s*{dash}\\s*(?P<distance_type>[^<]+)\\s*{dash}\\s*(?P<turn>[^<]+)</div>\\s*"
-            rf"<div>(?P<ground>[^<]+)\\s*{dash}\\s*(?P<season>[^<]+)\\s*{dash}\\s*(?P<weather>[^<]+)</div>",
-            flags=re.IGNORECASE,
-        )
-
-        surface_map = {"turf": 1, "dirt": 2}
-        ground_map = {"firm": 1, "good": 2, "soft": 3, "heavy": 4}
-        season_map = {"spring": 1, "summer": 2, "autumn": 3, "fall": 3, "winter": 4}
-        weather_map = {"sunny": 1, "cloudy": 2, "rainy": 3, "snowy": 4}
-        turn_map = {"clockwise": 1, "counterclockwise": 2}
-        track_fallback = {
-            "sapporo": 10001,
-            "hakodate": 10002,
-            "niigata": 10003,
-            "fukushima": 10004,
-            "nakayama": 10005,
-            "tokyo": 10006,
-            "chukyo": 10007,
-            "kyoto": 10008,
-            "hanshin": 10009,
-            "kokura": 10010,
-            "oi": 10101,
-            "ooi": 10101,
-        }
-
-        presets = []
-        for match in pattern.finditer(snippet):
-            name = match.group("name").strip()
-            track_name = match.group("track").strip()
-            surface_label = match.group("surface").strip().lower()
-            distance_m = int(match.group("distance"))
-            ground_label = match.group("ground").strip().lower()
-            season_label = match.group("season").strip().lower()
-            weather_label = match.group("weather").strip().lower()
-            turn_label = match.group("turn").strip().lower()
-
-            surface = surface_map.get(surface_label)
-            if surface is None:
-                continue
-            race_track_id = mdb_utils.get_race_track_id_by_name(track_name)
-            if race_track_id is None:
-                race_track_id = track_fallback.get(track_name.lower())
-            if race_track_id is None:
-                continue
-
-            turn_value = turn_map.get(turn_label)
-            course_id = None
-            for cid, info in course_data.items():
-                if info.get("raceTrackId") != race_track_id:
-                    continue
-                if info.get("distance") != distance_m:
-                    continue
-                if info.get("surface") != surface:
-                    continue
-                if turn_value is not None and info.get("turn") != turn_value:
-                    continue
-                course_id = int(cid)
-                break
-
-            if course_id is None:
-                for cid, info in course_data.items():
-                    if info.get("raceTrackId") == race_track_id and info.get("distance") == distance_m and info.get("surface") == surface:
-                        course_id = int(cid)
-                        break
-
-            if course_id is None:
-                continue
-
-            presets.append({
-                "name": name,
-                "courseId": course_id,
-                "date": match.group("start").strip(),
-                "season": season_map.get(season_label),
-                "ground": ground_map.get(ground_label),
-                "weather": weather_map.get(weather_label),
-                "time": 2,
-                "distance_m": distance_m,
-                "is_dirt": surface == 2,
-                "season_label": match.group("season").strip(),
-                "weather_label": match.group("weather").strip(),
-                "time_label": "Night",
-                "condition_label": match.group("ground").strip(),
-            })
-
-        return presets
-
-    def _build_static_jp_presets(course_data: dict) -> list:
-        if not course_data:
-            try:
-                local_path = STATIC_DIR / "umalator" / "course_data.json"
-                if local_path.exists():
-                    course_data = json.loads(local_path.read_text(encoding="utf-8"))
-            except Exception as e:
-                logger.error(f"Failed to read local course data for JP presets: {e}")
-        fallback_course_ids = {
-            ("tokyo", "turf", 2400, "counterclockwise"): 10606,
-            ("kyoto", "turf", 3200, "clockwise"): 10811,
-            ("tokyo", "turf", 1600, "counterclockwise"): 10602,
-            ("hanshin", "turf", 2200, "clockwise"): 10906,
-            ("hanshin", "turf", 1600, "clockwise"): 10903,
-            ("kyoto", "turf", 3000, "clockwise"): 10810,
-            ("tokyo", "turf", 2000, "counterclockwise"): 10604,
-            ("nakayama", "turf", 2500, "clockwise"): 10506,
-            ("chukyo", "turf", 1200, "counterclockwise"): 10701,
-            ("tokyo", "dirt", 1600, "counterclockwise"): 10611,
-            ("hanshin", "turf", 3200, "clockwise"): 10914,
-            ("nakayama", "turf", 2000, "clockwise"): 10504,
-            ("nakayama", "turf", 1200, "clockwise"): 10501,
-            ("ooi", "dirt", 2000, "clockwise"): 11103,
-            ("kyoto", "turf", 2200, "clockwise"): 10808,
-            ("hanshin", "turf", 1400, "clockwise"): 10902,
-        }
-        entries = [
-            ("Taurus Cup", "13 May 2021, 23:00", "Tokyo", "Turf", 2400, "Counterclockwise", "Firm", "Spring", "Sunny"),
-            ("Gemini Cup", "13 Jun 2021, 23:00", "Kyoto", "Turf", 3200, "Clockwise", "Firm", "Spring", "Sunny"),
-            ("Cancer Cup", "22 Jul 2021, 23:00", "Tokyo", "Turf", 1600, "Counterclockwise", "Good", "Summer", "Sunny"),
-            ("Leo Cup", "23 Aug 2021, 23:00", "Hanshin", "Turf", 2200, "Clockwise", "Firm", "Summer", "Sunny"),
-            ("Virgo Cup", "20 Sept 2021, 23:00", "Hanshin", "Turf", 1600, "Clockwise", "Firm", "Autumn", "Sunny"),
-            ("Libra Cup", "21 Oct 2021, 23:00", "Kyoto", "Turf", 3000, "Clockwise", "Firm", "Autumn", "Sunny"),
-            ("Scorpio Cup", "22 Nov 2021, 22:00", "Tokyo", "Turf", 2000, "Counterclockwise", "Soft", "Autumn", "Rain"),
-            ("Sagittarius Cup", "20 Dec 2021, 22:00", "Nakayama", "Turf", 2500, "Clockwise", "Firm", "Winter", "Sunny"),
-            ("Capricorn Cup", "21 Jan 2022, 22:00", "Chukyo", "Turf", 1200, "Counterclockwise", "Soft", "Winter", "Snow"),
-            ("Aquarius Cup", "17 Feb 2022, 22:00", "Tokyo", "Dirt", 1600, "Counterclockwise", "Firm", "Winter", "Sunny"),
-            ("Pisces Cup", "21 Mar 2022, 23:00", "Hanshin", "Turf", 3200, "Clockwise", "Heavy", "Spring", "Rain"),
-            ("Aries Cup", "21 Apr 2022, 23:00", "Nakayama", "Turf", 2000, "Clockwise", "Firm", "Spring", "Sunny"),
-            ("Taurus Cup", "23 May 2022, 23:00", "Tokyo", "Turf", 2400, "Counterclockwise", "Firm", "Spring", "Sunny"),
-            ("Gemini Cup", "13 Jun 2022, 23:00", "Tokyo", "Turf", 1600, "Counterclockwise", "Firm", "Spring", "Sunny"),
-            ("Cancer Cup", "13 Jul 2022, 23:00", "Hanshin", "Turf", 2200, "Clockwise", "Good", "Summer", "Cloudy"),
-            ("Leo Cup", "12 Aug 2022, 23:00", "Nakayama", "Turf", 1200, "Clockwise", "Firm", "Summer", "Sunny"),
-            ("Virgo Cup", "14 Sept 2022, 23:00", "Ooi", "Dirt", 2000, "Clockwise", "Good", "Autumn", "Sunny"),
-            ("Libra Cup", "13 Oct 2022, 23:00", "Hanshin", "Turf", 1600, "Clockwise", "Firm", "Autumn", "Cloudy"),
-            ("Scorpio Cup", "12 Nov 2022, 22:00", "Kyoto", "Turf", 2200, "Clockwise", "Firm", "Autumn", "Sunny"),
-            ("Sagittarius Cup", "14 Dec 2022, 22:00", "Nakayama", "Turf", 2500, "Clockwise", "Good", "Winter", "Cloudy"),
-            ("Capricorn Cup", "13 Jan 2023, 22:00", "Chukyo", "Turf", 1200, "Counterclockwise", "Firm", "Winter", "Sunny"),
-            ("Aquarius Cup", "16 Feb 2023, 22:00", "Tokyo", "Dirt", 1600, "Counterclockwise", "Soft", "Winter", "Snow"),
-            ("Pisces Cup", "13 Mar 2023, 23:00", "Nakayama", "Turf", 2000, "Clockwise", "Firm", "Spring", "Sunny"),
-            ("Aries Cup", "12 Apr 2023, 23:00", "Kyoto", "Turf", 3200, "Clockwise", "Firm", "Spring", "Sunny"),
-            ("MILE", "12 Jun 2023, 23:00", "Tokyo", "Turf", 1600, "Counterclockwise", "Heavy", "Spring", "Rain"),
-            ("DIRT", "17 Aug 2023, 23:00", "Funabashi", "Dirt", 1600, "Counterclockwise", "Firm", "Summer", "Sunny"),
-            ("CLASSIC", "12 Oct 2023, 23:00", "Longchamp", "Turf", 2400, "Clockwise", "Soft", "Autumn", "Rain"),
-            ("LONG", "13 Dec 2023, 22:00", "Nakayama", "Turf", 2500, "Clockwise", "Soft", "Winter", "Snow"),
-            ("SPRINT", "17 Feb 2024, 22:00", "Hanshin", "Turf", 1400, "Clockwise", "Good", "Winter", "Cloudy"),
-            ("MILE", "12 Apr 2024, 23:00", "Hanshin", "Turf", 1600, "Clockwise", "Firm", "Spring", "Sunny"),
-        ]
-
-        surface_map = {"turf": 1, "dirt": 2}
-        ground_map = {"firm": 1, "good": 2, "soft": 3, "heavy": 4}
-        season_map = {"spring": 1, "summer": 2, "autumn": 3, "fall": 3, "winter": 4}
-        weather_map = {"sunny": 1, "cloudy": 2, "rain": 3, "rainy": 3, "snow": 4, "snowy": 4}
-
-        presets = []
-        for name, date_line, track_name, surface_label, distance_m, turn_label, ground_label, season_label, weather_label in entries:
-            surface_label = surface_label.strip().lower()
-            turn_label = turn_label.strip().lower()
-            ground_label = ground_label.strip().lower()
-            season_label = season_label.strip().lower()
-            weather_label = weather_label.strip().lower()
-            surface = surface_map.get(surface_label)
-            if surface is None:
-                continue
-
-            course_id = fallback_course_ids.get((track_name.lower(), surface_label, distance_m, turn_label))
-            if course_id is None:
-                logger.warning(f"JP preset skipped: missing course for {track_name} {distance_m} {surface_label}")
-                continue
-
-            start_dt = None
-            try:
-                start_dt = datetime.strptime(date_line, "%d %b %Y, %H:%M")
-            except ValueError:
-                start_dt = None
-
-            presets.append({
-                "name": name,
-                "courseId": course_id,
-                "date": date_line,
-                "season": season_map.get(season_label),
-                "ground": ground_map.get(ground_label),
-                "weather": weather_map.get(weather_label),
-                "time": 2,
-                "distance_m": distance_m,
-                "is_dirt": surface == 2,
-                "season_label": season_label.title(),
-                "weather_label": weather_label.title(),
-                "time_label": "Night",
-                "condition_label": ground_label.title(),
-                "_start_dt": start_dt,
-            })
-
-        if not presets:
-            logger.error("JP preset list parsed to 0 entries.")
-        presets.sort(key=lambda item: item.get("_start_dt") or datetime.min, reverse=True)
-        for item in presets:
-            item.pop("_start_dt", None)
-        return presets
-    course_data = _load_course_data()
-
-    if preset_source == "jp":
-        presets = _build_static_jp_presets(course_data)
-        logger.info(f"JP preset source selected: {len(presets)} presets")
-        return {"presets": presets}
-
-    for url in urls:
-        try:
-            req = Request(url, headers={"User-Agent": "ProjectBifrost/0.1"})
-            text = urlopen(req, timeout=10).read().decode("utf-8")
-            presets = _extract_presets(text)
-            if presets:
-                enriched = []
-                total = len(presets)
-                for index, preset in enumerate(presets):
-                    course_id = preset.get("courseId")
-                    course_info = course_data.get(str(course_id)) if course_id is not None else None
-                    distance_m = None
-                    is_dirt = None
-                    if course_info:
-                        distance_m = course_info.get("distance")
-                        surface = course_info.get("surface")
-                        is_dirt = surface == 2
-                    season_value = preset.get("season")
-                    weather_value = preset.get("weather")
-                    time_value = preset.get("time")
-                    condition_value = preset.get("ground")
-                    season_map = {
-                        1: "Spring",
-                        2: "Summer",
-                        3: "Autumn",
-                        4: "Winter",
-                    }
-                    weather_map = {
-                        0: "Sunny",
-                        1: "Cloudy",
-                        2: "Rainy",
-                        3: "Snowy",
-                        4: "Snowy",
-                    }
-                    time_map = {
-                        0: "Daytime",
-                        1: "Evening",
-                        2: "Night",
-                    }
-                    condition_map = {
-                        1: "Firm",
-                        2: "Good",
-                        3: "Soft",
-                        4: "Heavy",
-                    }
-                    enriched.append({
-                        "name": preset.get("name"),
-                        "courseId": course_id,
-                        "date": preset.get("date"),
-                        "season": preset.get("season"),
-                        "ground": preset.get("ground"),
-                        "weather": preset.get("weather"),
-                        "time": preset.get("time"),
-                        "distance_m": distance_m,
-                        "is_dirt": is_dirt,
-                        "season_label": season_map.get(season_value),
-                        "weather_label": weather_map.get(weather_value),
-                        "time_label": time_map.get(time_value),
-                        "condition_label": condition_map.get(condition_value),
-                    })
-                return {"presets": enriched}
-        except Exception as e:
-            logger.error(f"Failed to fetch Umalator presets from {url}: {e}")
-            continue
-    if preset_source == "auto":
-        presets = _build_static_jp_presets(course_data)
-        logger.info(f"Auto preset fallback selected: {len(presets)} presets")
-        return {"presets": presets}
-    return {"presets": []}
+    presets = await preset_service.get_presets(cfg.get("preset_source", "global"))
+    return {"presets": presets}
 
 
 @app.get("/api/course-set/{course_set_id}")
@@ -523,47 +436,133 @@ async def get_course_set(course_set_id: int):
     return info
 
 
+@app.post("/api/skills/applicable")
+async def prefilter_skills(payload: dict):
+    """Drop skills whose conditions can never fire on the given course and racedef."""
+    try:
+        skill_ids = [int(skill_id) for skill_id in payload.get("skill_ids") or []]
+        course_id = int(payload["course_id"]) if payload.get("course_id") else None
+    except (TypeError, ValueError):
+        return JSONResponse({"error": "skill_ids and course_id must be integers"}, status_code=400)
+    racedef = payload.get("racedef") if isinstance(payload.get("racedef"), dict) else None
+    strategy = payload.get("strategy")
+    try:
+        kept = await asyncio.to_thread(mdb_utils.filter_applicable_skills, skill_ids, course_id, racedef, strategy)
+    except Exception as e:
+        # Without master.mdb nothing can be ruled out
+        logger.warning(f"Skill prefilter unavailable: {e}")
+        kept = skill_ids
+    kept_set = set(kept)
+    return {
+        "skill_ids": kept,
+        "dropped": [skill_id for skill_id in skill_ids if skill_id not in kept_set],
+    }
+
+
+def _sim_request(payload: dict):
+    """(kind, key) of a sim-cache request body; raises ValueError when malformed."""
+    request = payload.get("request")
+    if not isinstance(request, dict):
+        raise ValueError("request must be an object")
+    kind = payload.get("kind")
+    return kind, sim_cache.request_key(kind, request)
+
+
+@app.get("/api/sim-cache")
+async def get_sim_cache_stats():
+    """Size of the simulation result cache."""
+    return await asyncio.to_thread(sim_cache.cache.stats)
+
+
+@app.delete("/api/sim-cache")
+async def clear_sim_cache():
+    await asyncio.to_thread(sim_cache.cache.clear)
+    return {"ok": True}
+
+
+@app.post("/api/sim-cache/lookup")
+async def lookup_sim_result(payload: dict):
+    """Cached chart/compare result for a canonical simulation request, if any."""
+    try:
+        _, key = _sim_request(payload)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    result = await asyncio.to_thread(sim_cache.cache.get, key)
+    if result is None:
+        return {"key": key, "hit": False, "result": None}
+    # The stored result is already JSON; splice it in rather than re-encoding
+    return Response(f'{{"key":"{key}","hit":true,"result":{result}}}', media_type="application/json")
+
+
+@app.post("/api/sim-cache/store")
+async def store_sim_result(payload: dict):
+    """Remember a chart/compare result computed in the browser."""
+    try:
+        kind, key = _sim_request(payload)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    if payload.get("result") is None:
+        return JSONResponse({"error": "result is required"}, status_code=400)
+    stored = await asyncio.to_thread(sim_cache.cache.put, key, kind, payload["result"])
+    return {"key": key, "stored": stored}
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(ws: WebSocket):
     """WebSocket endpoint for live updates."""
     await ws.accept()
-    connected_clients.add(ws)
-    logger.info(f"WebSocket client connected. Total: {len(connected_clients)}")
+    conn = hub.add(ws)
+    logger.info(f"WebSocket client connected. Total: {len(hub)}")
 
     try:
-        # Send initial state
-        await ws.send_json({"type": "state", "data": game_state.to_dict()})
+        # Send initial state (every topic until the client subscribes); any
+        # pending change goes through publish so existing clients get it too
+        publish_state()
+        conn.mark_dirty()
 
         # Keep connection alive and handle incoming messages
-        while True:
+        while not conn.closed:
             try:
                 msg = await asyncio.wait_for(ws.receive_text(), timeout=30.0)
                 if msg == "ping":
-                    await ws.send_json({"type": "pong"})
+                    conn.send({"type": "pong"})
+                elif msg.startswith("{"):
+                    try:
+                        request = json.loads(msg)
+                    except ValueError:
+                        continue
+                    if request.get("type") == "hello":
+                        conn.send({"type": "hello", "encoding": conn.negotiate(request.get("encoding"))})
+                    elif request.get("type") == "subscribe":
+                        conn.subscribe(request.get("topics") or [])
             except asyncio.TimeoutError:
                 # Send keepalive
-                await ws.send_json({"type": "ping"})
-    except WebSocketDisconnect:
+                conn.send({"type": "ping"})
+    except (WebSocketDisconnect, RuntimeError):
         pass
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
     finally:
-        connected_clients.discard(ws)
-        logger.info(f"WebSocket client disconnected. Total: {len(connected_clients)}")
+        await hub.remove(conn)
+        logger.info(f"WebSocket client disconnected. Total: {len(hub)}")
 
 
-async def broadcast_state():
-    """Broadcast current state to all connected clients."""
-    if not connected_clients:
-        return
+def publish_state() -> Set[str]:
+    """Publish the current state to the topic cache; returns the changed topics.
 
-    msg = {"type": "state", "data": game_state.to_dict()}
-    dead = set()
+    The only path that may bump topic revisions: it marks every affected
+    client dirty and warms the image cache for the changed slices.
+    """
+    # Bump topic revisions; per-client writers send only what each one lacks
+    changed = hub.publish(game_state.to_dict())
+    # Warm the image cache for icons referenced by the slices that changed
+    urls: Set[str] = set()
+    for name in changed:
+        image_proxy.collect_urls(hub.topics.value(name), urls)
+    image_proxy.proxy.prefetch(urls)
+    return changed
 
-    for ws in connected_clients:
-        try:
-            await ws.send_json(msg)
-        except Exception:
-            dead.add(ws)
 
-    connected_clients.difference_update(dead)
+async def broadcast_state():
+    """Broadcast current state to all connected clients."""
+    publish_state()
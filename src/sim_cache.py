@@ -0,0 +1,155 @@
+"""Disk-backed LRU cache of Umalator chart and compare results.
+
+The browser runs the simulations; the server only remembers them. A
+result is keyed by a hash of its canonical request (fingerprinted
+simulator worker URL, uma payloads, course id, racedef, options, seed,
+nsamples), so identical optimizer runs are served from disk instead of
+fresh workers, and a new simulator build misses instead of reusing stale
+results. Rows are kept in SQLite with
+a last-used stamp; once the stored results exceed ``max_bytes`` the
+least recently used ones are deleted.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from . import metrics
+from .config import SIM_CACHE_PATH
+
+KINDS = ("compare", "chart")
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+MAX_RESULT_BYTES = 4 * 1024 * 1024
+# Lists under these keys are sets; their order does not change a simulation
+UNORDERED_KEYS = frozenset({"skills"})
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sim_result (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    result TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sim_result_lru ON sim_result (last_used);
+"""
+
+
+def _canonical(value: Any, key: Optional[str] = None) -> Any:
+    if isinstance(value, dict):
+        return {k: _canonical(v, k) for k, v in value.items() if v is not None}
+    if isinstance(value, list):
+        items = [_canonical(v) for v in value]
+        if key in UNORDERED_KEYS:
+            items.sort(key=lambda v: json.dumps(v, sort_keys=True))
+        return items
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def request_key(kind: str, request: dict) -> str:
+    """Stable key of one simulation request. Raises ValueError for unknown kinds."""
+    if kind not in KINDS:
+        raise ValueError(f"Unknown simulation kind {kind!r}")
+    raw = json.dumps(_canonical(request), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return f"{kind}:" + hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class SimCache:
+    def __init__(self, path: Path = SIM_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._con: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._con is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            con = sqlite3.connect(self.path, check_same_thread=False)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.executescript(_SCHEMA)
+            self._total_bytes = con.execute("SELECT COALESCE(SUM(size), 0) FROM sim_result").fetchone()[0]
+            self._con = con
+        return self._con
+
+    def close(self) -> None:
+        with self._lock:
+            if self._con is not None:
+                self._con.close()
+                self._con = None
+
+    def get(self, key: str) -> Optional[str]:
+        """Stored result JSON for `key` (marking it recently used), or None."""
+        with self._lock:
+            con = self._connect()
+            row = con.execute("SELECT result FROM sim_result WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                metrics.incr("sim_cache.miss")
+                return None
+            with con:
+                con.execute("UPDATE sim_result SET last_used = ? WHERE key = ?", (time.time(), key))
+        metrics.incr("sim_cache.hit")
+        return row[0]
+
+    def put(self, key: str, kind: str, result: Any) -> bool:
+        """Store a result; False when it is too large to keep."""
+        text = json.dumps(result, ensure_ascii=False, separators=(",", ":"))
+        size = len(text.encode("utf-8"))
+        if size > MAX_RESULT_BYTES:
+            return False
+        now = time.time()
+        with self._lock:
+            con = self._connect()
+            with con:
+                old = con.execute("SELECT size FROM sim_result WHERE key = ?", (key,)).fetchone()
+                con.execute(
+                    """INSERT INTO sim_result (key, kind, result, size, created_at, last_used)
+                       VALUES (?, ?, ?, ?, ?, ?)
+                       ON CONFLICT (key) DO UPDATE SET
+                         result = excluded.result, size = excluded.size, last_used = excluded.last_used""",
+                    (key, kind, text, size, now, now),
+                )
+                self._total_bytes += size - (old[0] if old else 0)
+                self._evict(con, key)
+        return True
+
+    def _evict(self, con: sqlite3.Connection, keep: str) -> None:
+        while self._total_bytes > self.max_bytes:
+            # Oldest first; the result just stored is kept even if it alone exceeds the budget
+            rows = con.execute(
+                "SELECT key, size FROM sim_result WHERE key != ? ORDER BY last_used LIMIT 64", (keep,)
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                con.execute("DELETE FROM sim_result WHERE key = ?", (key,))
+                self._total_bytes -= size
+                metrics.incr("sim_cache.evicted")
+                if self._total_bytes <= self.max_bytes:
+                    break
+        metrics.set_gauge("sim_cache.bytes", self._total_bytes)
+
+    def stats(self) -> dict:
+        with self._lock:
+            con = self._connect()
+            entries = con.execute("SELECT COUNT(*) FROM sim_result").fetchone()[0]
+            return {"entries": entries, "bytes": self._total_bytes, "max_bytes": self.max_bytes}
+
+    def clear(self) -> None:
+        with self._lock:
+            con = self._connect()
+            with con:
+                con.execute("DELETE FROM sim_result")
+            self._total_bytes = 0
+
+
+cache = SimCache()
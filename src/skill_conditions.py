@@ -0,0 +1,164 @@
+"""Static applicability of skills from their skill_data condition strings.
+
+skill_data conditions are ``&``-joined comparisons in ``@``-separated
+alternatives (``distance_type==4&phase>=2@distance_type==3``), one
+precondition/condition pair per effect block. Terms over variables that
+are fixed for a whole race (course, racedef, running style) can be decided
+before simulating; everything else (phase, order, hp, ...) may or may not
+happen and is treated as satisfiable.
+
+``compile_skill`` reduces a skill to its static terms once, and
+``SkillPredicate.possible`` checks them against the facts of one race.
+A skill is dropped only when every alternative of every effect block has
+a static term that cannot hold.
+"""
+from __future__ import annotations
+
+import operator
+import re
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+# Condition variables fixed for the whole race
+STATIC_VARIABLES = frozenset({
+    "distance_type",
+    "course_distance",
+    "is_basis_distance",
+    "ground_type",
+    "ground_condition",
+    "weather",
+    "season",
+    "time",
+    "rotation",
+    "track_id",
+    "grade",
+    "running_style",
+})
+
+# Umalator strategy -> skill_data running_style
+RUNNING_STYLES = {"Nige": 1, "Oonige": 1, "Senkou": 2, "Sasi": 3, "Oikomi": 4}
+
+_OPS: Dict[str, Callable[[int, int], bool]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">=": operator.ge,
+    "<=": operator.le,
+    ">": operator.gt,
+    "<": operator.lt,
+}
+_TERM_RE = re.compile(r"^\s*([a-z_0-9]+)\s*(==|!=|>=|<=|>|<)\s*(-?\d+)\s*$")
+
+# (variable, comparison, value)
+Term = Tuple[str, Callable[[int, int], bool], int]
+# variable -> values it takes in this race (several when a racedef field is ambiguous)
+Facts = Dict[str, Tuple[int, ...]]
+
+
+def parse_condition(text: Optional[str]) -> List[List[Term]]:
+    """Parse a condition string into alternatives of terms; empty means always."""
+    alternatives: List[List[Term]] = []
+    for part in (text or "").split("@"):
+        terms: List[Term] = []
+        for raw in part.split("&"):
+            if not raw.strip():
+                continue
+            match = _TERM_RE.match(raw)
+            if not match:
+                raise ValueError(f"Invalid skill condition term {raw!r}")
+            name, op, value = match.groups()
+            terms.append((name, _OPS[op], int(value)))
+        alternatives.append(terms)
+    return alternatives or [[]]
+
+
+class SkillPredicate:
+    """Static terms of a skill's alternatives; ``None`` means always possible."""
+
+    __slots__ = ("alternatives",)
+
+    def __init__(self, alternatives: Optional[Sequence[Tuple[Term, ...]]]):
+        self.alternatives = alternatives
+
+    def possible(self, facts: Mapping[str, Tuple[int, ...]]) -> bool:
+        if self.alternatives is None:
+            return True
+        for terms in self.alternatives:
+            for name, op, value in terms:
+                known = facts.get(name)
+                if known is not None and not any(op(fact, value) for fact in known):
+                    break
+            else:
+                return True
+        return False
+
+
+ALWAYS = SkillPredicate(None)
+
+
+def compile_skill(blocks: Iterable[Tuple[Optional[str], Optional[str]]]) -> SkillPredicate:
+    """Compile (precondition, condition) effect blocks into one predicate."""
+    alternatives = set()
+    for precondition, condition in blocks:
+        for pre in parse_condition(precondition):
+            for cond in parse_condition(condition):
+                static = tuple(sorted(
+                    {term for term in pre + cond if term[0] in STATIC_VARIABLES},
+                    key=lambda term: (term[0], term[1].__name__, term[2]),
+                ))
+                if not static:
+                    return ALWAYS
+                alternatives.add(static)
+    if not alternatives:
+        return ALWAYS
+    return SkillPredicate(tuple(alternatives))
+
+
+def distance_type(meters: Optional[int]) -> Optional[int]:
+    """Sprint 1, Mile 2, Medium 3, Long 4."""
+    if not meters:
+        return None
+    if meters <= 1400:
+        return 1
+    if meters <= 1800:
+        return 2
+    if meters <= 2400:
+        return 3
+    return 4
+
+
+def race_facts(
+    course: Optional[Mapping] = None,
+    racedef: Optional[Mapping] = None,
+    strategy: Optional[str] = None,
+) -> Facts:
+    """Facts for one race from course-set info, an Umalator racedef and strategy.
+
+    Missing fields are left out, so terms over them stay satisfiable.
+    """
+    facts: Facts = {}
+
+    def put(name: str, value) -> None:
+        try:
+            number = int(value)
+        except (TypeError, ValueError):
+            return
+        if number:
+            facts[name] = (number,)
+
+    course = course or {}
+    meters = course.get("distance_m")
+    if meters:
+        put("course_distance", meters)
+        put("distance_type", distance_type(int(meters)))
+        facts["is_basis_distance"] = (1 if int(meters) % 400 == 0 else 0,)
+    put("ground_type", course.get("ground"))
+    put("rotation", course.get("turn"))
+    put("track_id", course.get("race_track_id"))
+
+    racedef = racedef or {}
+    put("ground_condition", racedef.get("groundCondition", racedef.get("ground")))
+    put("weather", racedef.get("weather"))
+    put("season", racedef.get("season"))
+    put("time", racedef.get("time"))
+    put("grade", racedef.get("grade"))
+    put("running_style", RUNNING_STYLES.get(strategy or ""))
+    return facts
@@ -0,0 +1,223 @@
+"""Sprite atlases for the icon families under assets/icons.
+
+Each family (rank letters, status ranks, weather, ...) is packed into one
+PNG, every icon at its own size, so CSS can address a cell with
+percentage background size and position at any rendered size. A cell
+fills its box, so the frontend only uses it for boxes with the icon's
+aspect ratio (``sizes`` in the family map) and keeps the plain PNG,
+letterboxed by ``object-fit``, everywhere else. The build is keyed by a hash
+of the source files and writes ``<family>.<hash>.png`` plus one
+``sprites.<hash>.css`` to the build directory. The frontend receives a
+compact family map via ``window.BIFROST_SPRITES`` and falls back to the
+individual PNGs for anything not covered (or when Pillow is missing).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+try:
+    from PIL import Image
+except ImportError:  # optional
+    Image = None
+
+from .config import SPRITE_BUILD_DIR
+
+ASSETS_DIR = Path(__file__).parent.parent / "assets"
+URL_PREFIX = "/sprites"
+# Bump when the packing changes so cached sheets are rebuilt
+LAYOUT_VERSION = b"2"
+
+# family -> glob relative to ASSETS_DIR
+SPRITE_FAMILIES = {
+    "statusrank": "icons/statusrank/ui_statusrank_*.png",
+    "umarank": "icons/umarank/utx_txt_rank_*.png",
+    "status": "icons/status_*.png",
+    "weather": "icons/utx_ico_weather_*.png",
+    "timezone": "icons/utx_ico_timezone_*.png",
+    "season": "icons/utx_txt_season_*.png",
+    "grade": "icons/utx_txt_grade_ribbon_*.png",
+}
+
+
+@dataclass
+class SpriteSheet:
+    family: str
+    dir_url: str
+    names: List[str]
+    # (x, y, width, height) of every icon, in `names` order
+    cells: List[Tuple[int, int, int, int]]
+    width: int
+    height: int
+    file_name: str = ""
+    sources: List[Path] = field(default_factory=list)
+
+    @property
+    def url(self) -> str:
+        return f"{URL_PREFIX}/{self.file_name}"
+
+
+def _percent(value: float) -> str:
+    return f"{value:.4f}%".replace(".0000%", "%")
+
+
+def _position(offset: int, size: int, total: int) -> str:
+    """Background position of a `size` cell at `offset` in a `total` sheet."""
+    if total <= size:
+        return "0%"
+    return _percent(offset * 100 / (total - size))
+
+
+def _layout(sizes: List[Tuple[int, int]]) -> Tuple[List[Tuple[int, int, int, int]], int, int]:
+    """Shelf-pack icons at their own size, about sqrt(n) per row."""
+    cols = max(1, math.ceil(math.sqrt(len(sizes))))
+    cells = []
+    width = height = 0
+    for start in range(0, len(sizes), cols):
+        row = sizes[start:start + cols]
+        x = 0
+        for w, h in row:
+            cells.append((x, height, w, h))
+            x += w
+        width = max(width, x)
+        height += max(h for _, h in row)
+    return cells, width, height
+
+
+class SpriteAtlas:
+    """Build and describe the sprite sheets for every icon family."""
+
+    def __init__(self, assets_dir: Path = ASSETS_DIR, build_dir: Path = SPRITE_BUILD_DIR):
+        self.assets_dir = assets_dir
+        self.build_dir = build_dir
+        self.sheets: Dict[str, SpriteSheet] = {}
+        self.css_name: Optional[str] = None
+
+    def build(self) -> None:
+        """Pack every family, reusing outputs whose source hash is unchanged."""
+        if Image is None:
+            logger.warning("Pillow not installed; serving individual icon files")
+            return
+        self.build_dir.mkdir(parents=True, exist_ok=True)
+        sheets: Dict[str, SpriteSheet] = {}
+        digest_all = hashlib.sha256()
+        for family, pattern in SPRITE_FAMILIES.items():
+            sources = sorted(self.assets_dir.glob(pattern))
+            if not sources:
+                continue
+            try:
+                sheet = self._build_sheet(family, sources)
+            except Exception as e:
+                logger.error(f"Failed to build sprite sheet {family}: {e}")
+                continue
+            sheets[family] = sheet
+            digest_all.update(sheet.file_name.encode())
+        self.sheets = sheets
+        if not sheets:
+            return
+        self.css_name = f"sprites.{digest_all.hexdigest()[:12]}.css"
+        css_path = self.build_dir / self.css_name
+        if not css_path.exists():
+            css_path.write_text(self.render_css(), encoding="utf-8")
+        self._prune()
+        logger.info(f"Sprite atlases ready: {len(sheets)} families")
+
+    def _build_sheet(self, family: str, sources: List[Path]) -> SpriteSheet:
+        digest = hashlib.sha256(LAYOUT_VERSION)
+        for path in sources:
+            digest.update(path.name.encode())
+            digest.update(path.read_bytes())
+        fingerprint = digest.hexdigest()[:12]
+        sizes = []
+        for path in sources:
+            with Image.open(path) as image:
+                sizes.append(image.size)
+        cells, width, height = _layout(sizes)
+        rel_dir = sources[0].parent.relative_to(self.assets_dir).as_posix()
+        sheet = SpriteSheet(
+            family=family,
+            dir_url=f"/assets/{rel_dir}/",
+            names=[path.stem for path in sources],
+            cells=cells,
+            width=width,
+            height=height,
+            file_name=f"{family}.{fingerprint}.png",
+            sources=sources,
+        )
+        target = self.build_dir / sheet.file_name
+        if target.exists():
+            return sheet
+
+        atlas = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+        for path, (x, y, _, _) in zip(sources, cells):
+            with Image.open(path) as image:
+                atlas.paste(image.convert("RGBA"), (x, y))
+        tmp = target.with_name(target.name + ".tmp")
+        atlas.save(tmp, format="PNG", optimize=True)
+        tmp.replace(target)
+        return sheet
+
+    def _prune(self) -> None:
+        keep = {sheet.file_name for sheet in self.sheets.values()}
+        if self.css_name:
+            keep.add(self.css_name)
+        for path in self.build_dir.iterdir():
+            if path.is_file() and path.name not in keep:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def render_css(self) -> str:
+        lines = [".sprite { background-repeat: no-repeat; }"]
+        for sheet in self.sheets.values():
+            lines.append(f".sprite-{sheet.family} {{ background-image: url({sheet.url}); }}")
+            for index, (x, y, w, h) in enumerate(sheet.cells):
+                lines.append(
+                    f".sprite-{sheet.family}-{index} {{ "
+                    f"background-size: {_percent(sheet.width * 100 / w)} {_percent(sheet.height * 100 / h)}; "
+                    f"background-position: {_position(x, w, sheet.width)} {_position(y, h, sheet.height)}; }}"
+                )
+        return "\n".join(lines) + "\n"
+
+    def describe(self) -> dict:
+        """Compact family map for the frontend (icon URL = dir + name + .png)."""
+        return {
+            "css": f"{URL_PREFIX}/{self.css_name}" if self.css_name else None,
+            "families": {
+                family: {
+                    "dir": sheet.dir_url,
+                    "names": sheet.names,
+                    "sizes": [[w, h] for _, _, w, h in sheet.cells],
+                }
+                for family, sheet in self.sheets.items()
+            },
+        }
+
+    def head_snippet(self) -> str:
+        """<link>/<script> tags exposing the atlases to index.html."""
+        if not self.sheets or not self.css_name:
+            return ""
+        return (
+            f'<link rel="stylesheet" href="{URL_PREFIX}/{self.css_name}">\n'
+            f"    <script>window.BIFROST_SPRITES = {json.dumps(self.describe())};</script>\n"
+        )
+
+    def lookup(self, name: str) -> Optional[Path]:
+        if name == self.css_name or any(sheet.file_name == name for sheet in self.sheets.values()):
+            return self.build_dir / name
+        return None
+
+
+atlas = SpriteAtlas()
+
+
+if __name__ == "__main__":
+    atlas.build()
+    print(json.dumps(atlas.describe(), indent=2)[:2000])
@@ -0,0 +1,247 @@
+"""Fingerprinted, precompressed static assets for the UI.
+
+At startup (or via ``python -m src.static_assets``) the large UI assets
+are copied into a build directory as ``name.<hash>.ext`` together with
+gzip and, when the optional ``brotli`` package is installed, brotli
+variants. Builds are keyed by content hash, so unchanged files are not
+recompressed. The server serves them under ``/static-fp/`` with
+``Accept-Encoding`` negotiation, per-encoding ETags and immutable
+caching, and the HTML pages (``index.html`` and the Umalator iframe page)
+are rewritten to point at the fingerprinted URLs.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import re
+import posixpath
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from loguru import logger
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+from .config import STATIC_BUILD_DIR
+
+STATIC_DIR = Path(__file__).parent.parent / "static"
+URL_PREFIX = "/static-fp"
+
+# Paths relative to STATIC_DIR
+FINGERPRINTED_ASSETS = (
+    "css/app.css",
+    "js/msgpack-decode.js",
+    "js/app-core.js",
+    "js/app-init.js",
+    "umalator/bundle.js",
+    "umalator/simulator.worker.js",
+    "umalator/course_data.json",
+)
+
+# Preference order when the client accepts several encodings
+ENCODINGS = ("br", "gzip")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# HTML pages rewritten to fingerprinted URLs, relative to STATIC_DIR
+PAGES = ("index.html", "umalator/index.html")
+
+_STATIC_REF_RE = re.compile(r"/static/([\w./-]+?)(?:\?v=[\w.-]+)?(?=[\"'])")
+# Page-relative src/href (``./bundle.js``), resolved against the page's directory
+_RELATIVE_REF_RE = re.compile(r'\b(src|href)="(\.{1,2}/[\w./-]+|[\w-][\w./-]*)"')
+
+
+@dataclass
+class Asset:
+    """One fingerprinted asset and its on-disk encodings."""
+    rel_path: str
+    fingerprint: str
+    name: str
+    media_type: str
+    variants: Dict[str, Path] = field(default_factory=dict)
+
+    @property
+    def url(self) -> str:
+        return f"{URL_PREFIX}/{self.name}"
+
+    def etag(self, encoding: Optional[str]) -> str:
+        """Strong ETag of one encoded body; each encoding gets its own."""
+        return f'"{self.fingerprint}-{encoding}"' if encoding else f'"{self.fingerprint}"'
+
+
+def _fingerprinted_name(rel_path: str, fingerprint: str) -> str:
+    path = Path(rel_path)
+    stem = path.with_suffix("").as_posix().replace("/", "-")
+    return f"{stem}.{fingerprint}{path.suffix}"
+
+
+def _write_variant(target: Path, data: bytes) -> None:
+    tmp = target.with_name(target.name + ".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(target)
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """Parse an Accept-Encoding header into {coding: q}."""
+    accepted: Dict[str, float] = {}
+    for part in (header or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        coding, _, params = part.partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def insert_before_scripts(html: str, snippet: str) -> str:
+    """Insert `snippet` right before the first external <script> tag."""
+    if not snippet:
+        return html
+    pos = html.find('<script src="')
+    if pos == -1:
+        return html
+    return html[:pos] + snippet + "    " + html[pos:]
+
+
+class AssetManifest:
+    """Build and look up fingerprinted asset variants."""
+
+    def __init__(self, static_dir: Path = STATIC_DIR, build_dir: Path = STATIC_BUILD_DIR):
+        self.static_dir = static_dir
+        self.build_dir = build_dir
+        self._assets: Dict[str, Asset] = {}
+        self._by_name: Dict[str, Asset] = {}
+        self._pages: Dict[str, str] = {}
+
+    def build(self) -> None:
+        """Fingerprint and precompress every configured asset."""
+        self.build_dir.mkdir(parents=True, exist_ok=True)
+        assets: Dict[str, Asset] = {}
+        for rel_path in FINGERPRINTED_ASSETS:
+            source = self.static_dir / rel_path
+            if not source.exists():
+                continue
+            try:
+                assets[rel_path] = self._build_asset(rel_path, source)
+            except Exception as e:
+                logger.error(f"Failed to build static asset {rel_path}: {e}")
+        self._assets = assets
+        self._by_name = {asset.name: asset for asset in assets.values()}
+        self._pages = {}
+        self._prune()
+        logger.info(f"Static assets ready: {len(assets)} fingerprinted")
+
+    def _build_asset(self, rel_path: str, source: Path) -> Asset:
+        data = source.read_bytes()
+        fingerprint = hashlib.sha256(data).hexdigest()[:12]
+        name = _fingerprinted_name(rel_path, fingerprint)
+        media_type = mimetypes.guess_type(source.name)[0] or "application/octet-stream"
+        if source.suffix == ".js":
+            media_type = "text/javascript"
+        asset = Asset(rel_path, fingerprint, name, media_type)
+
+        identity = self.build_dir / name
+        if not identity.exists():
+            shutil.copyfile(source, identity)
+        asset.variants["identity"] = identity
+
+        gz_path = self.build_dir / f"{name}.gz"
+        if not gz_path.exists():
+            _write_variant(gz_path, gzip.compress(data, compresslevel=9, mtime=0))
+        asset.variants["gzip"] = gz_path
+
+        if brotli is not None:
+            br_path = self.build_dir / f"{name}.br"
+            if not br_path.exists():
+                _write_variant(br_path, brotli.compress(data, quality=11))
+            asset.variants["br"] = br_path
+        return asset
+
+    def _prune(self) -> None:
+        """Remove build outputs that no longer belong to a current asset."""
+        keep = {path.name for asset in self._assets.values() for path in asset.variants.values()}
+        keep.add("manifest.json")
+        for path in self.build_dir.iterdir():
+            if path.is_file() and path.name not in keep:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+        manifest = {rel: asset.url for rel, asset in self._assets.items()}
+        (self.build_dir / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+    def url_for(self, rel_path: str) -> str:
+        asset = self._assets.get(rel_path)
+        return asset.url if asset else f"/static/{rel_path}"
+
+    def urls(self) -> Dict[str, str]:
+        return {rel: asset.url for rel, asset in self._assets.items()}
+
+    def lookup(self, name: str) -> Optional[Asset]:
+        return self._by_name.get(name)
+
+    def negotiate(self, asset: Asset, accept_encoding: Optional[str]) -> Tuple[Optional[str], Path]:
+        """Pick the best encoding the client accepts. Returns (encoding, path)."""
+        accepted = parse_accept_encoding(accept_encoding)
+        wildcard = accepted.get("*", 0.0)
+        for encoding in ENCODINGS:
+            if encoding not in asset.variants:
+                continue
+            if accepted.get(encoding, wildcard) > 0:
+                return encoding, asset.variants[encoding]
+        return None, asset.variants["identity"]
+
+    def render_page(self, rel_path: str) -> str:
+        """An HTML page under STATIC_DIR with fingerprinted asset URLs."""
+        if rel_path in self._pages:
+            return self._pages[rel_path]
+        if rel_path not in PAGES:
+            raise ValueError(f"Not a rewritten page: {rel_path}")
+        html = (self.static_dir / rel_path).read_text(encoding="utf-8")
+        page_dir = posixpath.dirname(rel_path)
+
+        def _replace(match: re.Match) -> str:
+            rel = match.group(1)
+            if rel in self._assets:
+                return self._assets[rel].url
+            return match.group(0)
+
+        def _replace_relative(match: re.Match) -> str:
+            attr, ref = match.groups()
+            rel = posixpath.normpath(posixpath.join(page_dir, ref))
+            if rel in self._assets:
+                return f'{attr}="{self._assets[rel].url}"'
+            return match.group(0)
+
+        html = _STATIC_REF_RE.sub(_replace, html)
+        html = _RELATIVE_REF_RE.sub(_replace_relative, html)
+        self._pages[rel_path] = html
+        return html
+
+    def render_index(self) -> str:
+        """index.html with fingerprinted asset URLs and the asset map injected."""
+        html = self.render_page("index.html")
+        asset_map = f"<script>window.BIFROST_ASSETS = {json.dumps(self.urls())};</script>\n"
+        return insert_before_scripts(html, asset_map)
+
+
+manifest = AssetManifest()
+
+
+if __name__ == "__main__":
+    manifest.build()
+    for rel, url in manifest.urls().items():
+        print(f"{rel} -> {url}")
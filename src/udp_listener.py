@@ -1,17 +1,23 @@
 """UDP listener for CarrotBlender data."""
 import socket
 import asyncio
-import io
+import hashlib
 import json
+import time
 import msgpack
-from msgpack import Unpacker
+from pathlib import Path
 from Cryptodome.Cipher import AES
 from loguru import logger
-from typing import Callable, Optional
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Optional, Tuple
 
 from .models import game_state
 from . import veteran_utils
 from . import mdb_utils
+from . import metrics
+from . import scenario_metrics
+from . import image_proxy
+from .msgpack_select import unpack_full, unpack_selective
+from .extractors import ExtractorRegistry
 
 SPECIAL_BANNER_MAP = {
     10001: 9020,
@@ -24,6 +30,25 @@ BANNER_OVERRIDE_MAP = {
     1068: 9002,  # Junior Make Debut program_id override
 }
 
+MISC_KEYS = ("common_define", "user_info", "tp_info", "rp_info", "coin_info")
+
+# Packet extractors, registered in dispatch order by CarrotBlenderListener.
+EXTRACTORS = ExtractorRegistry()
+
+# Inner response keys kept in raw_data for the UI beyond what extractors read.
+RAW_DATA_RETAINED_KEYS = (
+    "chara_info",
+    "home_info",
+    "choice_reward_array",
+    "single_mode_load_common",
+)
+
+
+def _section_digest(parts: Any) -> bytes:
+    """Fast content hash of an extraction section's input subtree."""
+    packed = msgpack.packb(parts, default=str)
+    return hashlib.blake2b(packed, digest_size=16).digest()
+
 
 class CarrotBlenderListener:
     """Listens for CarrotBlender UDP packets and decrypts them."""
@@ -35,10 +60,28 @@ class CarrotBlenderListener:
     MSG_MULTIPART_HEADER = 4
     MSG_MULTIPART_CHUNK = 5
 
-    def __init__(self, host: str, port: int, max_buffer: int = 65535):
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        max_buffer: int = 65535,
+        decode_mode: str = "full",
+        decode_extra_keys: Iterable[str] = (),
+        capture_dir: Optional[str] = None,
+        dedupe_window: int = 4,
+    ):
         self.host = host
         self.port = port
         self.max_buffer = max_buffer
+        self.decode_mode = decode_mode
+        self._decode_extra_keys = tuple(decode_extra_keys)
+        self._decode_allow_keys: Optional[FrozenSet[str]] = None
+        self._capture_dir = Path(capture_dir) if capture_dir else None
+
+        # Digest of the last applied payload (of any packet type); an exact repeat is skipped.
+        # dedupe_window <= 0 disables the check (kept as a setting for compatibility).
+        self._dedupe = int(dedupe_window) > 0
+        self._last_digest: Optional[bytes] = None
         self.sock: Optional[socket.socket] = None
         self.running = False
 
@@ -50,11 +93,18 @@ class CarrotBlenderListener:
         # Multipart state
         self._chunks_left: int = 0
 
+        # Memoized extraction sections: name -> (input digest, output)
+        self._section_cache: Dict[str, Tuple[bytes, Any]] = {}
+
         # Callback for parsed data
         self.on_data: Optional[Callable[[dict, str], None]] = None
         from .config import STATE_CACHE_PATH
         self._cache_path = STATE_CACHE_PATH
 
+        # Roster syncs run off the event loop; only the newest waiting roster is kept
+        self._veteran_pending: Optional[list] = None
+        self._veteran_task: Optional[asyncio.Task] = None
+
     def start(self) -> None:
         """Bind UDP socket."""
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -177,16 +227,73 @@ class CarrotBlenderListener:
         self._iv = None
         self._encrypted_data = None
 
+    def decode_allow_keys(self) -> FrozenSet[str]:
+        """Inner response keys kept by selective decoding."""
+        if self._decode_allow_keys is None:
+            keys = set(RAW_DATA_RETAINED_KEYS)
+            keys.update(self._decode_extra_keys)
+            for extractor in EXTRACTORS.extractors:
+                keys.update(extractor.consumes)
+            self._decode_allow_keys = frozenset(keys)
+        return self._decode_allow_keys
+
+    def _capture(self, data: bytes, packet_type: str) -> None:
+        """Dump a decrypted payload for offline benchmarking."""
+        try:
+            self._capture_dir.mkdir(parents=True, exist_ok=True)
+            name = f"{packet_type}_{time.time_ns()}.msgpack"
+            (self._capture_dir / name).write_bytes(data)
+        except Exception as e:
+            logger.error(f"Failed to capture packet: {e}")
+
+    def _payload_digest(self, data: bytes, packet_type: str) -> Optional[bytes]:
+        """Digest used for dedupe, or None when dedupe is off."""
+        if not self._dedupe:
+            return None
+        if not game_state.last_packet_type:
+            # State was reset (or never filled); replay everything
+            self._last_digest = None
+        return hashlib.blake2b(data, digest_size=16, person=packet_type.encode()[:16]).digest()
+
+    def _is_duplicate(self, digest: Optional[bytes], packet_type: str) -> bool:
+        """True if the payload equals the last applied packet.
+
+        Only the last applied digest counts, whatever its type: with A, B, A
+        (or response X, request, response X) the second one still applies,
+        since the packet in between replaced part of the state it produced.
+        """
+        if digest is None:
+            return False
+        if self._last_digest == digest:
+            metrics.incr("dedupe.hit")
+            metrics.incr(f"dedupe.{packet_type}.skipped")
+            return True
+        metrics.incr("dedupe.miss")
+        return False
+
     def _parse_msgpack(self, data: bytes, packet_type: str) -> None:
         """Parse msgpack using streaming Unpacker to handle trailing bytes."""
         try:
+            if self._capture_dir:
+                self._capture(data, packet_type)
+
+            # Exact resends (reconnects, home refreshes) change nothing downstream
+            digest = self._payload_digest(data, packet_type)
+            if self._is_duplicate(digest, packet_type):
+                logger.debug(f"Skipping duplicate {packet_type} ({len(data)} bytes)")
+                return
+
             # Use streaming unpacker like UmaLauncher does
-            stream = io.BytesIO(data)
-            unpacker = Unpacker(stream, raw=False, strict_map_key=False)
-            parsed = unpacker.unpack()
+            if packet_type == "response" and self.decode_mode == "selective":
+                with metrics.timed("decode.selective"):
+                    parsed, consumed, skipped = unpack_selective(data, self.decode_allow_keys())
+                metrics.incr("decode.skipped_keys", skipped)
+            else:
+                with metrics.timed("decode.full"):
+                    parsed, consumed, _ = unpack_full(data)
 
             # Log remaining bytes if any
-            remaining = len(data) - stream.tell()
+            remaining = len(data) - consumed
             if remaining > 0:
                 logger.debug(f"Msgpack had {remaining} trailing bytes (ignored)")
 
@@ -196,12 +303,16 @@ class CarrotBlenderListener:
             game_state.raw_data = parsed if isinstance(parsed, dict) else {"data": parsed}
 
             # Extract training data if present
-            self._extract_training_data(parsed)
+            with metrics.timed("extract.total"):
+                self._extract_training_data(parsed)
             if packet_type == "response":
                 self._save_state_cache()
 
             if self.on_data:
                 self.on_data(parsed, packet_type)
+            # Recorded only once applied, so a payload that failed can be retried
+            if digest is not None:
+                self._last_digest = digest
 
         except Exception as e:
             logger.error(f"Msgpack parse failed: {e}")
@@ -217,6 +328,37 @@ class CarrotBlenderListener:
         except Exception as e:
             logger.error(f"Failed to save state cache: {e}")
 
+    def _memo_section(
+        self,
+        name: str,
+        key: Any,
+        build: Callable[[], Any],
+        cacheable: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """Return the cached output of a section if its input hash is unchanged.
+
+        A built value that `cacheable` rejects (e.g. master.mdb lookups failed
+        because the database is missing or still loading) is returned but not
+        remembered, so the next packet builds it again.
+        """
+        try:
+            digest = _section_digest(key)
+        except Exception as e:
+            logger.debug(f"Section {name} not hashable, rebuilding: {e}")
+            metrics.incr(f"extract.{name}.miss")
+            return build()
+        cached = self._section_cache.get(name)
+        if cached is not None and cached[0] == digest:
+            metrics.incr(f"extract.{name}.hit")
+            return cached[1]
+        metrics.incr(f"extract.{name}.miss")
+        value = build()
+        if cacheable is None or cacheable(value):
+            self._section_cache[name] = (digest, value)
+        else:
+            self._section_cache.pop(name, None)
+        return value
+
     def _extract_training_data(self, data: dict) -> None:
         """Extract training stats from parsed data."""
         if not isinstance(data, dict):
@@ -227,17 +369,21 @@ class CarrotBlenderListener:
         if not isinstance(inner, dict):
             return
 
-        # Misc/global data (common define + user info)
-        misc_keys = ("common_define", "user_info", "tp_info", "rp_info", "coin_info")
-        if any(key in inner for key in misc_keys):
-            game_state.misc_data = {key: inner.get(key) for key in misc_keys if key in inner}
-
         # UmaLauncher: unpack single_mode_load_common into inner
         if "single_mode_load_common" in inner:
             for key, value in inner["single_mode_load_common"].items():
                 inner[key] = value
 
-        race_condition_map = {}
+        EXTRACTORS.dispatch(self, inner, {"race_condition_map": {}})
+
+    @EXTRACTORS.register("misc", consumes=MISC_KEYS, produces=("misc_data",))
+    def _extract_misc(self, inner: dict, ctx: dict) -> None:
+        """Misc/global data (common define + user info)."""
+        game_state.misc_data = {key: inner.get(key) for key in MISC_KEYS if key in inner}
+
+    @EXTRACTORS.register("race_conditions", consumes=("race_condition_array",), produces=("race_condition_map",))
+    def _extract_race_conditions(self, inner: dict, ctx: dict) -> None:
+        race_condition_map = ctx["race_condition_map"]
         race_conditions = inner.get("race_condition_array", [])
         if isinstance(race_conditions, list):
             for entry in race_conditions:
@@ -257,7 +403,13 @@ class CarrotBlenderListener:
                     "time_zone": entry.get("time_zone") or entry.get("timezone"),
                 }
 
-        # Look for chara_info (training data)
+    @EXTRACTORS.register(
+        "chara_info",
+        consumes=("chara_info",),
+        produces=("training", "skills_tab", "supporters", "race_objectives", "race_combined"),
+    )
+    def _extract_chara_info(self, inner: dict, ctx: dict) -> None:
+        """Training stats plus the skills/supporters/objectives derived from them."""
         chara_info = inner.get("chara_info")
         if chara_info and isinstance(chara_info, dict):
             game_state.in_training = True
@@ -275,24 +427,79 @@ class CarrotBlenderListener:
             t.update_timestamp()
             logger.info(f"Stats: SPD={t.stats.speed} STA={t.stats.stamina} POW={t.stats.power} GUT={t.stats.guts} WIS={t.stats.wisdom}")
             self._extract_skills_data(inner)
-            self._extract_race_objectives(chara_info, t.current_turn, race_condition_map)
+            self._extract_race_objectives(chara_info, t.current_turn, ctx["race_condition_map"])
 
-        # Event choices (if present)
+    # Runs on every packet: packets without choices clear the previous ones.
+    @EXTRACTORS.register("event_choices", produces=("event_choices",))
+    def _extract_event_choices(self, inner: dict, ctx: dict) -> None:
         choice_rewards = inner.get("choice_reward_array", [])
         if isinstance(choice_rewards, list) and choice_rewards:
             game_state.event_choices = choice_rewards
         else:
             game_state.event_choices = []
 
-        # Veteran horses (if present)
+    @EXTRACTORS.register("veteran", consumes=("trained_chara_array",), produces=("veteran",))
+    def _extract_veteran(self, inner: dict, ctx: dict) -> None:
         trained = inner.get("trained_chara_array", [])
         if isinstance(trained, list) and trained:
-            items = veteran_utils.build_veteran_items(trained)
+            self._queue_veteran_sync(trained)
+
+    def _queue_veteran_sync(self, trained: list) -> None:
+        """Sync a roster in a worker thread, behind any sync already running.
+
+        The sync shares a lock with veteran.txt imports, so running it on the
+        event loop would stall ingest and every handler for a whole import.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts, benchmarks): sync inline
+            game_state.veteran = veteran_utils.sync_trained_array(trained)
+            return
+        self._veteran_pending = trained
+        if self._veteran_task is None or self._veteran_task.done():
+            self._veteran_task = asyncio.create_task(self._run_veteran_sync())
+
+    async def _run_veteran_sync(self) -> None:
+        while self._veteran_pending is not None:
+            trained, self._veteran_pending = self._veteran_pending, None
+            try:
+                items = await asyncio.to_thread(veteran_utils.sync_trained_array, trained)
+            except Exception as e:
+                logger.error(f"Veteran sync failed: {e}")
+                continue
+            if items is game_state.veteran:
+                continue
             game_state.veteran = items
-            veteran_utils.save_cache(items)
+            # Landed after the packet was published; publish again
+            if self.on_data:
+                self.on_data({}, "veteran")
 
-        # Race agenda mapping (reserved races; deck_num 0 only)
+    @EXTRACTORS.register("race_agenda", consumes=("reserved_race_array",), produces=("race_agenda", "race_combined"))
+    def _extract_race_agenda(self, inner: dict, ctx: dict) -> None:
+        race_condition_map = ctx["race_condition_map"]
         reserved = inner.get("reserved_race_array", [])
+        agenda = self._memo_section(
+            "race_agenda",
+            (reserved, race_condition_map),
+            lambda: self._build_race_agenda(reserved, race_condition_map),
+        )
+        if agenda:
+            game_state.race_agenda = agenda
+            self._build_race_combined()
+
+    @EXTRACTORS.register(
+        "scenario_metrics",
+        consumes=scenario_metrics.data_set_keys(),
+        produces=("scenario_metrics",),
+    )
+    def _extract_scenario_metrics(self, inner: dict, ctx: dict) -> None:
+        result = scenario_metrics.evaluate(inner)
+        if result is not None:
+            game_state.scenario_metrics = result
+
+    def _build_race_agenda(self, reserved: list, race_condition_map: dict) -> list:
+        """Map reserved races (deck_num 0 only) to display rows."""
         agenda = []
         if isinstance(reserved, list):
             for deck in reserved:
@@ -312,10 +519,7 @@ class CarrotBlenderListener:
                     if not race_id:
                         race_id = SPECIAL_BANNER_MAP.get(program_id)
                     if race_id:
-                        banner_url = (
-                            "https://gametora.com/images/umamusume/en/race_banners/"
-                            f"thum_race_rt_000_{int(race_id):04d}_00.png"
-                        )
+                        banner_url = image_proxy.race_banner_url(race_id)
                     grade_raw = program_info.get("grade") if program_info else None
                     grade_map = {
                         100: "G1",
@@ -398,9 +602,7 @@ class CarrotBlenderListener:
                     "deck_name": deck.get("deck_name"),
                     "race_array": races,
                 })
-        if agenda:
-            game_state.race_agenda = agenda
-            self._build_race_combined()
+        return agenda
 
     def _extract_skills_data(self, inner: dict) -> None:
         """Extract skills, aptitudes, running style, and supporter data."""
@@ -415,9 +617,87 @@ class CarrotBlenderListener:
 
         style_map = {1: "Front", 2: "Pace", 3: "Late", 4: "End"}
 
-        # Skills and tips
+        # Skills and tips (memoized on their input arrays)
+        skill_array = chara_info.get("skill_array", [])
+        skills = self._memo_section("skills", skill_array, lambda: self._build_skills(skill_array))
+        tips_array = chara_info.get("skill_tips_array", [])
+        skill_tips = self._memo_section("skill_tips", tips_array, lambda: self._build_skill_tips(tips_array))
+
+        # Running style and aptitudes
+        running_style = style_map.get(chara_info.get("race_running_style"), "Unknown")
+        aptitudes = {
+            "track": {
+                "Turf": rank(chara_info.get("proper_ground_turf", 0)),
+                "Dirt": rank(chara_info.get("proper_ground_dirt", 0)),
+            },
+            "distance": {
+                "Sprint": rank(chara_info.get("proper_distance_short", 0)),
+                "Mile": rank(chara_info.get("proper_distance_mile", 0)),
+                "Medium": rank(chara_info.get("proper_distance_middle", 0)),
+                "Long": rank(chara_info.get("proper_distance_long", 0)),
+            },
+            "style": {
+                "Front": rank(chara_info.get("proper_running_style_nige", 0)),
+                "Pace": rank(chara_info.get("proper_running_style_senko", 0)),
+                "Late": rank(chara_info.get("proper_running_style_sashi", 0)),
+                "End": rank(chara_info.get("proper_running_style_oikomi", 0)),
+            },
+        }
+
+        # Growth rates + identity
+        dress_id = chara_info.get("chara_dress_id")
+        identity = self._memo_section(
+            "identity",
+            (card_id, dress_id),
+            lambda: self._build_identity(card_id, dress_id),
+            cacheable=lambda identity: not card_id or (
+                identity["chara_id"] is not None and identity["chara_name"] is not None
+            ),
+        )
+
+        talent_level = chara_info.get("talent_level") or 0
+        available_skills = self._memo_section(
+            "available_skills",
+            (card_id, talent_level),
+            lambda: self._build_available_skills(card_id, talent_level),
+            cacheable=lambda skills: not card_id or (
+                bool(skills) and all(skill["skill_rarity"] is not None for skill in skills)
+            ),
+        )
+
+        # Supporters with bond values
+        support_cards = chara_info.get("support_card_array", [])
+        evaluations = chara_info.get("evaluation_info_array", [])
+        supporters = self._memo_section(
+            "supporters",
+            (support_cards, evaluations),
+            lambda: self._build_supporters(support_cards, evaluations),
+        )
+
+        # Conditions: not in sample, keep as empty list or ids
+        conditions = list(chara_info.get("chara_effect_id_array", []))
+
+        game_state.skills_tab = {
+            "chara_name": identity["chara_name"] or "Unknown",
+            "chara_id": identity["chara_id"],
+            "card_id": card_id,
+            "portrait_url": identity["portrait_url"],
+            "portrait_fallback_url": identity["portrait_fallback_url"],
+            "rarity": chara_info.get("rarity"),
+            "talent_level": chara_info.get("talent_level"),
+            "running_style": running_style,
+            "aptitudes": aptitudes,
+            "growth_rates": identity["growth_rates"],
+            "skills": skills,
+            "skill_tips": skill_tips,
+            "available_skills": available_skills,
+            "conditions": conditions,
+        }
+        game_state.supporters = supporters
+
+    def _build_skills(self, skill_array: list) -> list:
         skills = []
-        for entry in chara_info.get("skill_array", []):
+        for entry in skill_array:
             skill_id = entry.get("skill_id")
             name = mdb_utils.get_skill_name(skill_id) if skill_id else None
             icon_id = mdb_utils.get_skill_icon_id(skill_id) if skill_id else None
@@ -425,11 +705,13 @@ class CarrotBlenderListener:
                 "id": skill_id,
                 "name": name or f"Skill {skill_id}",
                 "level": entry.get("level", 1),
-                "icon_url": f"https://gametora.com/images/umamusume/skill_icons/utx_ico_skill_{icon_id}.png" if icon_id else None,
+                "icon_url": image_proxy.skill_icon_url(icon_id),
             })
+        return skills
 
+    def _build_skill_tips(self, tips_array: list) -> list:
         skill_tips = []
-        for entry in chara_info.get("skill_tips_array", []):
+        for entry in tips_array:
             group_id = entry.get("group_id")
             rarity = entry.get("rarity")
             if group_id is not None:
@@ -460,41 +742,16 @@ class CarrotBlenderListener:
                 "skill_category": meta.get("skill_category") if meta else None,
                 "skill_rarity": meta.get("rarity") if meta else None,
                 "skill_group_id": meta.get("group_id") if meta else None,
-                "icon_url": f"https://gametora.com/images/umamusume/skill_icons/utx_ico_skill_{icon_id}.png" if icon_id else None,
+                "icon_url": image_proxy.skill_icon_url(icon_id),
             })
+        return skill_tips
 
-        # Running style and aptitudes
-        running_style = style_map.get(chara_info.get("race_running_style"), "Unknown")
-        aptitudes = {
-            "track": {
-                "Turf": rank(chara_info.get("proper_ground_turf", 0)),
-                "Dirt": rank(chara_info.get("proper_ground_dirt", 0)),
-            },
-            "distance": {
-                "Sprint": rank(chara_info.get("proper_distance_short", 0)),
-                "Mile": rank(chara_info.get("proper_distance_mile", 0)),
-                "Medium": rank(chara_info.get("proper_distance_middle", 0)),
-                "Long": rank(chara_info.get("proper_distance_long", 0)),
-            },
-            "style": {
-                "Front": rank(chara_info.get("proper_running_style_nige", 0)),
-                "Pace": rank(chara_info.get("proper_running_style_senko", 0)),
-                "Late": rank(chara_info.get("proper_running_style_sashi", 0)),
-                "End": rank(chara_info.get("proper_running_style_oikomi", 0)),
-            },
-        }
-
-        # Growth rates + identity
+    def _build_identity(self, card_id: Optional[int], dress_id: Optional[int]) -> dict:
         growth = mdb_utils.get_card_growth(card_id) if card_id else None
         chara_id = growth.get("chara_id") if growth else None
         chara_name = mdb_utils.get_chara_name(chara_id) if chara_id else None
-        portrait_url = None
-        portrait_fallback_url = None
-        portrait_card_id = chara_info.get("chara_dress_id") or card_id
-        if portrait_card_id:
-            portrait_url = f"https://chronogenesis.net/images/trained_chara/{portrait_card_id}.png"
-        if chara_id:
-            portrait_fallback_url = f"https://gametora.com/images/umamusume/characters/icons/chr_icon_{chara_id}.png"
+        portrait_url = image_proxy.trained_chara_url(dress_id or card_id)
+        portrait_fallback_url = image_proxy.chara_icon_url(chara_id)
 
         growth_rates = None
         if growth:
@@ -505,9 +762,16 @@ class CarrotBlenderListener:
                 "guts": growth.get("growth_guts", 0),
                 "wit": growth.get("growth_wit", 0),
             }
+        return {
+            "chara_id": chara_id,
+            "chara_name": chara_name,
+            "portrait_url": portrait_url,
+            "portrait_fallback_url": portrait_fallback_url,
+            "growth_rates": growth_rates,
+        }
 
+    def _build_available_skills(self, card_id: Optional[int], talent_level: int) -> list:
         available_skills = []
-        talent_level = chara_info.get("talent_level") or 0
         available_set_id = mdb_utils.get_available_skill_set_id(card_id) if card_id else None
         if available_set_id:
             for entry in mdb_utils.get_available_skills(available_set_id):
@@ -526,25 +790,20 @@ class CarrotBlenderListener:
                     "skill_rarity": meta.get("rarity") if meta else None,
                     "skill_group_id": meta.get("group_id") if meta else None,
                     "unlocked": talent_level >= need_rank,
-                    "icon_url": (
-                        f"https://gametora.com/images/umamusume/skill_icons/utx_ico_skill_{icon_id}.png"
-                        if icon_id
-                        else None
-                    ),
+                    "icon_url": image_proxy.skill_icon_url(icon_id),
                 })
+        return available_skills
 
-        # Supporters with bond values
+    def _build_supporters(self, support_cards: list, evaluations: list) -> list:
         eval_dict = {e.get("training_partner_id"): e.get("evaluation", 0)
-                     for e in chara_info.get("evaluation_info_array", [])}
+                     for e in evaluations}
         supporters = []
-        for card in chara_info.get("support_card_array", []):
+        for card in support_cards:
             pos = card.get("position")
             support_id = card.get("support_card_id")
             support_chara_id = mdb_utils.get_support_chara_id(support_id) if support_id else None
             support_name = mdb_utils.get_chara_name(support_chara_id) if support_chara_id else None
-            support_icon = None
-            if support_chara_id:
-                support_icon = f"https://gametora.com/images/umamusume/characters/icons/chr_icon_{support_chara_id}.png"
+            support_icon = image_proxy.chara_icon_url(support_chara_id)
             support_type = mdb_utils.get_support_card_type(support_id) if support_id else None
             support_command_id = mdb_utils.get_support_card_command_id(support_id) if support_id else None
             supporters.append({
@@ -557,27 +816,7 @@ class CarrotBlenderListener:
                 "bond": eval_dict.get(pos, 0),
                 "icon_url": support_icon,
             })
-
-        # Conditions: not in sample, keep as empty list or ids
-        conditions = list(chara_info.get("chara_effect_id_array", []))
-
-        game_state.skills_tab = {
-            "chara_name": chara_name or "Unknown",
-            "chara_id": chara_id,
-            "card_id": card_id,
-            "portrait_url": portrait_url,
-            "portrait_fallback_url": portrait_fallback_url,
-            "rarity": chara_info.get("rarity"),
-            "talent_level": chara_info.get("talent_level"),
-            "running_style": running_style,
-            "aptitudes": aptitudes,
-            "growth_rates": growth_rates,
-            "skills": skills,
-            "skill_tips": skill_tips,
-            "available_skills": available_skills,
-            "conditions": conditions,
-        }
-        game_state.supporters = supporters
+        return supporters
 
     def _extract_race_objectives(
         self,
@@ -587,16 +826,27 @@ class CarrotBlenderListener:
     ) -> None:
         """Extract default route objectives and filter by turn."""
         card_id = chara_info.get("card_id")
+        game_state.race_objectives = self._memo_section(
+            "race_objectives",
+            (card_id, current_turn, race_condition_map),
+            lambda: self._build_race_objectives(card_id, current_turn, race_condition_map),
+        )
+        self._build_race_combined()
+
+    def _build_race_objectives(
+        self,
+        card_id: Optional[int],
+        current_turn: int,
+        race_condition_map: dict,
+    ) -> list:
         growth = mdb_utils.get_card_growth(card_id) if card_id else None
         chara_id = growth.get("chara_id") if growth else None
         if not chara_id:
-            game_state.race_objectives = []
-            return
+            return []
 
         objectives = mdb_utils.get_route_objectives(chara_id)
         if not objectives:
-            game_state.race_objectives = []
-            return
+            return []
 
         grade_map = {
             100: "G1",
@@ -631,10 +881,7 @@ class CarrotBlenderListener:
             if not race_id:
                 race_id = SPECIAL_BANNER_MAP.get(program_id)
             if race_id:
-                banner_url = (
-                    "https://gametora.com/images/umamusume/en/race_banners/"
-                    f"thum_race_rt_000_{int(race_id):04d}_00.png"
-                )
+                banner_url = image_proxy.race_banner_url(race_id)
 
             requirement = None
             place_req = obj.get("condition_value_1")
@@ -707,8 +954,7 @@ class CarrotBlenderListener:
                 "time_zone": race_conditions.get("time_zone"),
             })
 
-        game_state.race_objectives = filtered
-        self._build_race_combined()
+        return filtered
 
     def _build_race_combined(self) -> None:
         combined = []
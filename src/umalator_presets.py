@@ -0,0 +1,582 @@
+"""Umalator preset service: non-blocking fetch with memory/disk caching.
+
+Presets come from the Umalator bundle.js (global) or a static JP table.
+Network fetches run in a worker thread so the event loop (packet ingest,
+WebSocket) never blocks on them. Results are cached in memory and on disk
+with a TTL; stale entries are served immediately while a background
+refresh runs (stale-while-revalidate).
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import re
+import time
+from datetime import datetime
+from html import unescape
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+from urllib.request import Request, urlopen
+
+from loguru import logger
+
+from . import mdb_utils, metrics
+from .config import BUNDLE_PRESET_CACHE_PATH, PRESET_CACHE_PATH
+
+USER_AGENT = "ProjectBifrost/0.1"
+BUNDLE_URLS = (
+    "https://alpha123.github.io/uma-tools/umalator-global/bundle.js",
+    "https://raw.githubusercontent.com/alpha123/uma-tools/master/umalator-global/bundle.js",
+)
+COURSE_URLS = (
+    "https://alpha123.github.io/uma-tools/umalator-global/course_data.json",
+    "https://raw.githubusercontent.com/alpha123/uma-tools/master/umalator-global/course_data.json",
+)
+JP_CM_URL = "https://gametora.com/umamusume/events/champions-meeting"
+LOCAL_UMALATOR_DIR = Path(__file__).parent.parent / "static" / "umalator"
+LOCAL_COURSE_DATA_PATH = LOCAL_UMALATOR_DIR / "course_data.json"
+LOCAL_BUNDLE_PATH = LOCAL_UMALATOR_DIR / "bundle.js"
+DEFAULT_TTL = 6 * 60 * 60
+
+
+_PRESET_MARKERS = (
+    "Capricorn Cup",
+    "Sagittarius Cup",
+    "Scorpio Cup",
+    "Libra Cup",
+    "Virgo Cup",
+    "Leo Cup",
+    "Cancer Cup",
+    "Gemini Cup",
+    "Taurus Cup",
+)
+_ARRAY_DECL_RE = re.compile(r"(?:var|let|const)\s+[A-Za-z_$][\w$]*\s*=\s*\[")
+# Brackets plus string literals, so brackets inside strings are skipped
+_BRACKET_TOKEN_RE = re.compile(r'"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'|[\[\]]')
+_JS_KEY_RE = re.compile(r"([,{])\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*:")
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+
+
+def _find_preset_array_start(text: str) -> int:
+    start = text.find("var ci=")
+    if start != -1:
+        return start
+    marker_positions = [pos for pos in (text.find(marker) for marker in _PRESET_MARKERS) if pos != -1]
+    if not marker_positions:
+        return -1
+    marker_pos = min(marker_positions)
+    # Search backwards in bounded windows instead of scanning the whole prefix
+    window = 4096
+    lo = marker_pos
+    while lo > 0:
+        lo = max(0, lo - window)
+        matches = list(_ARRAY_DECL_RE.finditer(text, lo, marker_pos))
+        if matches:
+            return matches[-1].start()
+        window *= 2
+    return -1
+
+
+def _extract_presets(text: str) -> list:
+    """Parse the preset array out of Umalator's bundle.js in a single pass."""
+    start = _find_preset_array_start(text)
+    if start == -1:
+        return []
+    start = text.find("[", start)
+    if start == -1:
+        return []
+    level = 0
+    end = None
+    for match in _BRACKET_TOKEN_RE.finditer(text, start):
+        token = match.group()
+        if token == "[":
+            level += 1
+        elif token == "]":
+            level -= 1
+            if level == 0:
+                end = match.start()
+                break
+    if end is None:
+        return []
+    raw = text[start:end + 1]
+    raw = _JS_KEY_RE.sub(r'\1"\2":', raw)
+    raw = raw.replace("undefined", "null")
+    raw = _TRAILING_COMMA_RE.sub(r"\1", raw)
+    return json.loads(raw)
+
+
+
+
+class BundlePresetCache:
+    """Parsed bundle.js presets keyed by the SHA-256 of the bundle content."""
+
+    def __init__(self, cache_path: Optional[Path] = BUNDLE_PRESET_CACHE_PATH, max_entries: int = 4):
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self._entries: Dict[str, list] = {}
+        self._loaded = False
+
+    def get_or_parse(self, data: bytes) -> list:
+        """Return presets for raw bundle bytes, parsing only unseen content."""
+        digest = hashlib.sha256(data).hexdigest()
+        self._load()
+        presets = self._entries.get(digest)
+        if presets is not None:
+            metrics.incr("presets.bundle_cache.hit")
+            return presets
+        metrics.incr("presets.bundle_cache.miss")
+        with metrics.timed("presets.bundle_parse"):
+            presets = _extract_presets(data.decode("utf-8"))
+        if presets:
+            self._entries.pop(digest, None)
+            self._entries[digest] = presets
+            while len(self._entries) > self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._save()
+        return presets
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.cache_path or not self.cache_path.exists():
+            return
+        try:
+            payload = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            if isinstance(payload, dict):
+                self._entries.update({k: v for k, v in payload.items() if isinstance(v, list)})
+        except Exception as e:
+            logger.error(f"Failed to read bundle preset cache: {e}")
+
+    def _save(self) -> None:
+        if not self.cache_path:
+            return
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            self.cache_path.write_text(json.dumps(self._entries, ensure_ascii=False), encoding="utf-8")
+        except Exception as e:
+            logger.error(f"Failed to save bundle preset cache: {e}")
+
+
+def _enrich_presets(presets: list, course_data: dict) -> list:
+    season_map = {
+        1: "Spring",
+        2: "Summer",
+        3: "Autumn",
+        4: "Winter",
+    }
+    weather_map = {
+        0: "Sunny",
+        1: "Cloudy",
+        2: "Rainy",
+        3: "Snowy",
+        4: "Snowy",
+    }
+    time_map = {
+        0: "Daytime",
+        1: "Evening",
+        2: "Night",
+    }
+    condition_map = {
+        1: "Firm",
+        2: "Good",
+        3: "Soft",
+        4: "Heavy",
+    }
+    enriched = []
+    for preset in presets:
+        course_id = preset.get("courseId")
+        course_info = course_data.get(str(course_id)) if course_id is not None else None
+        distance_m = None
+        is_dirt = None
+        if course_info:
+            distance_m = course_info.get("distance")
+            surface = course_info.get("surface")
+            is_dirt = surface == 2
+        enriched.append({
+            "name": preset.get("name"),
+            "courseId": course_id,
+            "date": preset.get("date"),
+            "season": preset.get("season"),
+            "ground": preset.get("ground"),
+            "weather": preset.get("weather"),
+            "time": preset.get("time"),
+            "distance_m": distance_m,
+            "is_dirt": is_dirt,
+            "season_label": season_map.get(preset.get("season")),
+            "weather_label": weather_map.get(preset.get("weather")),
+            "time_label": time_map.get(preset.get("time")),
+            "condition_label": condition_map.get(preset.get("ground")),
+        })
+    return enriched
+
+
+def _fetch_jp_cm_presets(course_data: dict, url: str = JP_CM_URL) -> list:
+    try:
+        req = Request(url, headers={"User-Agent": USER_AGENT})
+        html_text = urlopen(req, timeout=15).read().decode("utf-8")
+    except Exception as e:
+        logger.error(f"Failed to fetch JP CM list from {url}: {e}")
+        return []
+
+    section_marker = "Champions Meeting History (Japanese server)"
+    marker_idx = html_text.find(section_marker)
+    if marker_idx == -1:
+        return []
+    snippet = html_text[marker_idx:]
+    snippet = unescape(snippet)
+    snippet = re.sub(r"<!--.*?-->", "", snippet, flags=re.DOTALL)
+    snippet = snippet.replace("\n", " ").replace("\xa0", " ")
+
+    dash = r"[\\u2013\\u2014-]"
+    pattern = re.compile(
+        r"<div[^>]*>\\s*<div><b>(?P<name>[^<]+)</b></div>\\s*"
+        rf"<div[^>]*>\\s*<span>(?P<start>[^<]+)</span>\\s*{dash}\\s*<span>(?P<end>[^<]+)</span>\\s*</div>\\s*"
+        rf"<div>(?P<track>[^<]+)\\s*{dash}\\s*(?P<surface>[^<]+)</div>\\s*"
+        rf"<div>(?P<distance>\\d+)\\s*m\\s*{dash}\\s*(?P<distance_type>[^<]+)\\s*{dash}\\s*(?P<turn>[^<]+)</div>\\s*"
+        rf"<div>(?P<ground>[^<]+)\\s*{dash}\\s*(?P<season>[^<]+)\\s*{dash}\\s*(?P<weather>[^<]+)</div>",
+        flags=re.IGNORECASE,
+    )
+
+    surface_map = {"turf": 1, "dirt": 2}
+    ground_map = {"firm": 1, "good": 2, "soft": 3, "heavy": 4}
+    season_map = {"spring": 1, "summer": 2, "autumn": 3, "fall": 3, "winter": 4}
+    weather_map = {"sunny": 1, "cloudy": 2, "rainy": 3, "snowy": 4}
+    turn_map = {"clockwise": 1, "counterclockwise": 2}
+    track_fallback = {
+        "sapporo": 10001,
+        "hakodate": 10002,
+        "niigata": 10003,
+        "fukushima": 10004,
+        "nakayama": 10005,
+        "tokyo": 10006,
+        "chukyo": 10007,
+        "kyoto": 10008,
+        "hanshin": 10009,
+        "kokura": 10010,
+        "oi": 10101,
+        "ooi": 10101,
+    }
+
+    presets = []
+    for match in pattern.finditer(snippet):
+        name = match.group("name").strip()
+        track_name = match.group("track").strip()
+        surface_label = match.group("surface").strip().lower()
+        distance_m = int(match.group("distance"))
+        ground_label = match.group("ground").strip().lower()
+        season_label = match.group("season").strip().lower()
+        weather_label = match.group("weather").strip().lower()
+        turn_label = match.group("turn").strip().lower()
+
+        surface = surface_map.get(surface_label)
+        if surface is None:
+            continue
+        race_track_id = mdb_utils.get_race_track_id_by_name(track_name)
+        if race_track_id is None:
+            race_track_id = track_fallback.get(track_name.lower())
+        if race_track_id is None:
+            continue
+
+        turn_value = turn_map.get(turn_label)
+        course_id = None
+        for cid, info in course_data.items():
+            if info.get("raceTrackId") != race_track_id:
+                continue
+            if info.get("distance") != distance_m:
+                continue
+            if info.get("surface") != surface:
+                continue
+            if turn_value is not None and info.get("turn") != turn_value:
+                continue
+            course_id = int(cid)
+            break
+
+        if course_id is None:
+            for cid, info in course_data.items():
+                if info.get("raceTrackId") == race_track_id and info.get("distance") == distance_m and info.get("surface") == surface:
+                    course_id = int(cid)
+                    break
+
+        if course_id is None:
+            continue
+
+        presets.append({
+            "name": name,
+            "courseId": course_id,
+            "date": match.group("start").strip(),
+            "season": season_map.get(season_label),
+            "ground": ground_map.get(ground_label),
+            "weather": weather_map.get(weather_label),
+            "time": 2,
+            "distance_m": distance_m,
+            "is_dirt": surface == 2,
+            "season_label": match.group("season").strip(),
+            "weather_label": match.group("weather").strip(),
+            "time_label": "Night",
+            "condition_label": match.group("ground").strip(),
+        })
+
+    return presets
+
+
+def _build_static_jp_presets(course_data: dict) -> list:
+    if not course_data:
+        try:
+            local_path = LOCAL_COURSE_DATA_PATH
+            if local_path.exists():
+                course_data = json.loads(local_path.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.error(f"Failed to read local course data for JP presets: {e}")
+    fallback_course_ids = {
+        ("tokyo", "turf", 2400, "counterclockwise"): 10606,
+        ("kyoto", "turf", 3200, "clockwise"): 10811,
+        ("tokyo", "turf", 1600, "counterclockwise"): 10602,
+        ("hanshin", "turf", 2200, "clockwise"): 10906,
+        ("hanshin", "turf", 1600, "clockwise"): 10903,
+        ("kyoto", "turf", 3000, "clockwise"): 10810,
+        ("tokyo", "turf", 2000, "counterclockwise"): 10604,
+        ("nakayama", "turf", 2500, "clockwise"): 10506,
+        ("chukyo", "turf", 1200, "counterclockwise"): 10701,
+        ("tokyo", "dirt", 1600, "counterclockwise"): 10611,
+        ("hanshin", "turf", 3200, "clockwise"): 10914,
+        ("nakayama", "turf", 2000, "clockwise"): 10504,
+        ("nakayama", "turf", 1200, "clockwise"): 10501,
+        ("ooi", "dirt", 2000, "clockwise"): 11103,
+        ("kyoto", "turf", 2200, "clockwise"): 10808,
+        ("hanshin", "turf", 1400, "clockwise"): 10902,
+    }
+    entries = [
+        ("Taurus Cup", "13 May 2021, 23:00", "Tokyo", "Turf", 2400, "Counterclockwise", "Firm", "Spring", "Sunny"),
+        ("Gemini Cup", "13 Jun 2021, 23:00", "Kyoto", "Turf", 3200, "Clockwise", "Firm", "Spring", "Sunny"),
+        ("Cancer Cup", "22 Jul 2021, 23:00", "Tokyo", "Turf", 1600, "Counterclockwise", "Good", "Summer", "Sunny"),
+        ("Leo Cup", "23 Aug 2021, 23:00", "Hanshin", "Turf", 2200, "Clockwise", "Firm", "Summer", "Sunny"),
+        ("Virgo Cup", "20 Sept 2021, 23:00", "Hanshin", "Turf", 1600, "Clockwise", "Firm", "Autumn", "Sunny"),
+        ("Libra Cup", "21 Oct 2021, 23:00", "Kyoto", "Turf", 3000, "Clockwise", "Firm", "Autumn", "Sunny"),
+        ("Scorpio Cup", "22 Nov 2021, 22:00", "Tokyo", "Turf", 2000, "Counterclockwise", "Soft", "Autumn", "Rain"),
+        ("Sagittarius Cup", "20 Dec 2021, 22:00", "Nakayama", "Turf", 2500, "Clockwise", "Firm", "Winter", "Sunny"),
+        ("Capricorn Cup", "21 Jan 2022, 22:00", "Chukyo", "Turf", 1200, "Counterclockwise", "Soft", "Winter", "Snow"),
+        ("Aquarius Cup", "17 Feb 2022, 22:00", "Tokyo", "Dirt", 1600, "Counterclockwise", "Firm", "Winter", "Sunny"),
+        ("Pisces Cup", "21 Mar 2022, 23:00", "Hanshin", "Turf", 3200, "Clockwise", "Heavy", "Spring", "Rain"),
+        ("Aries Cup", "21 Apr 2022, 23:00", "Nakayama", "Turf", 2000, "Clockwise", "Firm", "Spring", "Sunny"),
+        ("Taurus Cup", "23 May 2022, 23:00", "Tokyo", "Turf", 2400, "Counterclockwise", "Firm", "Spring", "Sunny"),
+        ("Gemini Cup", "13 Jun 2022, 23:00", "Tokyo", "Turf", 1600, "Counterclockwise", "Firm", "Spring", "Sunny"),
+        ("Cancer Cup", "13 Jul 2022, 23:00", "Hanshin", "Turf", 2200, "Clockwise", "Good", "Summer", "Cloudy"),
+        ("Leo Cup", "12 Aug 2022, 23:00", "Nakayama", "Turf", 1200, "Clockwise", "Firm", "Summer", "Sunny"),
+        ("Virgo Cup", "14 Sept 2022, 23:00", "Ooi", "Dirt", 2000, "Clockwise", "Good", "Autumn", "Sunny"),
+        ("Libra Cup", "13 Oct 2022, 23:00", "Hanshin", "Turf", 1600, "Clockwise", "Firm", "Autumn", "Cloudy"),
+        ("Scorpio Cup", "12 Nov 2022, 22:00", "Kyoto", "Turf", 2200, "Clockwise", "Firm", "Autumn", "Sunny"),
+        ("Sagittarius Cup", "14 Dec 2022, 22:00", "Nakayama", "Turf", 2500, "Clockwise", "Good", "Winter", "Cloudy"),
+        ("Capricorn Cup", "13 Jan 2023, 22:00", "Chukyo", "Turf", 1200, "Counterclockwise", "Firm", "Winter", "Sunny"),
+        ("Aquarius Cup", "16 Feb 2023, 22:00", "Tokyo", "Dirt", 1600, "Counterclockwise", "Soft", "Winter", "Snow"),
+        ("Pisces Cup", "13 Mar 2023, 23:00", "Nakayama", "Turf", 2000, "Clockwise", "Firm", "Spring", "Sunny"),
+        ("Aries Cup", "12 Apr 2023, 23:00", "Kyoto", "Turf", 3200, "Clockwise", "Firm", "Spring", "Sunny"),
+        ("MILE", "12 Jun 2023, 23:00", "Tokyo", "Turf", 1600, "Counterclockwise", "Heavy", "Spring", "Rain"),
+        ("DIRT", "17 Aug 2023, 23:00", "Funabashi", "Dirt", 1600, "Counterclockwise", "Firm", "Summer", "Sunny"),
+        ("CLASSIC", "12 Oct 2023, 23:00", "Longchamp", "Turf", 2400, "Clockwise", "Soft", "Autumn", "Rain"),
+        ("LONG", "13 Dec 2023, 22:00", "Nakayama", "Turf", 2500, "Clockwise", "Soft", "Winter", "Snow"),
+        ("SPRINT", "17 Feb 2024, 22:00", "Hanshin", "Turf", 1400, "Clockwise", "Good", "Winter", "Cloudy"),
+        ("MILE", "12 Apr 2024, 23:00", "Hanshin", "Turf", 1600, "Clockwise", "Firm", "Spring", "Sunny"),
+    ]
+
+    surface_map = {"turf": 1, "dirt": 2}
+    ground_map = {"firm": 1, "good": 2, "soft": 3, "heavy": 4}
+    season_map = {"spring": 1, "summer": 2, "autumn": 3, "fall": 3, "winter": 4}
+    weather_map = {"sunny": 1, "cloudy": 2, "rain": 3, "rainy": 3, "snow": 4, "snowy": 4}
+
+    presets = []
+    for name, date_line, track_name, surface_label, distance_m, turn_label, ground_label, season_label, weather_label in entries:
+        surface_label = surface_label.strip().lower()
+        turn_label = turn_label.strip().lower()
+        ground_label = ground_label.strip().lower()
+        season_label = season_label.strip().lower()
+        weather_label = weather_label.strip().lower()
+        surface = surface_map.get(surface_label)
+        if surface is None:
+            continue
+
+        course_id = fallback_course_ids.get((track_name.lower(), surface_label, distance_m, turn_label))
+        if course_id is None:
+            logger.warning(f"JP preset skipped: missing course for {track_name} {distance_m} {surface_label}")
+            continue
+
+        start_dt = None
+        try:
+            start_dt = datetime.strptime(date_line, "%d %b %Y, %H:%M")
+        except ValueError:
+            start_dt = None
+
+        presets.append({
+            "name": name,
+            "courseId": course_id,
+            "date": date_line,
+            "season": season_map.get(season_label),
+            "ground": ground_map.get(ground_label),
+            "weather": weather_map.get(weather_label),
+            "time": 2,
+            "distance_m": distance_m,
+            "is_dirt": surface == 2,
+            "season_label": season_label.title(),
+            "weather_label": weather_label.title(),
+            "time_label": "Night",
+            "condition_label": ground_label.title(),
+            "_start_dt": start_dt,
+        })
+
+    if not presets:
+        logger.error("JP preset list parsed to 0 entries.")
+    presets.sort(key=lambda item: item.get("_start_dt") or datetime.min, reverse=True)
+    for item in presets:
+        item.pop("_start_dt", None)
+    return presets
+
+
+class PresetService:
+    """Serve Umalator presets without blocking the event loop."""
+
+    def __init__(
+        self,
+        cache_path: Optional[Path] = PRESET_CACHE_PATH,
+        ttl: float = DEFAULT_TTL,
+        bundle_urls: Sequence[str] = BUNDLE_URLS,
+        course_urls: Sequence[str] = COURSE_URLS,
+        local_course_path: Path = LOCAL_COURSE_DATA_PATH,
+        local_bundle_path: Path = LOCAL_BUNDLE_PATH,
+        bundle_cache: Optional[BundlePresetCache] = None,
+        timeout: float = 10,
+    ):
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.bundle_urls = tuple(bundle_urls)
+        self.course_urls = tuple(course_urls)
+        self.local_course_path = local_course_path
+        self.local_bundle_path = local_bundle_path
+        self.bundle_cache = bundle_cache or BundlePresetCache()
+        self.timeout = timeout
+        self._entries: Dict[str, Tuple[float, list]] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._disk_loaded = False
+
+    async def get_presets(self, source: str = "global") -> list:
+        """Return presets for `source`, refreshing in the background when stale."""
+        entry = self._get_entry(source)
+        if entry is not None:
+            fetched_at, presets = entry
+            if time.time() - fetched_at > self.ttl:
+                self._schedule_refresh(source)
+            return presets
+        return await self.refresh(source)
+
+    async def refresh(self, source: str = "global") -> list:
+        """Fetch presets for `source` now (deduplicating concurrent refreshes)."""
+        task = self._refreshing.get(source)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._refresh(source))
+            self._refreshing[source] = task
+        return await asyncio.shield(task)
+
+    def _schedule_refresh(self, source: str) -> None:
+        if source not in self._refreshing:
+            self._refreshing[source] = asyncio.get_running_loop().create_task(self._refresh(source))
+
+    async def _refresh(self, source: str) -> list:
+        try:
+            presets = await asyncio.to_thread(self.build_presets, source)
+            if presets:
+                self._entries[source] = (time.time(), presets)
+                await asyncio.to_thread(self._save_disk)
+                return presets
+            entry = self._get_entry(source)
+            return entry[1] if entry else []
+        except Exception as e:
+            logger.error(f"Preset refresh failed for {source}: {e}")
+            entry = self._get_entry(source)
+            return entry[1] if entry else []
+        finally:
+            self._refreshing.pop(source, None)
+
+    def _get_entry(self, source: str) -> Optional[Tuple[float, list]]:
+        if not self._disk_loaded:
+            self._load_disk()
+        return self._entries.get(source)
+
+    def _load_disk(self) -> None:
+        self._disk_loaded = True
+        if not self.cache_path or not self.cache_path.exists():
+            return
+        try:
+            payload = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            for source, entry in payload.items():
+                presets = entry.get("presets")
+                if presets:
+                    self._entries.setdefault(source, (float(entry.get("fetched_at", 0)), presets))
+        except Exception as e:
+            logger.error(f"Failed to read preset cache: {e}")
+
+    def _save_disk(self) -> None:
+        if not self.cache_path:
+            return
+        try:
+            payload = {
+                source: {"fetched_at": fetched_at, "presets": presets}
+                for source, (fetched_at, presets) in self._entries.items()
+            }
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            self.cache_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        except Exception as e:
+            logger.error(f"Failed to save preset cache: {e}")
+
+    def _fetch_bytes(self, url: str) -> bytes:
+        req = Request(url, headers={"User-Agent": USER_AGENT})
+        return urlopen(req, timeout=self.timeout).read()
+
+    def _fetch_text(self, url: str) -> str:
+        return self._fetch_bytes(url).decode("utf-8")
+
+    def load_course_data(self) -> dict:
+        """Blocking: fetch course_data.json, falling back to the vendored copy."""
+        for url in self.course_urls:
+            try:
+                data = json.loads(self._fetch_text(url))
+                if data:
+                    return data
+            except Exception as e:
+                logger.error(f"Failed to fetch course data from {url}: {e}")
+                continue
+        try:
+            if self.local_course_path.exists():
+                return json.loads(self.local_course_path.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.error(f"Failed to read local course data: {e}")
+        return {}
+
+    def build_presets(self, source: str) -> list:
+        """Blocking: build the preset list for `source` from the network."""
+        if source == "jp":
+            presets = _build_static_jp_presets({})
+            logger.info(f"JP preset source selected: {len(presets)} presets")
+            return presets
+
+        course_data = self.load_course_data()
+        for url in self.bundle_urls:
+            try:
+                presets = self.bundle_cache.get_or_parse(self._fetch_bytes(url))
+                if presets:
+                    return _enrich_presets(presets, course_data)
+            except Exception as e:
+                logger.error(f"Failed to fetch Umalator presets from {url}: {e}")
+                continue
+        try:
+            if self.local_bundle_path.exists():
+                presets = self.bundle_cache.get_or_parse(self.local_bundle_path.read_bytes())
+                if presets:
+                    logger.info("Using presets from the vendored Umalator bundle")
+                    return _enrich_presets(presets, course_data)
+        except Exception as e:
+            logger.error(f"Failed to read local Umalator bundle: {e}")
+        if source == "auto":
+            presets = _build_static_jp_presets(course_data)
+            logger.info(f"Auto preset fallback selected: {len(presets)} presets")
+            return presets
+        return []
@@ -0,0 +1,131 @@
+"""Streaming import of veteran.txt exports.
+
+``veteran.txt`` is a captured packet: arbitrary text around a JSON
+object whose ``data.trained_chara_array`` holds one object per horse.
+``iter_trained_chara`` reads the file in fixed-size chunks, skips ahead
+to that array and decodes one horse at a time with
+``JSONDecoder.raw_decode``, so memory stays at roughly one chunk plus one
+horse regardless of export size. ``import_file`` feeds the horses into
+``veteran_utils.sync_trained_array`` in batches and records progress.
+"""
+from __future__ import annotations
+
+import json
+import re
+import time
+from pathlib import Path
+from typing import Iterator, List
+
+from loguru import logger
+
+from . import metrics, veteran_utils
+
+ARRAY_KEY = '"trained_chara_array"'
+CHUNK_SIZE = 1 << 20
+BATCH_SIZE = 500
+# A horse is a few KB; anything this large that still fails to decode is malformed
+MAX_ENTRY_CHARS = 16 << 20
+
+_decoder = json.JSONDecoder()
+_ARRAY_START_RE = re.compile(r'"trained_chara_array"\s*:\s*\[')
+_SEPARATOR_RE = re.compile(r"[\s,]*")
+
+# Progress of the running (or last) import, served by /api/veteran/import
+progress = {
+    "running": False,
+    "horses": 0,
+    "bytes_read": 0,
+    "bytes_total": 0,
+    "error": None,
+}
+
+
+class _ChunkReader:
+    """Text buffer over a file that only keeps the unconsumed tail."""
+
+    def __init__(self, handle, chunk_size: int):
+        self.handle = handle
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Append the next chunk; False at end of file."""
+        if self.eof:
+            return False
+        chunk = self.handle.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop consumed text so the buffer never grows past one chunk plus one horse
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        progress["bytes_read"] = self.handle.buffer.tell()
+        return True
+
+
+def iter_trained_chara(path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[dict]:
+    """Yield each trained_chara_array entry of a veteran.txt export."""
+    with path.open("r", encoding="utf-8", errors="replace") as handle:
+        reader = _ChunkReader(handle, chunk_size)
+        while True:
+            match = _ARRAY_START_RE.search(reader.buf, reader.pos)
+            if match:
+                reader.pos = match.end()
+                break
+            # Keep enough tail for a key split across chunks
+            reader.pos = max(reader.pos, len(reader.buf) - len(ARRAY_KEY) - 16)
+            if not reader.fill():
+                return
+
+        while True:
+            reader.pos = _SEPARATOR_RE.match(reader.buf, reader.pos).end()
+            if reader.pos >= len(reader.buf):
+                if not reader.fill():
+                    raise ValueError("veteran.txt ended inside trained_chara_array")
+                continue
+            if reader.buf[reader.pos] == "]":
+                return
+            try:
+                entry, end = _decoder.raw_decode(reader.buf, reader.pos)
+            except json.JSONDecodeError:
+                # Usually a horse split across chunks; retry with more text
+                if len(reader.buf) - reader.pos > MAX_ENTRY_CHARS or not reader.fill():
+                    raise
+                continue
+            reader.pos = end
+            if isinstance(entry, dict):
+                yield entry
+
+
+def import_file(path: Path, batch_size: int = BATCH_SIZE, chunk_size: int = CHUNK_SIZE) -> List[dict]:
+    """Stream a veteran.txt export into the veteran store.
+
+    Returns the live item list. Progress is kept in ``progress`` and
+    logged every batch.
+    """
+    total = path.stat().st_size
+    progress.update(running=True, horses=0, bytes_read=0, bytes_total=total, error=None)
+    start = time.perf_counter()
+
+    def report(horses: int) -> None:
+        progress["horses"] = horses
+        metrics.set_gauge("veteran.import_horses", horses)
+        logger.info(f"Veteran import: {horses} horses, {progress['bytes_read'] * 100 // max(total, 1)}% of {path.name}")
+
+    try:
+        items = veteran_utils.sync_trained_array(iter_trained_chara(path, chunk_size), batch_size, report)
+    except Exception as e:
+        progress["error"] = str(e)
+        raise
+    finally:
+        progress["running"] = False
+    progress["bytes_read"] = total
+    metrics.record_timing("veteran.import", time.perf_counter() - start)
+    logger.info(f"Imported {progress['horses']} horses from {path.name} in {time.perf_counter() - start:.1f}s")
+    return items
+
+
+def snapshot() -> dict:
+    return dict(progress)
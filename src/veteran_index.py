@@ -0,0 +1,230 @@
+"""Columnar in-memory index over veteran items for server-side queries.
+
+Numeric fields (stats, aptitudes, sparks, rank score, fans, ...) are held
+as NumPy columns so filters are vectorized comparisons and multi-key
+sorts are a single ``lexsort``. Skills get an inverted index
+(skill_id -> sorted row numbers). The index is rebuilt only when the
+underlying item list changes.
+
+Query syntax (as accepted by ``/api/veteran/query``):
+
+- ``filter``: comma-separated ``field<op>value`` with ops ``>= <= > < = !=``;
+  aptitude fields take letters (``turf>=A``, ``mile>=B+``)
+- ``sort``: comma-separated fields, ``-`` prefix for descending
+- ``skills``: comma-separated skill ids the horse must all have
+- ``q``: name substring, optionally with a ``[title prefix]``
+- ``ids``: trained_chara_id (or card_id) allow-list
+"""
+from __future__ import annotations
+
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import constants
+
+# column -> getter over a veteran item
+NUMERIC_FIELDS: Dict[str, Callable[[dict], Any]] = {
+    "rank_score": lambda item: item.get("rank_score"),
+    "rank": lambda item: item.get("rank"),
+    "fans": lambda item: item.get("fans"),
+    "skill_count": lambda item: len(item.get("skills") or []),
+    "is_locked": lambda item: item.get("is_locked"),
+    "speed": lambda item: (item.get("stats") or {}).get("speed"),
+    "stamina": lambda item: (item.get("stats") or {}).get("stamina"),
+    "power": lambda item: (item.get("stats") or {}).get("power"),
+    "guts": lambda item: (item.get("stats") or {}).get("guts"),
+    "wit": lambda item: (item.get("stats") or {}).get("wit"),
+    "sparks_distance": lambda item: (item.get("legacy_sparks") or {}).get("distance"),
+    "sparks_track": lambda item: (item.get("legacy_sparks") or {}).get("track"),
+    "sparks_unique": lambda item: (item.get("legacy_sparks") or {}).get("unique"),
+    "sparks_skill": lambda item: (item.get("legacy_sparks") or {}).get("skill"),
+    "sparks_total": lambda item: (item.get("legacy_sparks") or {}).get("total"),
+    "trained_chara_id": lambda item: item.get("trained_chara_id"),
+    "card_id": lambda item: item.get("card_id"),
+    "chara_id": lambda item: item.get("chara_id"),
+    "parent_affinity": lambda item: item.get("parent_affinity"),
+}
+
+# column -> (aptitudes group, label)
+APTITUDE_FIELDS = {
+    "turf": ("track", "Turf"),
+    "dirt": ("track", "Dirt"),
+    "sprint": ("distance", "Sprint"),
+    "mile": ("distance", "Mile"),
+    "medium": ("distance", "Medium"),
+    "long": ("distance", "Long"),
+    "front": ("style", "Front"),
+    "pace": ("style", "Pace"),
+    "late": ("style", "Late"),
+    "end": ("style", "End"),
+}
+
+_APTITUDE_VALUE = {label: value for value, label in constants.APTITUDE_RANK.items()}
+_FILTER_RE = re.compile(r"^\s*([a-z_]+)\s*(>=|<=|!=|=|>|<)\s*([\w+.-]+)\s*$")
+_OPS = {
+    ">=": np.greater_equal,
+    "<=": np.less_equal,
+    ">": np.greater,
+    "<": np.less,
+    "=": np.equal,
+    "!=": np.not_equal,
+}
+
+Filter = Tuple[str, str, int]
+
+
+def _int(value: Any) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _aptitude_value(text: str) -> int:
+    """Aptitude letter to its numeric rank; a trailing '+' means the next rank."""
+    base = _APTITUDE_VALUE.get(text.rstrip("+").upper())
+    if base is None:
+        raise ValueError(f"Unknown aptitude rank {text!r}")
+    return base + (1 if text.endswith("+") else 0)
+
+
+def parse_filters(raw: Optional[str]) -> List[Filter]:
+    """Parse ``field<op>value,...``. Raises ValueError on bad input."""
+    filters: List[Filter] = []
+    for part in (raw or "").split(","):
+        if not part.strip():
+            continue
+        match = _FILTER_RE.match(part)
+        if not match:
+            raise ValueError(f"Invalid filter {part!r}")
+        field, op, value = match.groups()
+        if field in APTITUDE_FIELDS:
+            filters.append((field, op, _aptitude_value(value)))
+        elif field in NUMERIC_FIELDS:
+            try:
+                filters.append((field, op, int(value)))
+            except ValueError:
+                raise ValueError(f"Filter {field!r} needs an integer value") from None
+        else:
+            raise ValueError(f"Unknown filter field {field!r}")
+    return filters
+
+
+def parse_sort(raw: Optional[str]) -> List[Tuple[str, bool]]:
+    """Parse ``-field,field`` into [(field, descending)]."""
+    keys: List[Tuple[str, bool]] = []
+    for part in (raw or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        descending = part.startswith("-")
+        field = part.lstrip("-+")
+        if field not in NUMERIC_FIELDS and field not in APTITUDE_FIELDS:
+            raise ValueError(f"Unknown sort field {field!r}")
+        keys.append((field, descending))
+    return keys
+
+
+def parse_ints(raw: Optional[str]) -> List[int]:
+    try:
+        return [int(part) for part in (raw or "").split(",") if part.strip()]
+    except ValueError:
+        raise ValueError("Expected a comma-separated list of integers") from None
+
+
+class VeteranIndex:
+    """NumPy columns plus a skill inverted index over one item list."""
+
+    def __init__(self, items: List[dict]):
+        self.items = items
+        self.size = len(items)
+        self.columns: Dict[str, np.ndarray] = {}
+        for field, getter in NUMERIC_FIELDS.items():
+            self.columns[field] = np.fromiter((_int(getter(item)) for item in items), dtype=np.int64, count=self.size)
+        for field, (group, label) in APTITUDE_FIELDS.items():
+            self.columns[field] = np.fromiter(
+                (_APTITUDE_VALUE.get(((item.get("aptitudes") or {}).get(group) or {}).get(label), 0) for item in items),
+                dtype=np.int64,
+                count=self.size,
+            )
+        # Favorites are keyed by trained_chara_id, falling back to card_id
+        trained = self.columns["trained_chara_id"]
+        self.keys = np.where(trained != 0, trained, self.columns["card_id"])
+        self.names = np.array([(item.get("name") or "").lower() for item in items], dtype=str)
+        self.titles = np.array([(item.get("title") or "").lower() for item in items], dtype=str)
+
+        rows_by_skill: Dict[int, List[int]] = {}
+        for row, item in enumerate(items):
+            for skill in item.get("skills") or []:
+                skill_id = _int(skill.get("id"))
+                if skill_id:
+                    rows_by_skill.setdefault(skill_id, []).append(row)
+        # Rows are appended in order, so each array is already sorted
+        self.skill_rows: Dict[int, np.ndarray] = {
+            skill_id: np.array(rows, dtype=np.int64) for skill_id, rows in rows_by_skill.items()
+        }
+
+    def mask(
+        self,
+        filters: Sequence[Filter] = (),
+        skills: Iterable[int] = (),
+        search: str = "",
+        ids: Optional[Sequence[int]] = None,
+    ) -> np.ndarray:
+        mask = np.ones(self.size, dtype=bool)
+        for field, op, value in filters:
+            mask &= _OPS[op](self.columns[field], value)
+        for skill_id in skills:
+            rows = self.skill_rows.get(skill_id)
+            has_skill = np.zeros(self.size, dtype=bool)
+            if rows is not None:
+                has_skill[rows] = True
+            mask &= has_skill
+        if ids is not None:
+            mask &= np.isin(self.keys, np.asarray(ids, dtype=np.int64))
+        search = (search or "").strip().lower()
+        if search:
+            title_match = re.search(r"\[([^\]]+)\]", search)
+            if title_match:
+                mask &= np.char.startswith(self.titles, title_match.group(1).strip())
+                search = search.replace(title_match.group(0), "").strip()
+            if search:
+                mask &= np.char.find(self.names, search) >= 0
+        return mask
+
+    def order(self, rows: np.ndarray, sort: Sequence[Tuple[str, bool]]) -> np.ndarray:
+        """Stable multi-key sort of `rows`; the first sort key is primary."""
+        if not sort or not len(rows):
+            return rows
+        keys = [-self.columns[field][rows] if descending else self.columns[field][rows] for field, descending in reversed(sort)]
+        return rows[np.lexsort(keys)]
+
+    def query(
+        self,
+        filters: Sequence[Filter] = (),
+        sort: Sequence[Tuple[str, bool]] = (("rank_score", True),),
+        skills: Iterable[int] = (),
+        search: str = "",
+        ids: Optional[Sequence[int]] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Tuple[int, np.ndarray]:
+        """Return (total matches, row numbers of the requested page)."""
+        rows = np.flatnonzero(self.mask(filters, skills, search, ids))
+        rows = self.order(rows, sort)
+        offset = max(0, offset)
+        end = None if limit is None or limit <= 0 else offset + limit
+        return len(rows), rows[offset:end]
+
+
+_index: Optional[VeteranIndex] = None
+
+
+def get_index(items: List[dict]) -> VeteranIndex:
+    """Index for `items`, rebuilt only when a different list is passed."""
+    global _index
+    if _index is None or _index.items is not items:
+        _index = VeteranIndex(items)
+    return _index
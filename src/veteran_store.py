@@ -0,0 +1,164 @@
+"""Persistent SQLite store for veteran horses, keyed by trained_chara_id.
+
+Each row keeps the enriched item JSON plus a hash of the raw
+``trained_chara_array`` entry it was built from, so a new packet only
+rewrites horses whose raw data changed. Horses missing from a packet are
+tombstoned (``deleted_at``) rather than dropped, and come back unchanged
+if they reappear. Reads can page straight from the table without
+loading the whole roster.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .config import VETERAN_DB_PATH
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS veteran (
+    trained_chara_id INTEGER PRIMARY KEY,
+    source_hash TEXT NOT NULL,
+    rank_score INTEGER NOT NULL DEFAULT 0,
+    item TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    deleted_at REAL
+);
+CREATE INDEX IF NOT EXISTS veteran_live_rank ON veteran (deleted_at, rank_score DESC);
+"""
+
+# (trained_chara_id, source hash, enriched item)
+Upsert = Tuple[int, str, dict]
+
+
+def source_hash(entry: dict, version: int = 0) -> str:
+    """Stable hash of one raw trained_chara_array entry and the builder version."""
+    raw = json.dumps(entry, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.blake2b(f"{version}:{raw}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+class VeteranStore:
+    def __init__(self, path: Path = VETERAN_DB_PATH):
+        self.path = path
+        self._con: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._con is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            con = sqlite3.connect(self.path, check_same_thread=False)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.executescript(_SCHEMA)
+            con.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            self._con = con
+        return self._con
+
+    def close(self) -> None:
+        with self._lock:
+            if self._con is not None:
+                self._con.close()
+                self._con = None
+
+    def is_empty(self) -> bool:
+        """True when the store has never held a horse (tombstones included)."""
+        with self._lock:
+            return self._connect().execute("SELECT 1 FROM veteran LIMIT 1").fetchone() is None
+
+    def hashes(self) -> Dict[int, Tuple[str, bool]]:
+        """trained_chara_id -> (source hash, is tombstoned)."""
+        with self._lock:
+            rows = self._connect().execute("SELECT trained_chara_id, source_hash, deleted_at FROM veteran")
+            return {row[0]: (row[1], row[2] is not None) for row in rows}
+
+    def apply(self, upserts: Iterable[Upsert], restore: Iterable[int] = ()) -> int:
+        """Write changed horses and restore reappeared ones; returns rows written."""
+        now = time.time()
+        upserts = list(upserts)
+        with self._lock:
+            con = self._connect()
+            with con:
+                con.executemany(
+                    """INSERT INTO veteran (trained_chara_id, source_hash, rank_score, item, updated_at, deleted_at)
+                       VALUES (?, ?, ?, ?, ?, NULL)
+                       ON CONFLICT (trained_chara_id) DO UPDATE SET
+                         source_hash = excluded.source_hash,
+                         rank_score = excluded.rank_score,
+                         item = excluded.item,
+                         updated_at = excluded.updated_at,
+                         deleted_at = NULL""",
+                    [
+                        (row_id, digest, int(item.get("rank_score") or 0),
+                         json.dumps(item, ensure_ascii=False, separators=(",", ":")), now)
+                        for row_id, digest, item in upserts
+                    ],
+                )
+                con.executemany(
+                    "UPDATE veteran SET deleted_at = NULL, updated_at = ? WHERE trained_chara_id = ?",
+                    [(now, row_id) for row_id in restore],
+                )
+        return len(upserts)
+
+    def prune(self, keep: Set[int]) -> List[int]:
+        """Tombstone every live horse not in `keep`; returns their ids."""
+        now = time.time()
+        with self._lock:
+            con = self._connect()
+            with con:
+                live = [row[0] for row in con.execute("SELECT trained_chara_id FROM veteran WHERE deleted_at IS NULL")]
+                gone = [row_id for row_id in live if row_id not in keep]
+                con.executemany(
+                    "UPDATE veteran SET deleted_at = ? WHERE trained_chara_id = ?",
+                    [(now, row_id) for row_id in gone],
+                )
+        return gone
+
+    def count(self, include_deleted: bool = False) -> int:
+        where = "" if include_deleted else " WHERE deleted_at IS NULL"
+        with self._lock:
+            return self._connect().execute(f"SELECT COUNT(*) FROM veteran{where}").fetchone()[0]
+
+    def page(self, offset: int = 0, limit: int = 50, include_deleted: bool = False) -> List[dict]:
+        """Horses ordered by rank score; tombstoned ones carry ``deleted_at``."""
+        where = "" if include_deleted else "WHERE deleted_at IS NULL "
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT item, deleted_at FROM veteran {where}"
+                "ORDER BY rank_score DESC, trained_chara_id LIMIT ? OFFSET ?",
+                (limit if limit > 0 else -1, max(0, offset)),
+            ).fetchall()
+        items = []
+        for item_json, deleted_at in rows:
+            item = json.loads(item_json)
+            if deleted_at is not None:
+                item["deleted_at"] = deleted_at
+            items.append(item)
+        return items
+
+    def get(self, ids: Iterable[int]) -> List[dict]:
+        """Live horses with the given ids (unknown and tombstoned ids are skipped)."""
+        ids = list(ids)
+        rows = []
+        with self._lock:
+            con = self._connect()
+            # Chunked to stay under SQLite's bound-parameter limit
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows.extend(con.execute(
+                    f"SELECT item FROM veteran WHERE deleted_at IS NULL AND trained_chara_id IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall())
+        return [json.loads(row[0]) for row in rows]
+
+    def items(self) -> List[dict]:
+        """Every live horse, ordered by rank score."""
+        return self.page(0, 0)
+
+
+store = VeteranStore()
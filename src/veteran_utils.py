@@ -2,14 +2,42 @@
 from __future__ import annotations
 
 import json
-from typing import List, Dict
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+from loguru import logger
 
 from . import constants
 from .config import VETERAN_CACHE_PATH
 from . import mdb_utils
+from . import image_proxy
+from . import metrics
+from . import veteran_store
+
+
+# Bump when build_veteran_items output changes so stored horses get rebuilt
+ITEM_VERSION = 4
+
+# Pre-store JSON cache, imported once into an empty store
+LEGACY_CACHE_PATH = VETERAN_CACHE_PATH
+
+SPARK_CATEGORIES = ("distance", "track", "unique", "skill")
+# Column for factors that only count toward the total; reused as the total column
+_OTHER_SPARKS = len(SPARK_CATEGORIES)
 
+# Succession factor table as sorted NumPy columns (see _factor_table)
+_factor_ids: Optional[np.ndarray] = None
+_factor_categories: Optional[np.ndarray] = None
+_factor_rarities: Optional[np.ndarray] = None
 
-CACHE_PATH = VETERAN_CACHE_PATH
+# Live items keyed by trained_chara_id, loaded lazily from the store
+_items_by_id: Optional[Dict[int, Dict]] = None
+# Live items ordered by rank score; replaced (not mutated) on every change
+_items: List[Dict] = []
+# Serializes loads and syncs: the UDP extractor (event loop) and the
+# veteran.txt import (worker thread) both write the store and _items_by_id
+_sync_lock = threading.RLock()
 
 
 def _rank(value: int) -> str:
@@ -21,57 +49,136 @@ def _horse_rank(value: int) -> str:
 
 
 
+def _factor_table() -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Sorted factor ids with their spark category and rarity, built once."""
+    global _factor_ids, _factor_categories, _factor_rarities
+    if _factor_ids is None:
+        factors = mdb_utils.get_succession_factors()
+        ids = np.fromiter(factors.keys(), dtype=np.int64, count=len(factors))
+        categories = np.fromiter(
+            (_factor_category(info) for info in factors.values()), dtype=np.int64, count=len(factors)
+        )
+        rarities = np.fromiter(
+            (int(info.get("rarity") or 0) for info in factors.values()), dtype=np.int64, count=len(factors)
+        )
+        order = np.argsort(ids)
+        _factor_ids, _factor_categories, _factor_rarities = ids[order], categories[order], rarities[order]
+    return _factor_ids, _factor_categories, _factor_rarities
+
+
+def _factor_category(info: dict) -> int:
+    factor_type = info.get("factor_type")
+    group_id = info.get("group_id")
+    if factor_type == 2:
+        if group_id in (31, 32, 33, 34):
+            return 0
+        if group_id in (11, 12):
+            return 1
+    elif factor_type == 3:
+        return 2
+    elif factor_type == 4:
+        return 3
+    return _OTHER_SPARKS
+
+
+def spark_totals(factor_lists: List[List[int]]) -> np.ndarray:
+    """(horses, 5) star sums: distance, track, unique, skill, total."""
+    totals = np.zeros((len(factor_lists), len(SPARK_CATEGORIES) + 1), dtype=np.int64)
+    lengths = np.fromiter((len(ids) for ids in factor_lists), dtype=np.int64, count=len(factor_lists))
+    if not lengths.sum():
+        return totals
+    flat = np.fromiter(
+        (int(factor_id or 0) for ids in factor_lists for factor_id in ids), dtype=np.int64, count=int(lengths.sum())
+    )
+    owners = np.repeat(np.arange(len(factor_lists)), lengths)
+    table_ids, table_categories, table_rarities = _factor_table()
+    if not len(table_ids):
+        return totals
+    pos = np.minimum(np.searchsorted(table_ids, flat), len(table_ids) - 1)
+    found = table_ids[pos] == flat
+    owners, pos = owners[found], pos[found]
+    rarities = table_rarities[pos]
+    np.add.at(totals, (owners, table_categories[pos]), rarities)
+    totals[:, _OTHER_SPARKS] = np.bincount(owners, weights=rarities, minlength=len(factor_lists)).astype(np.int64)
+    return totals
+
+
+def _skill_lookup(skill_ids: Iterable[int]) -> Dict[int, Tuple[str, Optional[str]]]:
+    """skill_id -> (name, icon URL) for every distinct id, resolved once."""
+    lookup = {}
+    for skill_id in set(skill_ids):
+        lookup[skill_id] = (
+            mdb_utils.get_skill_name(skill_id) or f"Skill {skill_id}",
+            image_proxy.skill_icon_url(mdb_utils.get_skill_icon_id(skill_id)),
+        )
+    return lookup
+
+
+def lineage_affinity(chara_ids: List[Optional[int]], parent_chara_ids: List[List[Optional[int]]]) -> np.ndarray:
+    """Affinity of each horse with its own parents: both child-parent pairs plus parent-parent."""
+    pair, _ = mdb_utils.get_affinity_tables()
+    parents = [(list(ids) + [None, None])[:2] for ids in parent_chara_ids]
+    child = mdb_utils.affinity_indices(chara_ids)
+    first = mdb_utils.affinity_indices(ids[0] for ids in parents)
+    second = mdb_utils.affinity_indices(ids[1] for ids in parents)
+    return (pair[child, first].astype(np.int64) + pair[child, second] + pair[first, second])
+
+
+def _parents(entry: dict) -> List[dict]:
+    """The horse's own two parents (positions 10 and 20) from succession_chara_array."""
+    return [
+        parent for parent in entry.get("succession_chara_array", []) or []
+        if parent.get("position_id") in (10, 20)
+    ]
+
+
 def build_veteran_items(trained_array: List[dict]) -> List[Dict]:
+    """Enrich raw trained_chara_array entries.
+
+    Cards, charas and skills are resolved once per distinct id and spark
+    totals come from one vectorized pass over every factor id.
+    """
+    card_ids = {entry.get("card_id") for entry in trained_array if entry.get("card_id")}
+    parent_card_ids = {
+        parent.get("card_id") for entry in trained_array for parent in _parents(entry) if parent.get("card_id")
+    }
+    growths = mdb_utils.get_card_growths(card_ids | parent_card_ids)
+    card_texts = mdb_utils.get_card_texts(card_ids)
+    skills = _skill_lookup(
+        s.get("skill_id") for entry in trained_array for s in entry.get("skill_array", []) or []
+    )
+    sparks = spark_totals([entry.get("factor_id_array", []) or [] for entry in trained_array]).tolist()
+    parent_charas = [
+        [(growths.get(parent.get("card_id")) or {}).get("chara_id") for parent in _parents(entry)]
+        for entry in trained_array
+    ]
+    affinities = lineage_affinity(
+        [(growths.get(entry.get("card_id")) or {}).get("chara_id") for entry in trained_array], parent_charas
+    ).tolist()
+
     items: List[Dict] = []
-    for entry in trained_array:
+    for entry, (distance_stars, track_stars, unique_stars, skill_stars, total_sparks), parent_chara_ids, affinity in zip(
+        trained_array, sparks, parent_charas, affinities
+    ):
         card_id = entry.get("card_id")
-        growth = mdb_utils.get_card_growth(card_id) if card_id else None
+        growth = growths.get(card_id) if card_id else None
         chara_id = growth.get("chara_id") if growth else None
         chara_name = mdb_utils.get_chara_name(chara_id) if chara_id else None
-        portrait_url = None
-        portrait_fallback_url = None
         portrait_card_id = (
             entry.get("race_cloth_id")
             or entry.get("chara_dress_id")
             or entry.get("dress_id")
             or card_id
         )
-        if portrait_card_id:
-            portrait_url = f"https://chronogenesis.net/images/trained_chara/{portrait_card_id}.png"
-        if chara_id:
-            portrait_fallback_url = (
-                f"https://gametora.com/images/umamusume/characters/icons/chr_icon_{chara_id}.png"
-            )
-
-        card_text = mdb_utils.get_card_text(card_id) if card_id else None
+        portrait_url = image_proxy.trained_chara_url(portrait_card_id)
+        portrait_fallback_url = image_proxy.chara_icon_url(chara_id)
+
+        card_text = card_texts.get(card_id) if card_id else None
         title = card_text.get("title") if card_text else None
         full_name = card_text.get("full_name") if card_text else None
         subtitle = None
 
         skill_array = entry.get("skill_array", [])
-        factor_ids = entry.get("factor_id_array", []) or []
-        distance_stars = 0
-        track_stars = 0
-        unique_stars = 0
-        skill_stars = 0
-        total_sparks = 0
-        for factor_id in factor_ids:
-            info = mdb_utils.get_succession_factor(factor_id)
-            if not info:
-                continue
-            rarity = int(info.get("rarity") or 0)
-            total_sparks += rarity
-            factor_type = info.get("factor_type")
-            group_id = info.get("group_id")
-            if factor_type == 2:
-                if group_id in (21, 22, 23, 24):
-                    distance_stars += rarity
-                elif group_id in (11, 12):
-                    track_stars += rarity
-            elif factor_type == 3:
-                unique_stars += rarity
-            elif factor_type == 4:
-                skill_stars += rarity
 
         items.append({
             "trained_chara_id": entry.get("trained_chara_id"),
@@ -90,6 +197,9 @@ def build_veteran_items(trained_array: List[dict]) -> List[Dict]:
             "rank": entry.get("rank", 0),
             "rank_label": _horse_rank(entry.get("rank", 0)),
             "skill_count": len(skill_array),
+            "factor_ids": list(entry.get("factor_id_array", []) or []),
+            "parent_chara_ids": parent_chara_ids,
+            "parent_affinity": affinity,
             "fans": entry.get("fans", 0),
             "legacy_sparks": {
                 "distance": distance_stars,
@@ -127,69 +237,180 @@ def build_veteran_items(trained_array: List[dict]) -> List[Dict]:
             "skills": [
                 {
                     "id": s.get("skill_id"),
-                    "name": mdb_utils.get_skill_name(s.get("skill_id")) or f"Skill {s.get('skill_id')}",
+                    "name": skills[s.get("skill_id")][0],
                     "level": s.get("level", 1),
-                    "icon_url": (
-                        f"https://gametora.com/images/umamusume/skill_icons/utx_ico_skill_{mdb_utils.get_skill_icon_id(s.get('skill_id'))}.png"
-                        if mdb_utils.get_skill_icon_id(s.get("skill_id"))
-                        else None
-                    ),
+                    "icon_url": skills[s.get("skill_id")][1],
                 }
-                for s in entry.get("skill_array", [])
+                for s in skill_array
             ],
         })
     return items
 
 
-def save_cache(items: List[Dict]) -> None:
-    CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
-    CACHE_PATH.write_text(json.dumps({"items": items}, ensure_ascii=False, indent=2), encoding="utf-8")
+def _enrich_cached_item(item: Dict) -> None:
+    """Refresh URLs and MDB-derived text on an item read from the legacy JSON cache."""
+    chara_id = item.get("chara_id")
+    portrait_card_id = (
+        item.get("portrait_card_id")
+        or item.get("race_cloth_id")
+        or item.get("chara_dress_id")
+        or item.get("dress_id")
+        or item.get("card_id")
+    )
+    if portrait_card_id:
+        item["portrait_url"] = image_proxy.trained_chara_url(portrait_card_id)
+    if chara_id:
+        item["portrait_fallback_url"] = image_proxy.chara_icon_url(chara_id)
+    if item.get("card_id"):
+        card_text = mdb_utils.get_card_text(item.get("card_id"))
+        item["title"] = card_text.get("title") if card_text else None
+        item["full_name"] = card_text.get("full_name") if card_text else None
+        item["subtitle"] = item.get("subtitle")
+    if "rank" in item:
+        item["rank_label"] = _horse_rank(item.get("rank", 0))
+    if item.get("skills"):
+        for skill in item["skills"]:
+            if not skill.get("icon_url") and skill.get("id"):
+                skill["icon_url"] = image_proxy.skill_icon_url(mdb_utils.get_skill_icon_id(skill.get("id")))
+            else:
+                # Caches written before the image proxy hold remote URLs
+                skill["icon_url"] = image_proxy.to_proxy_url(skill.get("icon_url"))
+    item.setdefault("is_locked", 0)
+    item.setdefault("legacy_sparks", {
+        "distance": 0,
+        "track": 0,
+        "unique": 0,
+        "skill": 0,
+        "total": 0,
+    })
 
 
-def load_cache() -> List[Dict]:
-    if not CACHE_PATH.exists():
-        return []
+def _import_legacy_cache() -> None:
+    """One-off import of veteran_cache.json into an empty store."""
+    if not LEGACY_CACHE_PATH.exists() or not veteran_store.store.is_empty():
+        return
     try:
-        data = json.loads(CACHE_PATH.read_text(encoding="utf-8"))
+        data = json.loads(LEGACY_CACHE_PATH.read_text(encoding="utf-8"))
         items = data if isinstance(data, list) else data.get("items", [])
+        upserts = []
         for item in items:
-            chara_id = item.get("chara_id")
-            portrait_card_id = (
-                item.get("portrait_card_id")
-                or item.get("race_cloth_id")
-                or item.get("chara_dress_id")
-                or item.get("dress_id")
-                or item.get("card_id")
-            )
-            if portrait_card_id:
-                item["portrait_url"] = f"https://chronogenesis.net/images/trained_chara/{portrait_card_id}.png"
-            if chara_id:
-                item["portrait_fallback_url"] = (
-                    f"https://gametora.com/images/umamusume/characters/icons/chr_icon_{chara_id}.png"
-                )
-            if item.get("card_id"):
-                card_text = mdb_utils.get_card_text(item.get("card_id"))
-                item["title"] = card_text.get("title") if card_text else None
-                item["full_name"] = card_text.get("full_name") if card_text else None
-                item["subtitle"] = item.get("subtitle")
-            if "rank" in item:
-                item["rank_label"] = _horse_rank(item.get("rank", 0))
-            if item.get("skills"):
-                for skill in item["skills"]:
-                    if not skill.get("icon_url") and skill.get("id"):
-                        icon_id = mdb_utils.get_skill_icon_id(skill.get("id"))
-                        if icon_id:
-                            skill["icon_url"] = (
-                                f"https://gametora.com/images/umamusume/skill_icons/utx_ico_skill_{icon_id}.png"
-                            )
-            item.setdefault("is_locked", 0)
-            item.setdefault("legacy_sparks", {
-                "distance": 0,
-                "track": 0,
-                "unique": 0,
-                "skill": 0,
-                "total": 0,
-            })
-        return items
-    except Exception:
-        return []
+            if not item.get("trained_chara_id"):
+                continue
+            _enrich_cached_item(item)
+            # No source hash, so the next trained_chara_array packet rewrites these
+            upserts.append((int(item["trained_chara_id"]), "", item))
+        veteran_store.store.apply(upserts)
+        logger.info(f"Imported {len(upserts)} horses from {LEGACY_CACHE_PATH.name}")
+    except Exception as e:
+        logger.error(f"Failed to import {LEGACY_CACHE_PATH.name}: {e}")
+
+
+def _publish() -> List[Dict]:
+    global _items
+    _items = sorted(_items_by_id.values(), key=lambda item: -int(item.get("rank_score") or 0))
+    return _items
+
+
+def load_cache() -> List[Dict]:
+    """Live veteran items; read from the store once, then kept in sync in memory."""
+    global _items_by_id
+    # _items is swapped atomically, so readers never need the lock once loaded
+    if _items_by_id is not None:
+        return _items
+    with _sync_lock:
+        if _items_by_id is None:
+            try:
+                _import_legacy_cache()
+                _items_by_id = {int(item["trained_chara_id"]): item for item in veteran_store.store.items()}
+            except Exception as e:
+                logger.error(f"Failed to load veteran store: {e}")
+                return []
+            _publish()
+    return _items
+
+
+def _batches(entries: Iterable[dict], size: Optional[int]) -> Iterator[List[dict]]:
+    if not size:
+        yield list(entries)
+        return
+    batch: List[dict] = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def sync_trained_array(
+    trained: Iterable[dict],
+    batch_size: Optional[int] = None,
+    progress: Optional[Callable[[int], None]] = None,
+) -> List[Dict]:
+    """Diff trained_chara_array entries against the store and write only what changed.
+
+    Unchanged horses are not rebuilt; horses missing from `trained` are
+    tombstoned once every entry has been seen. `trained` may be any
+    iterable (e.g. a streaming parser); with `batch_size` it is built and
+    written that many horses at a time, calling `progress(horses_seen)`
+    after each batch. Returns the live item list (the same list object
+    when nothing changed).
+    """
+    with _sync_lock:
+        load_cache()
+        if _items_by_id is None:
+            return build_veteran_items(list(trained))
+        return _sync_locked(trained, batch_size, progress)
+
+
+def _sync_locked(
+    trained: Iterable[dict],
+    batch_size: Optional[int],
+    progress: Optional[Callable[[int], None]],
+) -> List[Dict]:
+    known = veteran_store.store.hashes()
+    seen: Set[int] = set()
+    written = restored = 0
+    gone: List[int] = []
+    try:
+        for batch in _batches(trained, batch_size):
+            changed: List[Tuple[int, str, dict]] = []
+            batch_restore: List[int] = []
+            for entry in batch:
+                trained_id = entry.get("trained_chara_id")
+                if not trained_id:
+                    continue
+                trained_id = int(trained_id)
+                seen.add(trained_id)
+                digest = veteran_store.source_hash(entry, ITEM_VERSION)
+                previous = known.get(trained_id)
+                if previous and previous[0] == digest:
+                    if previous[1]:
+                        batch_restore.append(trained_id)
+                else:
+                    changed.append((trained_id, digest, entry))
+            items = build_veteran_items([entry for _, _, entry in changed])
+            batch_upserts = [(trained_id, digest, item) for (trained_id, digest, _), item in zip(changed, items)]
+            veteran_store.store.apply(batch_upserts, batch_restore)
+            # Mirror the batch in memory as soon as it is written, so a failure
+            # later in the stream leaves the store and _items_by_id in step
+            for trained_id, _, item in batch_upserts:
+                _items_by_id[trained_id] = item
+            for item in veteran_store.store.get(batch_restore):
+                _items_by_id[int(item["trained_chara_id"])] = item
+            written += len(batch_upserts)
+            restored += len(batch_restore)
+            if progress:
+                progress(len(seen))
+
+        gone = veteran_store.store.prune(seen)
+        for trained_id in gone:
+            _items_by_id.pop(trained_id, None)
+    finally:
+        metrics.incr("veteran.rows_written", written)
+        metrics.incr("veteran.rows_tombstoned", len(gone))
+        if written or restored or gone:
+            logger.debug(f"Veteran store: {written} written, {restored} restored, {len(gone)} tombstoned")
+            _publish()
+    return _items
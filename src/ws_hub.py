@@ -0,0 +1,395 @@
+"""Per-client WebSocket send queues with concurrent fan-out.
+
+Every connection gets a small outbound queue drained by its own writer
+task, so a slow viewer only delays itself. ``ConnectionHub.publish`` is
+the only state path: it marks affected clients dirty, and their writers
+render frames from the shared topic cache. State frames are latest-wins:
+a queued state that has not been sent yet is replaced by the newer one
+(counted as a drop). A send that does not finish within ``send_timeout``
+closes the connection.
+
+State is split into topics (groups of top-level state keys). Each topic
+carries a revision that is bumped whenever its serialized slice changes.
+Clients subscribe with ``{"type": "subscribe", "topics": [...]}`` and a
+state frame only carries the subscribed topics whose revision differs
+from the one that client last received. State frames are rendered by the
+writer right before sending, so a client that falls behind skips straight
+to the newest revisions.
+
+Large, rarely-changing slices are cold resources: they are never inlined
+in frames. A frame lists ``cold: {name: rev}`` for the subscribed cold
+resources whose revision changed, and clients fetch the body from
+``/api/state/resources/<name>`` only then.
+
+Clients may negotiate binary frames with ``{"type": "hello", "encoding":
+"msgpack"}``; their state frames are then msgpack-encoded binary messages
+with the same shape. Each topic is packed at most once per revision.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+from collections import deque
+from typing import Any, Callable, Deque, Dict, FrozenSet, Iterable, Optional, Set, Tuple, Union
+
+import msgpack
+from fastapi import WebSocket
+from loguru import logger
+
+from . import metrics
+
+DEFAULT_MAX_QUEUE = 16
+DEFAULT_SEND_TIMEOUT = 5.0
+
+# hot topic -> top-level GameState.to_dict() keys
+TOPICS = {
+    "training": ("connected", "in_training", "training", "last_packet_type"),
+    "skills_tab": ("skills_tab",),
+    "supporters": ("supporters",),
+    "event_choices": ("event_choices",),
+    "race_combined": ("race_agenda", "race_combined"),
+    "misc_data": ("misc_data", "scenario_metrics"),
+    "raw_data": ("raw_data",),
+}
+# cold resource -> (top-level key, optional sub-key), fetched over REST
+COLD_RESOURCES = {
+    "veteran": ("veteran", None),
+    "available_skills": ("skills_tab", "available_skills"),
+    "race_objectives": ("race_objectives", None),
+}
+# Sub-keys stripped from hot slices because a cold resource carries them
+_COLD_SUBKEYS: Dict[str, FrozenSet[str]] = {}
+for _key, _sub in COLD_RESOURCES.values():
+    if _sub is not None:
+        _COLD_SUBKEYS[_key] = _COLD_SUBKEYS.get(_key, frozenset()) | {_sub}
+ALL_TOPICS: FrozenSet[str] = frozenset(TOPICS) | frozenset(COLD_RESOURCES)
+# Always delivered; the session bar and status dot read it
+BASE_TOPICS: FrozenSet[str] = frozenset({"training"})
+ENCODINGS = ("json", "msgpack")
+
+Frame = Union[str, bytes]
+
+
+def encode(msg: Any) -> str:
+    """Serialize a frame the same way WebSocket.send_json does."""
+    return json.dumps(msg, separators=(",", ":"), ensure_ascii=False)
+
+
+def pack(msg: Any) -> bytes:
+    return msgpack.packb(msg, use_bin_type=True)
+
+
+def parse_topics(names: Iterable[Any]) -> FrozenSet[str]:
+    """Known topic names from a subscribe request, plus the base topics."""
+    return frozenset(name for name in names if name in ALL_TOPICS) | BASE_TOPICS
+
+
+def _hot_value(state: dict, key: str) -> Any:
+    value = state.get(key)
+    strip = _COLD_SUBKEYS.get(key)
+    if strip and isinstance(value, dict):
+        return {k: v for k, v in value.items() if k not in strip}
+    return value
+
+
+def _cold_value(state: dict, name: str) -> Any:
+    key, sub_key = COLD_RESOURCES[name]
+    value = state.get(key)
+    if sub_key is None:
+        return value
+    return value.get(sub_key) if isinstance(value, dict) else None
+
+
+class TopicCache:
+    """Latest serialized slice and revision for every topic and cold resource."""
+
+    def __init__(self) -> None:
+        self.revs: Dict[str, int] = {}
+        self.fragments: Dict[str, str] = {}
+        self._state: Dict[str, dict] = {}
+        # topic -> (rev, key count, packed key/value pairs)
+        self._packed: Dict[str, Tuple[int, int, bytes]] = {}
+        # cold resource -> (rev, content hash)
+        self._etags: Dict[str, Tuple[int, str]] = {}
+        # topic/resource -> top-level state values it was last encoded from
+        self._sources: Dict[str, Tuple[Any, ...]] = {}
+
+    def update(self, state: dict) -> Set[str]:
+        """Re-encode the slices whose source values changed; returns the topics/resources that changed.
+
+        Extractors replace top-level state values rather than mutating them
+        (memoized sections hand back the same object), so a slice whose
+        values are all the same objects as last time is skipped unencoded.
+        """
+        changed = set()
+        for topic, keys in TOPICS.items():
+            if self._unchanged(topic, tuple(state.get(key) for key in keys)):
+                continue
+            # Object body without braces, so frames can be assembled by joining
+            sliced = {key: _hot_value(state, key) for key in keys}
+            if self._store(topic, sliced, encode(sliced)[1:-1]):
+                changed.add(topic)
+        for name, (key, _) in COLD_RESOURCES.items():
+            if self._unchanged(name, (state.get(key),)):
+                continue
+            value = _cold_value(state, name)
+            if self._store(name, value, encode(value)):
+                changed.add(name)
+        return changed
+
+    def _unchanged(self, name: str, sources: Tuple[Any, ...]) -> bool:
+        previous = self._sources.get(name)
+        self._sources[name] = sources
+        if previous is not None and all(a is b for a, b in zip(previous, sources)):
+            metrics.incr("ws.encode.skipped")
+            return True
+        return False
+
+    def _store(self, name: str, value: Any, fragment: str) -> bool:
+        if self.fragments.get(name) == fragment:
+            return False
+        self.fragments[name] = fragment
+        self._state[name] = value
+        self.revs[name] = self.revs.get(name, 0) + 1
+        return True
+
+    def value(self, name: str) -> Any:
+        """Latest source value of a topic slice or cold resource."""
+        return self._state.get(name)
+
+    def resource(self, name: str) -> Optional[Tuple[int, str]]:
+        """(rev, JSON body) of a cold resource, or None if unknown."""
+        if name not in COLD_RESOURCES or name not in self.revs:
+            return None
+        return self.revs[name], self.fragments[name]
+
+    def etag(self, name: str) -> Optional[str]:
+        """Content-hash ETag of a cold resource.
+
+        Revisions restart at 1 in every process, so they cannot identify a
+        body across server restarts; the hash can.
+        """
+        found = self.resource(name)
+        if found is None:
+            return None
+        rev, body = found
+        cached = self._etags.get(name)
+        if cached is None or cached[0] != rev:
+            digest = hashlib.blake2b(body.encode("utf-8"), digest_size=12).hexdigest()
+            cached = (rev, f'"{name}-{digest}"')
+            self._etags[name] = cached
+        return cached[1]
+
+    def cold_revs(self) -> Dict[str, int]:
+        return {name: self.revs[name] for name in COLD_RESOURCES if name in self.revs}
+
+    def packed(self, topic: str) -> Tuple[int, bytes]:
+        """(key count, packed key/value pairs) for a topic's current revision."""
+        rev = self.revs[topic]
+        cached = self._packed.get(topic)
+        if cached is None or cached[0] != rev:
+            sliced = self._state[topic]
+            with metrics.timed("ws.pack"):
+                pairs = b"".join(pack(key) + pack(value) for key, value in sliced.items())
+            cached = (rev, len(sliced), pairs)
+            self._packed[topic] = cached
+        return cached[1], cached[2]
+
+    def render(self, conn: "ClientConnection") -> Optional[Frame]:
+        """State frame with the topics `conn` has not seen yet, or None."""
+        revs = {}
+        cold = {}
+        for topic in ALL_TOPICS & conn.topics:
+            rev = self.revs.get(topic)
+            if rev is None or conn.revs.get(topic) == rev:
+                continue
+            conn.revs[topic] = rev
+            if topic in COLD_RESOURCES:
+                cold[topic] = rev
+                continue
+            revs[topic] = rev
+            metrics.incr(f"ws.topic.{topic}.sent")
+        topics = [topic for topic in TOPICS if topic in revs]
+        if not topics and not cold:
+            return None
+        if conn.encoding == "msgpack":
+            count = 0
+            pairs = []
+            for topic in topics:
+                n, packed = self.packed(topic)
+                count += n
+                pairs.append(packed)
+            packer = msgpack.Packer(use_bin_type=True)
+            return b"".join([
+                packer.pack_map_header(4 if cold else 3),
+                pack("type"), pack("state"),
+                pack("revs"), pack(revs),
+                pack("data"), packer.pack_map_header(count),
+                *pairs,
+                pack("cold") + pack(cold) if cold else b"",
+            ])
+        parts = ",".join(self.fragments[topic] for topic in topics)
+        cold_part = f',"cold":{encode(cold)}' if cold else ""
+        return f'{{"type":"state","revs":{encode(revs)},"data":{{{parts}}}{cold_part}}}'
+
+
+class ClientConnection:
+    """One WebSocket with a bounded outbound queue and a writer task."""
+
+    def __init__(
+        self,
+        ws: WebSocket,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        send_timeout: float = DEFAULT_SEND_TIMEOUT,
+        render_state: Optional[Callable[["ClientConnection"], Optional[Frame]]] = None,
+    ):
+        self.ws = ws
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.render_state = render_state
+        self.topics: FrozenSet[str] = ALL_TOPICS
+        self.revs: Dict[str, int] = {}
+        self.encoding = "json"
+        self._queue: Deque[Tuple[str, Optional[Frame]]] = deque()
+        self._ready = asyncio.Event()
+        self._closed = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._writer())
+
+    def enqueue(self, text: Optional[Frame], kind: str = "state") -> None:
+        """Queue a pre-serialized frame; `kind == "state"` frames are latest-wins.
+
+        A state entry with `text=None` is rendered from the topic cache when
+        the writer reaches it.
+        """
+        if self._closed:
+            return
+        if kind == "state":
+            for index, (queued_kind, _) in enumerate(self._queue):
+                if queued_kind == "state":
+                    self._queue[index] = (kind, text)
+                    metrics.incr("ws.dropped")
+                    return
+        if len(self._queue) >= self.max_queue:
+            self._queue.popleft()
+            metrics.incr("ws.dropped")
+        self._queue.append((kind, text))
+        self._ready.set()
+
+    def send(self, msg: Any, kind: str = "control") -> None:
+        self.enqueue(encode(msg), kind)
+
+    def mark_dirty(self) -> None:
+        """Queue a state frame rendered from the current topic revisions."""
+        self.enqueue(None, "state")
+
+    def subscribe(self, topics: Iterable[Any]) -> None:
+        self.topics = parse_topics(topics)
+        self.mark_dirty()
+
+    def negotiate(self, encoding: Any) -> str:
+        """Switch state frames to `encoding` if supported; returns the active one."""
+        if encoding in ENCODINGS:
+            self.encoding = encoding
+        return self.encoding
+
+    async def _writer(self) -> None:
+        try:
+            while not self._closed:
+                await self._ready.wait()
+                if not self._queue:
+                    self._ready.clear()
+                    continue
+                _, text = self._queue.popleft()
+                if text is None:
+                    text = self.render_state(self) if self.render_state else None
+                    if text is None:
+                        continue
+                try:
+                    sender = self.ws.send_bytes(text) if isinstance(text, bytes) else self.ws.send_text(text)
+                    with metrics.timed("ws.send"):
+                        await asyncio.wait_for(sender, timeout=self.send_timeout)
+                except asyncio.TimeoutError:
+                    metrics.incr("ws.timeout")
+                    logger.warning(f"WebSocket client stalled for {self.send_timeout:g}s; disconnecting")
+                    break
+                except Exception:
+                    break
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.clear()
+        self._ready.set()
+        try:
+            await asyncio.wait_for(self.ws.close(), timeout=1.0)
+        except Exception:
+            pass
+
+    async def stop(self) -> None:
+        """Close the connection and wait for the writer task to exit."""
+        await self.close()
+        if self._task is not None and self._task is not asyncio.current_task():
+            try:
+                await self._task
+            except Exception:
+                pass
+
+
+class ConnectionHub:
+    """The set of live connections and the publish fan-out."""
+
+    def __init__(self, max_queue: int = DEFAULT_MAX_QUEUE, send_timeout: float = DEFAULT_SEND_TIMEOUT):
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.clients: Set[ClientConnection] = set()
+        self.topics = TopicCache()
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    def add(self, ws: WebSocket) -> ClientConnection:
+        conn = ClientConnection(ws, self.max_queue, self.send_timeout, self.topics.render)
+        conn.start()
+        self.clients.add(conn)
+        metrics.set_gauge("ws.clients", len(self.clients))
+        return conn
+
+    async def remove(self, conn: ClientConnection) -> None:
+        self.clients.discard(conn)
+        metrics.set_gauge("ws.clients", len(self.clients))
+        await conn.stop()
+
+    def publish(self, state: dict) -> Set[str]:
+        """Update topic revisions from `state` and notify affected clients."""
+        changed = self.topics.update(state)
+        if not changed:
+            return changed
+        max_depth = 0
+        for conn in list(self.clients):
+            if conn.closed:
+                self.clients.discard(conn)
+                continue
+            if not conn.topics.isdisjoint(changed):
+                conn.mark_dirty()
+            max_depth = max(max_depth, conn.depth)
+        metrics.set_gauge("ws.queue_depth_max", max_depth)
+        metrics.set_gauge("ws.clients", len(self.clients))
+        return changed
+
+
+hub = ConnectionHub()
@@ -8,6 +8,64 @@ let statsUmalatorCheckId = 0;
 let umalatorCourseData = null;
 let optimizerBuilds = [];
 let optimizerBuildStatus = '';
+const ASSET_URLS = window.BIFROST_ASSETS || {};
+
+function assetUrl(relPath) {
+    return ASSET_URLS[relPath] || `/static/${relPath}`;
+}
+
+// Fingerprinted when assets are built, so it also versions cached simulator results
+const SIMULATOR_WORKER_URL = assetUrl('umalator/simulator.worker.js');
+
+// Sprite atlases: icon URL -> { cls: "sprite sprite-<family> sprite-<family>-<index>", aspect }
+const SPRITE_BLANK = 'data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7';
+const SPRITE_CLASSES = (() => {
+    const map = {};
+    const families = (window.BIFROST_SPRITES && window.BIFROST_SPRITES.families) || {};
+    for (const [family, info] of Object.entries(families)) {
+        info.names.forEach((name, index) => {
+            const [width, height] = (info.sizes && info.sizes[index]) || [0, 0];
+            map[`${info.dir}${name}.png`] = {
+                cls: `sprite sprite-${family} sprite-${family}-${index}`,
+                aspect: height ? width / height : 0,
+            };
+        });
+    }
+    return map;
+})();
+
+// A sprite cell stretches to fill its box, so it is only used when the box
+// (width / height of the img's CSS size) has the icon's own aspect ratio;
+// other boxes keep the plain PNG, letterboxed by object-fit
+function spriteClass(url, boxAspect = 1) {
+    const sprite = url ? SPRITE_CLASSES[url] : null;
+    if (!sprite || Math.abs(sprite.aspect - boxAspect) > 0.02 * boxAspect) return null;
+    return sprite.cls;
+}
+
+function setIconSrc(img, url, boxAspect = 1) {
+    if (!img) return;
+    const base = img.dataset.baseClass ?? (img.dataset.baseClass = img.className);
+    const sprite = spriteClass(url, boxAspect);
+    if (sprite) {
+        img.className = base ? `${base} ${sprite}` : sprite;
+        img.src = SPRITE_BLANK;
+    } else {
+        img.className = base;
+        img.src = url || '';
+    }
+}
+
+// Static <img data-icon-src> in the page markup: sprite cell or the plain file
+function applyStaticIcons(root = document) {
+    root.querySelectorAll('img[data-icon-src]').forEach(img => setIconSrc(img, img.dataset.iconSrc));
+}
+
+function iconImgHtml(url, className, alt, boxAspect = 1) {
+    const sprite = spriteClass(url, boxAspect);
+    const cls = sprite ? `${className} ${sprite}` : className;
+    return `<img class="${cls}" src="${sprite ? SPRITE_BLANK : url}" alt="${alt}">`;
+}
 
 // Command IDs for training types
 const COMMAND_IDS = {
@@ -80,7 +138,7 @@ function updateStatRankIcons(stats) {
     for (const [stat, value] of Object.entries(statMap)) {
         const icon = $(`rank-icon-${stat}`);
         if (icon) {
-            icon.src = getStatRankIcon(value);
+            setIconSrc(icon, getStatRankIcon(value));
         }
     }
 }
@@ -215,6 +273,9 @@ $('veteran-error-close')?.addEventListener('click', () => {
 $('veteran-open-umalator')?.addEventListener('click', () => {
     openVeteranUmalator();
 });
+$('veteran-tournament-run')?.addEventListener('click', () => {
+    runVeteranTournament();
+});
 $('stats-open-umalator')?.addEventListener('click', () => {
     openStatsUmalator();
 });
@@ -880,17 +941,17 @@ function updateSkillsTab(state) {
         guts: '/assets/icons/status_03.png',
         wit: '/assets/icons/status_04.png',
     };
-    $('stat-icon-speed').src = statIconMap.speed;
-    $('stat-icon-stamina').src = statIconMap.stamina;
-    $('stat-icon-power').src = statIconMap.power;
-    $('stat-icon-guts').src = statIconMap.guts;
-    $('stat-icon-wit').src = statIconMap.wit;
-
-    $('rank-speed').src = getStatRankIcon(stats.speed);
-    $('rank-stamina').src = getStatRankIcon(stats.stamina);
-    $('rank-power').src = getStatRankIcon(stats.power);
-    $('rank-guts').src = getStatRankIcon(stats.guts);
-    $('rank-wit').src = getStatRankIcon(stats.wisdom);
+    setIconSrc($('stat-icon-speed'), statIconMap.speed);
+    setIconSrc($('stat-icon-stamina'), statIconMap.stamina);
+    setIconSrc($('stat-icon-power'), statIconMap.power);
+    setIconSrc($('stat-icon-guts'), statIconMap.guts);
+    setIconSrc($('stat-icon-wit'), statIconMap.wit);
+
+    setIconSrc($('rank-speed'), getStatRankIcon(stats.speed), 28 / 20);
+    setIconSrc($('rank-stamina'), getStatRankIcon(stats.stamina), 28 / 20);
+    setIconSrc($('rank-power'), getStatRankIcon(stats.power), 28 / 20);
+    setIconSrc($('rank-guts'), getStatRankIcon(stats.guts), 28 / 20);
+    setIconSrc($('rank-wit'), getStatRankIcon(stats.wisdom), 28 / 20);
 
     const apt = data.aptitudes || {};
     const aptIconIndex = {
@@ -906,7 +967,7 @@ function updateSkillsTab(state) {
         const el = $(id);
         if (!el) return;
         const value = letter || '-';
-        el.innerHTML = `<span>${label}</span><img class="apt-icon" src="${aptIcon(value)}" alt="${value}">`;
+        el.innerHTML = `<span>${label}</span>${iconImgHtml(aptIcon(value), 'apt-icon', value, 24 / 14)}`;
     };
     setApt('apt-turf', apt.track?.Turf, 'Turf');
     setApt('apt-dirt', apt.track?.Dirt, 'Dirt');
@@ -1275,7 +1336,7 @@ function racePill(label, iconUrl, options = {}) {
     if (iconUrl) {
         const img = document.createElement('img');
         img.className = 'race-pill-icon';
-        img.src = iconUrl;
+        setIconSrc(img, iconUrl);
         img.alt = label || '';
         pill.appendChild(img);
     }
@@ -1610,7 +1671,7 @@ function updateStatsUmalatorResults(values, { loading = false } = {}) {
 async function loadUmalatorCourseData() {
     if (umalatorCourseData) return umalatorCourseData;
     try {
-        const res = await fetch('/static/umalator/course_data.json');
+        const res = await fetch(assetUrl('umalator/course_data.json'));
         umalatorCourseData = await res.json();
     } catch (e) {
         umalatorCourseData = null;
@@ -1654,12 +1715,69 @@ function extractCompareMean(results) {
     return results.reduce((sum, value) => sum + value, 0) / results.length;
 }
 
-async function runUmalatorCompare({ payload, course, uma2Skills, nsamples = 400 }) {
-    const uma2 = {
-        ...payload.uma1,
-        skills: normalizeSkillSet([...(payload.uma1.skills || []), ...(uma2Skills || [])]),
+// Server-side cache of simulator results, keyed by the canonical request (see /api/sim-cache)
+async function simCacheLookup(kind, request) {
+    try {
+        const res = await fetch('/api/sim-cache/lookup', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ kind, request }),
+        });
+        if (!res.ok) return null;
+        const data = await res.json();
+        return data.hit ? data.result : null;
+    } catch (e) {
+        return null;
+    }
+}
+
+function simCacheStore(kind, request, result) {
+    fetch('/api/sim-cache/store', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ kind, request, result }),
+    }).catch(() => {});
+}
+
+// Return a cached result, or run the simulation and upload what it produced
+async function withSimCache(kind, request, run) {
+    const cached = await simCacheLookup(kind, request);
+    if (cached) return cached;
+    const result = await run();
+    if (result) simCacheStore(kind, request, result);
+    return result;
+}
+
+function compactCompareResult(result) {
+    // runData is only needed for the Umalator race view
+    return result ? { results: result.results || [], metrics: result.metrics || {} } : null;
+}
+
+function compactChartResult(results) {
+    if (!results) return null;
+    const compact = {};
+    const add = (key, value) => {
+        compact[String(key)] = { mean: value?.mean ?? 0 };
     };
-    const worker = new Worker('/static/umalator/simulator.worker.js');
+    if (typeof results.forEach === 'function') {
+        results.forEach((value, key) => add(key, value));
+    } else {
+        for (const [key, value] of Object.entries(results)) add(key, value);
+    }
+    return Object.keys(compact).length ? compact : null;
+}
+
+function umalatorOptions(payload) {
+    return {
+        seed: payload.seed || 0,
+        usePosKeep: !!payload.usePosKeep,
+        useIntChecks: !!payload.useIntChecks,
+    };
+}
+
+// One compare run in a fresh worker; resolves to the compact result or null
+async function simulateUmalatorCompare({ course, racedef, uma1, uma2, options, nsamples }) {
+    const worker = new Worker(SIMULATOR_WORKER_URL);
     const compareResult = await new Promise((resolve) => {
         let settled = false;
         const finish = (value) => {
@@ -1680,32 +1798,51 @@ async function runUmalatorCompare({ payload, course, uma2Skills, nsamples = 400
         worker.onerror = () => finish(null);
         worker.postMessage({
             msg: 'compare',
-            data: {
-                nsamples,
-                course,
-                racedef: payload.racedef,
-                uma1: payload.uma1,
-                uma2,
-                options: {
-                    seed: payload.seed || 0,
-                    usePosKeep: !!payload.usePosKeep,
-                    useIntChecks: !!payload.useIntChecks,
-                },
-            },
+            data: { nsamples, course, racedef, uma1, uma2, options },
         });
     });
     worker.terminate();
-    return compareResult;
+    return compactCompareResult(compareResult);
 }
 
-async function runUmalatorChart({ payload, course, skills }) {
-    if (!skills.length) return new Map();
-    const worker = new Worker('/static/umalator/simulator.worker.js');
-    const results = await new Promise((resolve) => {
+// Compare uma1 against uma1 plus skills, served from the sim cache when possible
+async function runUmalatorCompare({ payload, course, uma2Skills, nsamples = 400 }) {
+    const uma2 = {
+        ...payload.uma1,
+        skills: normalizeSkillSet([...(payload.uma1.skills || []), ...(uma2Skills || [])]),
+    };
+    return runCachedUmalatorCompare({ payload, course, uma2, nsamples });
+}
+
+async function runCachedUmalatorCompare({ payload, course, uma2, nsamples }) {
+    const options = umalatorOptions(payload);
+    const request = {
+        worker: SIMULATOR_WORKER_URL,
+        courseId: payload.courseId,
+        racedef: payload.racedef,
+        options,
+        nsamples,
+        uma1: payload.uma1,
+        uma2,
+    };
+    return withSimCache('compare', request, () => simulateUmalatorCompare({
+        course,
+        racedef: payload.racedef,
+        uma1: payload.uma1,
+        uma2,
+        options,
+        nsamples,
+    }));
+}
+
+// Per-skill chart run; `complete` is false when it stopped on the timeout or an error
+async function simulateUmalatorChart({ course, racedef, uma, skills, options }) {
+    const worker = new Worker(SIMULATOR_WORKER_URL);
+    const outcome = await new Promise((resolve) => {
         let lastResult = null;
         let bestResult = null;
         let bestCount = 0;
-        const timer = setTimeout(() => resolve(bestResult || lastResult), 15000);
+        const timer = setTimeout(() => resolve({ results: bestResult || lastResult, complete: false }), 15000);
         worker.onmessage = (event) => {
             if (event.data?.type !== 'chart') return;
             lastResult = event.data?.results || lastResult;
@@ -1723,32 +1860,48 @@ async function runUmalatorChart({ payload, course, skills }) {
             const sampleSize = anyValue?.results?.length || 0;
             if (sampleSize >= 200 && currentCount > 0) {
                 clearTimeout(timer);
-                resolve(lastResult);
+                resolve({ results: lastResult, complete: true });
             }
         };
-        worker.onerror = () => resolve(bestResult || lastResult);
+        worker.onerror = () => resolve({ results: bestResult || lastResult, complete: false });
         worker.postMessage({
             msg: 'chart',
-            data: {
-                skills,
-                course,
-                racedef: payload.racedef,
-                uma: payload.uma1,
-                options: {
-                    seed: payload.seed || 0,
-                    usePosKeep: !!payload.usePosKeep,
-                    useIntChecks: false,
-                },
-            },
+            data: { skills, course, racedef, uma, options },
         });
     });
     worker.terminate();
+    return outcome;
+}
+
+async function runUmalatorChart({ payload, course, skills }) {
+    if (!skills.length) return new Map();
+    const options = { ...umalatorOptions(payload), useIntChecks: false };
+    const request = {
+        worker: SIMULATOR_WORKER_URL,
+        courseId: payload.courseId,
+        racedef: payload.racedef,
+        options,
+        uma: payload.uma1,
+        skills,
+    };
+    const cached = await simCacheLookup('chart', request);
+    if (cached) return cached;
+    const { results, complete } = await simulateUmalatorChart({
+        course,
+        racedef: payload.racedef,
+        uma: payload.uma1,
+        skills,
+        options,
+    });
+    // Partial charts are used for this run but not remembered
+    const compact = complete ? compactChartResult(results) : null;
+    if (compact) simCacheStore('chart', request, compact);
     return results;
 }
 
 async function runUmalatorSkillMeta(skillIds) {
     if (!skillIds.length) return {};
-    const worker = new Worker('/static/umalator/simulator.worker.js');
+    const worker = new Worker(SIMULATOR_WORKER_URL);
     const results = await new Promise((resolve) => {
         let settled = false;
         const finish = (value) => {
@@ -1841,6 +1994,28 @@ function applyOptimizerBuild(build) {
     updateOptimizerBuildSummary(build);
 }
 
+// Drop skills whose skill_data conditions can never fire on this course (server-side check)
+async function prefilterApplicableSkills(skillIds, payload) {
+    try {
+        const res = await fetch('/api/skills/applicable', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                skill_ids: skillIds.map(Number),
+                course_id: payload.courseId,
+                racedef: payload.racedef,
+                strategy: payload.uma1?.strategy,
+            }),
+        });
+        if (!res.ok) return skillIds;
+        const data = await res.json();
+        const kept = new Set((data.skill_ids || []).map(String));
+        return skillIds.filter(id => kept.has(String(id)));
+    } catch (e) {
+        return skillIds;
+    }
+}
+
 async function generateOptimizerBuilds() {
     if (!lastState) return;
     const data = await buildStatsUmalatorPayload();
@@ -1861,9 +2036,15 @@ async function generateOptimizerBuilds() {
         return;
     }
 
-    const skillMeta = await runUmalatorSkillMeta(availableIds);
-    const recoveryIds = availableIds.filter(id => skillMeta[id]?.isRecovery);
-    const nonRecoveryIds = availableIds.filter(id => !skillMeta[id]?.isRecovery);
+    const applicableIds = await prefilterApplicableSkills(availableIds, payload);
+    if (!applicableIds.length) {
+        optimizerBuildStatus = 'No available skill can activate on this course.';
+        updateOptimizerBuildSummary(null);
+        return;
+    }
+    const skillMeta = await runUmalatorSkillMeta(applicableIds);
+    const recoveryIds = applicableIds.filter(id => skillMeta[id]?.isRecovery);
+    const nonRecoveryIds = applicableIds.filter(id => !skillMeta[id]?.isRecovery);
 
     const chartResults = await runUmalatorChart({ payload, course, skills: nonRecoveryIds });
     const chartMeans = chartResultsToMap(chartResults);
@@ -2016,44 +2197,12 @@ async function runStatsUmalatorCheck() {
     const checkId = ++statsUmalatorCheckId;
     updateStatsUmalatorResults({ withSkills: 'Running...', base: 'Running...', draw: 'Running...' }, { loading: true });
 
-    const worker = new Worker('/static/umalator/simulator.worker.js');
-    const nsamples = payload.nsamples || 1000;
-    const compareResult = await new Promise((resolve) => {
-        let settled = false;
-        const finish = (value) => {
-            if (settled) return;
-            settled = true;
-            resolve(value);
-        };
-        const timer = setTimeout(() => finish(null), 30000);
-        worker.onmessage = (event) => {
-            if (checkId !== statsUmalatorCheckId) return;
-            if (event.data?.type !== 'compare') return;
-            const result = event.data?.results || null;
-            const resultCount = result?.results?.length || 0;
-            if (resultCount >= nsamples) {
-                clearTimeout(timer);
-                finish(result);
-            }
-        };
-        worker.onerror = () => finish(null);
-        worker.postMessage({
-            msg: 'compare',
-            data: {
-                nsamples,
-                course,
-                racedef: payload.racedef,
-                uma1: payload.uma1,
-                uma2: payload.uma2,
-                options: {
-                    seed: payload.seed || 0,
-                    usePosKeep: !!payload.usePosKeep,
-                    useIntChecks: !!payload.useIntChecks,
-                },
-            },
-        });
+    const compareResult = await runCachedUmalatorCompare({
+        payload,
+        course,
+        uma2: payload.uma2,
+        nsamples: payload.nsamples || 1000,
     });
-    worker.terminate();
 
     if (!compareResult || checkId !== statsUmalatorCheckId) {
         updateStatsUmalatorResults({ withSkills: '--', base: '--', draw: '--' }, { loading: false });
@@ -2222,16 +2371,8 @@ function buildVeteranUmaFromData(data, context = {}) {
     };
 }
 
-async function openVeteranUmalator() {
-    if (!selectedVeteranUma1 && !cachedVeteranUma1Data) {
-        showUmalatorError('Select Uma 1 first.');
-        return;
-    }
-    if (!selectedVeteranUma2 && !cachedVeteranUma2Data) {
-        showUmalatorError('Select Uma 2 first.');
-        return;
-    }
-    const preset = selectedPreset;
+// Distance type and surface of a preset's course, used to pick veteran aptitudes
+async function veteranPresetContext(preset) {
     const courseId = preset?.courseId || null;
     let courseInfo = null;
     if (courseId) {
@@ -2247,7 +2388,21 @@ async function openVeteranUmalator() {
     const surfaceLabel = courseInfo?.ground
         ? surfaceLabelFromGround(courseInfo.ground)
         : (preset?.is_dirt === true ? 'Dirt' : preset?.is_dirt === false ? 'Turf' : null);
-    const context = { distanceType, surfaceLabel };
+    return { distanceType, surfaceLabel };
+}
+
+async function openVeteranUmalator() {
+    if (!selectedVeteranUma1 && !cachedVeteranUma1Data) {
+        showUmalatorError('Select Uma 1 first.');
+        return;
+    }
+    if (!selectedVeteranUma2 && !cachedVeteranUma2Data) {
+        showUmalatorError('Select Uma 2 first.');
+        return;
+    }
+    const preset = selectedPreset;
+    const courseId = preset?.courseId || null;
+    const context = await veteranPresetContext(preset);
 
     const uma1 = selectedVeteranUma1
         ? buildVeteranUma(selectedVeteranUma1, context)
@@ -2285,6 +2440,261 @@ async function openVeteranUmalator() {
     window.open(`${baseUrl}#${hash}`, '_blank');
 }
 
+// Veteran tournament: every listed veteran raced against Uma 1 on the selected preset.
+// Compare jobs are spread over a pool of simulator workers and results are cached
+// by (uma hash, course, racedef, simulator build) so re-runs only simulate horses that changed.
+const TOURNAMENT_SAMPLES = 200;
+const TOURNAMENT_TIMEOUT_MS = 30000;
+const TOURNAMENT_CACHE_KEY = 'bifrost-veteran-tournament';
+const TOURNAMENT_CACHE_MAX = 3000;
+let tournamentPool = null;
+let tournamentRunId = 0;
+let tournamentCache = null;
+let tournamentRenderPending = false;
+
+function fnv1aHex(text) {
+    let hash = 0x811c9dc5;
+    for (let i = 0; i < text.length; i += 1) {
+        hash ^= text.charCodeAt(i);
+        hash = Math.imul(hash, 0x01000193);
+    }
+    return (hash >>> 0).toString(16).padStart(8, '0');
+}
+
+function umaHash(uma) {
+    const skills = [...(uma.skills || [])].sort((a, b) => a - b);
+    return fnv1aHex(JSON.stringify({ ...uma, skills }));
+}
+
+function loadTournamentCache() {
+    if (tournamentCache) return tournamentCache;
+    tournamentCache = new Map();
+    try {
+        const raw = JSON.parse(localStorage.getItem(TOURNAMENT_CACHE_KEY) || '[]');
+        for (const [key, value] of raw) tournamentCache.set(key, value);
+    } catch (e) {
+        // ignore a corrupt cache; it is rebuilt on the next run
+    }
+    return tournamentCache;
+}
+
+function saveTournamentCache() {
+    if (!tournamentCache) return;
+    // Map keeps insertion order, so the oldest results are dropped first
+    const entries = [...tournamentCache.entries()].slice(-TOURNAMENT_CACHE_MAX);
+    tournamentCache = new Map(entries);
+    try {
+        localStorage.setItem(TOURNAMENT_CACHE_KEY, JSON.stringify(entries));
+    } catch (e) {
+        // storage full; keep the in-memory cache only
+    }
+}
+
+// Fixed-size pool of simulator workers fed from a FIFO of compare jobs
+function createUmalatorPool(size) {
+    const spawn = () => new Worker(SIMULATOR_WORKER_URL);
+    const idle = Array.from({ length: size }, spawn);
+    const queue = [];
+
+    const runJob = (worker, job) => new Promise((resolve) => {
+        let settled = false;
+        const finish = (value, healthy) => {
+            if (settled) return;
+            settled = true;
+            clearTimeout(timer);
+            worker.onmessage = null;
+            worker.onerror = null;
+            resolve({ value, healthy });
+        };
+        const timer = setTimeout(() => finish(null, false), TOURNAMENT_TIMEOUT_MS);
+        worker.onmessage = (event) => {
+            if (event.data?.type !== 'compare') return;
+            const result = event.data?.results || null;
+            if ((result?.results?.length || 0) >= job.data.nsamples) finish(result, true);
+        };
+        worker.onerror = () => finish(null, false);
+        worker.postMessage({ msg: 'compare', data: job.data });
+    });
+
+    const pump = () => {
+        while (idle.length && queue.length) {
+            let worker = idle.pop();
+            const job = queue.shift();
+            runJob(worker, job).then(({ value, healthy }) => {
+                // A worker that timed out may still be simulating; replace it
+                if (!healthy) {
+                    worker.terminate();
+                    worker = spawn();
+                }
+                idle.push(worker);
+                job.resolve(value);
+                pump();
+            });
+        }
+    };
+
+    return {
+        size,
+        compare(data) {
+            return new Promise((resolve) => {
+                queue.push({ data, resolve });
+                pump();
+            });
+        },
+        cancel() {
+            for (const job of queue.splice(0)) job.resolve(null);
+        },
+    };
+}
+
+function getUmalatorPool() {
+    if (!tournamentPool) {
+        const cores = navigator.hardwareConcurrency || 4;
+        tournamentPool = createUmalatorPool(Math.max(1, Math.min(cores - 1, 16)));
+    }
+    return tournamentPool;
+}
+
+function summarizeTournamentResult(results) {
+    // Candidates race as uma2, so positive lengths mean the candidate finished ahead
+    let wins = 0;
+    for (const value of results) {
+        if (value > 0) wins += 1;
+    }
+    return {
+        mean: extractCompareMean(results),
+        median: results[Math.floor(results.length / 2)] ?? 0,
+        winRate: results.length ? wins / results.length : 0,
+    };
+}
+
+function scheduleTournamentRender(state) {
+    if (tournamentRenderPending) return;
+    tournamentRenderPending = true;
+    requestAnimationFrame(() => {
+        tournamentRenderPending = false;
+        renderTournament(state);
+    });
+}
+
+function renderTournament(state) {
+    const list = $('veteran-tournament-results');
+    const status = $('veteran-tournament-status');
+    if (!list) return;
+    if (state.runId !== tournamentRunId) return;
+    list.style.display = '';
+    if (status) {
+        const running = state.done < state.total;
+        status.textContent = `${running ? 'Running' : 'Done'}: ${state.done}/${state.total} vs ${state.referenceName}` +
+            (state.cached ? ` (${state.cached} cached)` : '');
+    }
+    const ranked = [...state.rows]
+        .filter(row => row.summary)
+        .sort((a, b) => b.summary.mean - a.summary.mean);
+    list.innerHTML = '';
+    if (!ranked.length) {
+        list.innerHTML = '<span class="skills-empty">No results yet</span>';
+        return;
+    }
+    ranked.forEach((row, index) => {
+        const el = document.createElement('div');
+        el.className = 'tournament-row';
+        el.style.cursor = 'pointer';
+        el.onclick = () => showVeteranDetail(row.item);
+        const mean = row.summary.mean;
+        el.innerHTML = `<span class="tournament-rank">#${index + 1}</span>` +
+            `<span class="tournament-name"></span>` +
+            `<span class="tournament-value ${mean >= 0 ? 'ahead' : 'behind'}">${mean >= 0 ? '+' : ''}${mean.toFixed(2)} L</span>` +
+            `<span class="tournament-value">${(row.summary.winRate * 100).toFixed(1)}%</span>`;
+        el.querySelector('.tournament-name').textContent =
+            `${row.item.name || 'Unknown'}${row.item.title ? ` ${row.item.title}` : ''}`;
+        list.appendChild(el);
+    });
+}
+
+async function runVeteranTournament() {
+    if (!selectedVeteranUma1 && !cachedVeteranUma1Data) {
+        showUmalatorError('Select Uma 1 as the tournament reference first.');
+        return;
+    }
+    const preset = selectedPreset;
+    const courseId = preset?.courseId || null;
+    const course = await getUmalatorCourse(courseId);
+    if (!course) {
+        showUmalatorError('Select a preset course first.');
+        return;
+    }
+    const runId = ++tournamentRunId;
+    const pool = getUmalatorPool();
+    pool.cancel();
+
+    const context = await veteranPresetContext(preset);
+    const reference = selectedVeteranUma1
+        ? buildVeteranUma(selectedVeteranUma1, context)
+        : buildVeteranUmaFromData(cachedVeteranUma1Data, context);
+    const referenceKey = selectedVeteranUma1
+        ? (selectedVeteranUma1.trained_chara_id ?? selectedVeteranUma1.card_id)
+        : null;
+    const racedef = {
+        mood: 2,
+        ground: preset?.ground ?? 1,
+        groundCondition: preset?.ground ?? 1,
+        weather: preset?.weather ?? 1,
+        season: preset?.season ?? 1,
+        time: preset?.time ?? 2,
+        grade: 100,
+        popularity: 1,
+        skillId: '',
+        orderRange: null,
+        numUmas: 9,
+    };
+    const options = { seed: 0, usePosKeep: false, useIntChecks: false };
+    const scope = `${courseId}:${fnv1aHex(JSON.stringify({ worker: SIMULATOR_WORKER_URL, racedef, options, nsamples: TOURNAMENT_SAMPLES }))}:${umaHash(reference)}`;
+
+    const candidates = (veteranVisible.length ? veteranVisible : veteranCache)
+        .filter(item => (item.trained_chara_id ?? item.card_id) !== referenceKey);
+    const cache = loadTournamentCache();
+    const state = {
+        runId,
+        referenceName: selectedVeteranUma1?.name || cachedVeteranUma1Data?.chara?.name || 'Uma 1',
+        rows: [],
+        done: 0,
+        cached: 0,
+        total: candidates.length,
+    };
+    const jobs = [];
+    for (const item of candidates) {
+        const uma = buildVeteranUma(item, context);
+        const key = `${umaHash(uma)}:${scope}`;
+        const row = { item, summary: cache.get(key) || null };
+        state.rows.push(row);
+        if (row.summary) {
+            state.done += 1;
+            state.cached += 1;
+            continue;
+        }
+        jobs.push(pool.compare({
+            nsamples: TOURNAMENT_SAMPLES,
+            course,
+            racedef,
+            uma1: reference,
+            uma2: uma,
+            options,
+        }).then((result) => {
+            if (result?.results?.length) {
+                row.summary = summarizeTournamentResult(result.results);
+                cache.set(key, row.summary);
+            }
+            state.done += 1;
+            scheduleTournamentRender(state);
+        }));
+    }
+    renderTournament(state);
+    await Promise.all(jobs);
+    saveTournamentCache();
+    renderTournament(state);
+}
+
 function renderRaceRow(list, item) {
     const row = document.createElement('div');
     row.className = 'race-item';
@@ -2652,6 +3062,8 @@ function veteranStatRankLabel(value) {
 }
 
 let veteranCache = [];
+// Veterans in the current filter/sort order, as last rendered
+let veteranVisible = [];
 let favoriteIds = new Set();
 let selectedVeteranUma1 = null;
 let selectedVeteranUma2 = null;
@@ -2954,82 +3366,277 @@ async function loadVeteran() {
     }
 }
 
-function renderVeteran() {
+// Aptitude filter selects -> /api/veteran/query filter fields
+const VETERAN_APTITUDE_FILTERS = [
+    ['turf', 'veteran-filter-turf'],
+    ['dirt', 'veteran-filter-dirt'],
+    ['sprint', 'veteran-filter-sprint'],
+    ['mile', 'veteran-filter-mile'],
+    ['medium', 'veteran-filter-medium'],
+    ['long', 'veteran-filter-long'],
+    ['front', 'veteran-filter-front'],
+    ['pace', 'veteran-filter-pace'],
+    ['late', 'veteran-filter-late'],
+    ['end', 'veteran-filter-end'],
+];
+let veteranQuerySeq = 0;
+
+// Filter and sort on the server's veteran index; returns veteranCache items in display order
+async function queryVeteranOrder({ sortKey, sortOrder, lockedOnly, favoriteOnly, searchTerm, filterValue }) {
+    const filters = [];
+    if (lockedOnly) filters.push('is_locked=1');
+    for (const [field, id] of VETERAN_APTITUDE_FILTERS) {
+        const value = filterValue(id);
+        if (value && value !== 'Any') filters.push(`${field}>=${value}`);
+    }
+    const params = new URLSearchParams({
+        sort: `${sortOrder === 'asc' ? '' : '-'}${sortKey}`,
+        limit: '0',
+        fields: 'trained_chara_id,card_id',
+    });
+    if (filters.length) params.set('filter', filters.join(','));
+    if (searchTerm) params.set('q', searchTerm);
+    if (favoriteOnly) params.set('ids', [...favoriteIds].join(','));
+    const res = await fetch(`/api/veteran/query?${params}`);
+    if (!res.ok) throw new Error(`Veteran query failed: ${res.status}`);
+    const data = await res.json();
+    const byKey = new Map(veteranCache.map(item => [item.trained_chara_id ?? item.card_id, item]));
+    return data.items.map(row => byKey.get(row.trained_chara_id ?? row.card_id)).filter(Boolean);
+}
+
+// Virtual veteran grid: only the rows in (and just around) the viewport have DOM.
+// Cards are keyed by trained_chara_id; cards that scroll out are recycled for new rows.
+const VETERAN_OVERSCAN_ROWS = 3;
+const VETERAN_GRID_GAP = 12;
+const VETERAN_CARD_HEIGHT_ESTIMATE = 118;
+const veteranGrid = {
+    list: null,
+    spacer: null,
+    window: null,
+    items: [],
+    columns: 2,
+    rowHeight: 0,
+    cards: new Map(),
+    spare: [],
+    frame: 0,
+    observer: null,
+};
+
+function veteranKey(item) {
+    return item?.trained_chara_id ?? item?.card_id;
+}
+
+function createVeteranCard() {
+    const card = document.createElement('div');
+    card.className = 'veteran-card';
+    card.style.cursor = 'pointer';
+    card.onclick = () => showVeteranDetail(card.veteranItem);
+
+    const tag = document.createElement('span');
+    tag.className = 'veteran-compare-tag';
+    tag.style.display = 'none';
+
+    const favBtn = document.createElement('button');
+    favBtn.className = 'favorite-star';
+    favBtn.addEventListener('click', (event) => {
+        event.stopPropagation();
+        const favoriteId = veteranKey(card.veteranItem);
+        if (favoriteIds.has(favoriteId)) {
+            favoriteIds.delete(favoriteId);
+        } else {
+            favoriteIds.add(favoriteId);
+        }
+        saveFavorites();
+        renderVeteran();
+    });
+
+    const img = document.createElement('img');
+    img.className = 'veteran-portrait';
+    img.loading = 'lazy';
+    img.decoding = 'async';
+    img.onerror = () => {
+        const fallback = card.veteranItem?.portrait_fallback_url || 'https://umapyoi.net/missing_chara.png';
+        if (img.getAttribute('src') !== fallback) img.src = fallback;
+    };
+
+    const body = document.createElement('div');
+    const name = document.createElement('div');
+    name.className = 'veteran-name';
+    const meta = document.createElement('div');
+    meta.className = 'veteran-meta';
+    const stats = document.createElement('div');
+    stats.className = 'veteran-stats';
+    body.appendChild(name);
+    body.appendChild(meta);
+    body.appendChild(stats);
+
+    card.appendChild(tag);
+    card.appendChild(favBtn);
+    card.appendChild(img);
+    card.appendChild(body);
+    card.veteranParts = { tag, favBtn, img, name, meta, stats };
+    return card;
+}
+
+function fillVeteranCard(card, item, selectedKey1, selectedKey2) {
+    const { tag, favBtn, img, name, meta, stats } = card.veteranParts;
+    const favoriteId = veteranKey(item);
+    const slot = favoriteId && favoriteId === selectedKey1 ? 1 : favoriteId && favoriteId === selectedKey2 ? 2 : 0;
+    card.classList.toggle('selected-uma', slot !== 0);
+    card.classList.toggle('selected-uma-1', slot === 1);
+    card.classList.toggle('selected-uma-2', slot === 2);
+    tag.style.display = slot ? '' : 'none';
+    tag.classList.toggle('uma2', slot === 2);
+    tag.textContent = slot ? `Uma ${slot}` : '';
+
+    const isFavorite = favoriteIds.has(favoriteId);
+    favBtn.textContent = isFavorite ? '★' : '☆';
+    favBtn.title = isFavorite ? 'Unfavorite' : 'Favorite';
+
+    // The rest only depends on the item itself
+    if (card.veteranItem === item) return;
+    card.veteranItem = item;
+    const portrait = item.portrait_url || 'https://umapyoi.net/missing_chara.png';
+    if (img.getAttribute('src') !== portrait) img.src = portrait;
+    img.alt = item.name || 'Veteran';
+    name.textContent = item.name || 'Unknown';
+
+    const rankLabel = item.rank_label || item.rank || '-';
+    const rankIcon = horseRankIcon(rankLabel);
+    const lockText = item.is_locked ? 'Locked' : 'Unlocked';
+    meta.innerHTML = `${rankIcon ? iconImgHtml(rankIcon, 'umarank-icon', rankLabel, 48 / 20) : ''}` +
+        `${rankLabel} | Score ${item.rank_score || 0} | Skills ${(item.skills || []).length} | ${item.running_style || '-'} | ${lockText}`;
+
+    const s = item.stats || {};
+    stats.innerHTML = `
+        <div><span class="veteran-stat-label">SPD</span><span class="veteran-stat-value">${s.speed || 0}</span></div>
+        <div><span class="veteran-stat-label">STA</span><span class="veteran-stat-value">${s.stamina || 0}</span></div>
+        <div><span class="veteran-stat-label">POW</span><span class="veteran-stat-value">${s.power || 0}</span></div>
+        <div><span class="veteran-stat-label">GUT</span><span class="veteran-stat-value">${s.guts || 0}</span></div>
+        <div><span class="veteran-stat-label">WIT</span><span class="veteran-stat-value">${s.wit || 0}</span></div>
+    `;
+}
+
+function ensureVeteranGrid(list) {
+    if (veteranGrid.list === list && veteranGrid.spacer?.parentNode === list) return;
+    list.innerHTML = '';
+    list.classList.add('veteran-virtual-list');
+    const spacer = document.createElement('div');
+    spacer.className = 'veteran-virtual-spacer';
+    const windowEl = document.createElement('div');
+    windowEl.className = 'veteran-virtual-window veteran-list-grid';
+    spacer.appendChild(windowEl);
+    list.appendChild(spacer);
+    Object.assign(veteranGrid, { list, spacer, window: windowEl, cards: new Map(), spare: [], rowHeight: 0 });
+    if (veteranGrid.observer) veteranGrid.observer.disconnect();
+    list.addEventListener('scroll', scheduleVeteranGridUpdate, { passive: true });
+    if (window.ResizeObserver) {
+        // Re-measure when the tab becomes visible or the layout changes columns
+        veteranGrid.observer = new ResizeObserver(() => {
+            veteranGrid.rowHeight = 0;
+            windowEl.style.gridAutoRows = '';
+            scheduleVeteranGridUpdate();
+        });
+        veteranGrid.observer.observe(list);
+    }
+}
+
+function scheduleVeteranGridUpdate() {
+    if (veteranGrid.frame) return;
+    veteranGrid.frame = requestAnimationFrame(() => {
+        veteranGrid.frame = 0;
+        updateVeteranGridWindow();
+    });
+}
+
+function setVeteranGridItems(list, items) {
+    ensureVeteranGrid(list);
+    veteranGrid.items = items;
+    updateVeteranGridWindow();
+}
+
+function updateVeteranGridWindow() {
+    const { list, spacer, items } = veteranGrid;
+    const windowEl = veteranGrid.window;
+    if (!list || !windowEl) return;
+    const columns = getComputedStyle(windowEl).gridTemplateColumns.split(' ').filter(Boolean).length;
+    veteranGrid.columns = columns || veteranGrid.columns;
+    const pitch = (veteranGrid.rowHeight || VETERAN_CARD_HEIGHT_ESTIMATE) + VETERAN_GRID_GAP;
+    const totalRows = Math.ceil(items.length / veteranGrid.columns);
+    const viewport = list.clientHeight || pitch * 6;
+    const firstRow = Math.max(0, Math.floor(list.scrollTop / pitch) - VETERAN_OVERSCAN_ROWS);
+    const lastRow = Math.min(totalRows, Math.ceil((list.scrollTop + viewport) / pitch) + VETERAN_OVERSCAN_ROWS);
+    const start = firstRow * veteranGrid.columns;
+    const visible = items.slice(start, lastRow * veteranGrid.columns);
+
+    const selectedKey1 = selectedVeteranUma1 ? veteranKey(selectedVeteranUma1) : null;
+    const selectedKey2 = selectedVeteranUma2 ? veteranKey(selectedVeteranUma2) : null;
+    const next = new Map();
+    const wanted = new Set(visible.map(veteranKey));
+    for (const [key, card] of veteranGrid.cards) {
+        if (!wanted.has(key)) {
+            card.remove();
+            veteranGrid.spare.push(card);
+        }
+    }
+    let anchor = windowEl.firstChild;
+    for (const item of visible) {
+        const key = veteranKey(item);
+        let card = next.has(key) ? null : veteranGrid.cards.get(key);
+        if (!card) card = veteranGrid.spare.pop() || createVeteranCard();
+        fillVeteranCard(card, item, selectedKey1, selectedKey2);
+        next.set(key, card);
+        // Only touch the DOM when a card is out of place
+        if (card !== anchor) {
+            windowEl.insertBefore(card, anchor);
+        } else {
+            anchor = anchor.nextSibling;
+        }
+    }
+    while (anchor) {
+        const stale = anchor;
+        anchor = anchor.nextSibling;
+        stale.remove();
+        veteranGrid.spare.push(stale);
+    }
+    veteranGrid.cards = next;
+
+    if (!veteranGrid.rowHeight && windowEl.firstChild?.offsetHeight) {
+        // Pin every row to the tallest rendered card so row offsets are exact
+        let tallest = 0;
+        for (const card of windowEl.children) tallest = Math.max(tallest, card.offsetHeight);
+        veteranGrid.rowHeight = tallest;
+        windowEl.style.gridAutoRows = `${tallest}px`;
+        if (tallest + VETERAN_GRID_GAP !== pitch) {
+            scheduleVeteranGridUpdate();
+        }
+    }
+    spacer.style.height = `${Math.max(0, totalRows * pitch - VETERAN_GRID_GAP)}px`;
+    windowEl.style.transform = `translateY(${firstRow * pitch}px)`;
+}
+
+async function renderVeteran() {
     const list = $('veteran-list');
     if (!list) return;
-    list.innerHTML = '';
+    const seq = ++veteranQuerySeq;
 
     const sortKey = $('veteran-sort')?.value || 'rank_score';
     const sortOrder = $('veteran-sort-order')?.value || 'desc';
     const lockedOnly = $('veteran-filter-locked')?.checked || false;
     const favoriteOnly = $('veteran-filter-favorite')?.checked || false;
     const searchTerm = ($('veteran-search')?.value || '').trim();
-    const items = [...veteranCache];
-    const applyLocked = lockedOnly;
-    const applyFavorite = favoriteOnly;
-    let titleQuery = null;
-    let nameQuery = searchTerm;
-    const titleMatch = searchTerm.match(/\[([^\]]+)\]/);
-    if (titleMatch) {
-        titleQuery = titleMatch[1].trim().toLowerCase();
-        nameQuery = searchTerm.replace(titleMatch[0], "").trim();
-    }
-
     const filterValue = (id) => ($(`${id}`)?.value || 'Any');
-    const order = ['G', 'G+', 'F', 'F+', 'E', 'E+', 'D', 'D+', 'C', 'C+', 'B', 'B+', 'A', 'A+', 'S'];
-    const rankIndex = (label) => {
-        const idx = order.indexOf(label);
-        return idx < 0 ? -1 : idx;
-    };
-    const atLeast = (value, min) => {
-        if (!min || min === 'Any') return true;
-        return rankIndex(value) >= rankIndex(min);
-    };
-    const filtered = items.filter((item) => {
-        const apt = item.aptitudes || {};
-        if (applyLocked && !item.is_locked) {
-            return false;
-        }
-        const favoriteId = item.trained_chara_id ?? item.card_id;
-        if (applyFavorite && !favoriteIds.has(favoriteId)) {
-            return false;
-        }
-        if (searchTerm) {
-            if (titleQuery) {
-                const title = (item.title || '').toLowerCase();
-                if (!title.startsWith(titleQuery)) {
-                    return false;
-                }
-            }
-            if (nameQuery) {
-                const name = (item.name || '').toLowerCase();
-                if (!name.includes(nameQuery.toLowerCase())) {
-                    return false;
-                }
-            }
-        }
-        return (
-            atLeast(apt.track?.Turf, filterValue('veteran-filter-turf')) &&
-            atLeast(apt.track?.Dirt, filterValue('veteran-filter-dirt')) &&
-            atLeast(apt.distance?.Sprint, filterValue('veteran-filter-sprint')) &&
-            atLeast(apt.distance?.Mile, filterValue('veteran-filter-mile')) &&
-            atLeast(apt.distance?.Medium, filterValue('veteran-filter-medium')) &&
-            atLeast(apt.distance?.Long, filterValue('veteran-filter-long')) &&
-            atLeast(apt.style?.Front, filterValue('veteran-filter-front')) &&
-            atLeast(apt.style?.Pace, filterValue('veteran-filter-pace')) &&
-            atLeast(apt.style?.Late, filterValue('veteran-filter-late')) &&
-            atLeast(apt.style?.End, filterValue('veteran-filter-end'))
-        );
-    });
 
-    const sortValue = (item) => {
-        if (sortKey === 'skill_count') return item.skills?.length || 0;
-        return item[sortKey] || item.stats?.[sortKey] || 0;
-    };
-    filtered.sort((a, b) => {
-        const diff = sortValue(b) - sortValue(a);
-        return sortOrder === 'asc' ? -diff : diff;
-    });
+    let filtered;
+    try {
+        filtered = await queryVeteranOrder({ sortKey, sortOrder, lockedOnly, favoriteOnly, searchTerm, filterValue });
+    } catch (e) {
+        console.warn(e);
+        filtered = [...veteranCache];
+    }
+    // A newer render started while this query was in flight
+    if (seq !== veteranQuerySeq) return;
+    veteranVisible = filtered;
 
     const summary = [];
     if (lockedOnly) summary.push('Locked only');
@@ -3056,96 +3663,16 @@ function renderVeteran() {
     }
 
     if (!filtered.length) {
+        veteranGrid.list = null;
+        list.classList.remove('veteran-virtual-list');
         list.innerHTML = '<span class="skills-empty">No veteran data available</span>';
         return;
     }
-
-    const selectedKey1 = selectedVeteranUma1
-        ? (selectedVeteranUma1.trained_chara_id ?? selectedVeteranUma1.card_id)
-        : null;
-    const selectedKey2 = selectedVeteranUma2
-        ? (selectedVeteranUma2.trained_chara_id ?? selectedVeteranUma2.card_id)
-        : null;
-
-    for (const item of filtered) {
-        const card = document.createElement('div');
-        card.className = 'veteran-card';
-        card.style.cursor = 'pointer';
-        card.onclick = () => showVeteranDetail(item);
-
-        const favoriteId = item.trained_chara_id ?? item.card_id;
-        const isFavorite = favoriteIds.has(favoriteId);
-        if (favoriteId && favoriteId === selectedKey1) {
-            card.classList.add('selected-uma', 'selected-uma-1');
-            const tag = document.createElement('span');
-            tag.className = 'veteran-compare-tag';
-            tag.textContent = 'Uma 1';
-            card.appendChild(tag);
-        } else if (favoriteId && favoriteId === selectedKey2) {
-            card.classList.add('selected-uma', 'selected-uma-2');
-            const tag = document.createElement('span');
-            tag.className = 'veteran-compare-tag uma2';
-            tag.textContent = 'Uma 2';
-            card.appendChild(tag);
-        }
-        const favBtn = document.createElement('button');
-        favBtn.className = 'favorite-star';
-        favBtn.textContent = isFavorite ? '★' : '☆';
-        favBtn.title = isFavorite ? 'Unfavorite' : 'Favorite';
-        favBtn.addEventListener('click', (event) => {
-            event.stopPropagation();
-            if (favoriteIds.has(favoriteId)) {
-                favoriteIds.delete(favoriteId);
-            } else {
-                favoriteIds.add(favoriteId);
-            }
-            saveFavorites();
-            renderVeteran();
-        });
-        card.appendChild(favBtn);
-
-        const img = document.createElement('img');
-        img.className = 'veteran-portrait';
-        img.src = item.portrait_url || 'https://umapyoi.net/missing_chara.png';
-        img.alt = item.name || 'Veteran';
-        img.onerror = () => {
-            img.onerror = null;
-            img.src = item.portrait_fallback_url || 'https://umapyoi.net/missing_chara.png';
-        };
-
-        const body = document.createElement('div');
-        const name = document.createElement('div');
-        name.className = 'veteran-name';
-        name.textContent = item.name || 'Unknown';
-
-        const meta = document.createElement('div');
-        meta.className = 'veteran-meta';
-        const rankLabel = item.rank_label || item.rank || '-';
-        const rankIcon = horseRankIcon(rankLabel);
-        const lockText = item.is_locked ? 'Locked' : 'Unlocked';
-        meta.innerHTML = `${rankIcon ? `<img class="umarank-icon" src="${rankIcon}" alt="${rankLabel}">` : ''}` +
-            `${rankLabel} | Score ${item.rank_score || 0} | Skills ${(item.skills || []).length} | ${item.running_style || '-'} | ${lockText}`;
-
-        const stats = document.createElement('div');
-        stats.className = 'veteran-stats';
-        const s = item.stats || {};
-        stats.innerHTML = `
-            <div><span class="veteran-stat-label">SPD</span><span class="veteran-stat-value">${s.speed || 0}</span></div>
-            <div><span class="veteran-stat-label">STA</span><span class="veteran-stat-value">${s.stamina || 0}</span></div>
-            <div><span class="veteran-stat-label">POW</span><span class="veteran-stat-value">${s.power || 0}</span></div>
-            <div><span class="veteran-stat-label">GUT</span><span class="veteran-stat-value">${s.guts || 0}</span></div>
-            <div><span class="veteran-stat-label">WIT</span><span class="veteran-stat-value">${s.wit || 0}</span></div>
-        `;
-
-        body.appendChild(name);
-        body.appendChild(meta);
-        body.appendChild(stats);
-        card.appendChild(img);
-        card.appendChild(body);
-        list.appendChild(card);
-    }
+    setVeteranGridItems(list, filtered);
 }
 
+let veteranDetailToken = 0;
+
 function renderVeteranDetail(item) {
     const empty = $('veteran-detail-empty');
     const detail = $('veteran-detail');
@@ -3165,7 +3692,7 @@ function renderVeteranDetail(item) {
         portrait.src = item.portrait_fallback_url || 'https://umapyoi.net/missing_chara.png';
     };
     $('veteran-name').textContent = item.name || 'Unknown';
-    $('veteran-rank').innerHTML = `${rankIcon ? `<img class="umarank-icon" src="${rankIcon}" alt="${rankLabel}">` : ''} ${rankLabel} | Score ${item.rank_score || 0}`;
+    $('veteran-rank').innerHTML = `${rankIcon ? iconImgHtml(rankIcon, 'umarank-icon', rankLabel, 48 / 20) : ''} ${rankLabel} | Score ${item.rank_score || 0}`;
     $('veteran-style').textContent = `Running Style: ${item.running_style || '-'} | Fans ${(item.fans || 0).toLocaleString()}`;
     $('veteran-uma1').onclick = () => {
         selectedVeteranUma1 = item;
@@ -3201,21 +3728,21 @@ function renderVeteranDetail(item) {
         guts: '/assets/icons/status_03.png',
         wit: '/assets/icons/status_04.png',
     };
-    $('vstat-icon-speed').src = statIconMap.speed;
-    $('vstat-icon-stamina').src = statIconMap.stamina;
-    $('vstat-icon-power').src = statIconMap.power;
-    $('vstat-icon-guts').src = statIconMap.guts;
-    $('vstat-icon-wit').src = statIconMap.wit;
+    setIconSrc($('vstat-icon-speed'), statIconMap.speed);
+    setIconSrc($('vstat-icon-stamina'), statIconMap.stamina);
+    setIconSrc($('vstat-icon-power'), statIconMap.power);
+    setIconSrc($('vstat-icon-guts'), statIconMap.guts);
+    setIconSrc($('vstat-icon-wit'), statIconMap.wit);
 
     const statRankIcon = (value) => {
         const label = veteranStatRankLabel(value);
         return statusRankIcon(label);
     };
-    $('vrank-speed').src = statRankIcon(s.speed) || '';
-    $('vrank-stamina').src = statRankIcon(s.stamina) || '';
-    $('vrank-power').src = statRankIcon(s.power) || '';
-    $('vrank-guts').src = statRankIcon(s.guts) || '';
-    $('vrank-wit').src = statRankIcon(s.wit) || '';
+    setIconSrc($('vrank-speed'), statRankIcon(s.speed), 28 / 20);
+    setIconSrc($('vrank-stamina'), statRankIcon(s.stamina), 28 / 20);
+    setIconSrc($('vrank-power'), statRankIcon(s.power), 28 / 20);
+    setIconSrc($('vrank-guts'), statRankIcon(s.guts), 28 / 20);
+    setIconSrc($('vrank-wit'), statRankIcon(s.wit), 28 / 20);
 
     const apt = item.aptitudes || {};
     const aptIconIndex = {
@@ -3231,7 +3758,7 @@ function renderVeteranDetail(item) {
         const el = $(id);
         if (!el) return;
         const value = letter || '-';
-        el.innerHTML = `<span>${label}</span><img class="apt-icon" src="${aptIcon(value)}" alt="${value}">`;
+        el.innerHTML = `<span>${label}</span>${iconImgHtml(aptIcon(value), 'apt-icon', value, 24 / 14)}`;
     };
     setApt('vapt-turf', apt.track?.Turf, 'Turf');
     setApt('vapt-dirt', apt.track?.Dirt, 'Dirt');
@@ -3244,7 +3771,16 @@ function renderVeteranDetail(item) {
     setApt('vapt-late', apt.style?.Late, 'Late');
     setApt('vapt-end', apt.style?.End, 'End');
 
+    // Skill rows (and their icons) are built after the panel is on screen
+    const token = ++veteranDetailToken;
+    requestAnimationFrame(() => {
+        if (token === veteranDetailToken) renderVeteranDetailSkills(item);
+    });
+}
+
+function renderVeteranDetailSkills(item) {
     const skills = $('veteran-skills');
+    if (!skills) return;
     skills.innerHTML = '';
     if (item.skills && item.skills.length) {
         for (const skill of item.skills) {
@@ -3253,11 +3789,13 @@ function renderVeteranDetail(item) {
             let iconUrl = skill.icon_url || skill.icon || '';
             if (!iconUrl && skill.id) {
                 const skillId = String(skill.id).padStart(6, '0');
-                iconUrl = `https://gametora.com/images/umamusume/skill_icons/utx_ico_skill_${skillId}.png`;
+                iconUrl = `/img/gametora/skill_icons/utx_ico_skill_${skillId}.png`;
             }
             if (iconUrl) {
                 const icon = document.createElement('img');
                 icon.className = 'skill-icon';
+                icon.loading = 'lazy';
+                icon.decoding = 'async';
                 icon.src = iconUrl;
                 icon.alt = skill.name || 'Skill';
                 icon.onerror = () => {
@@ -3328,12 +3866,86 @@ function showVeteranDetail(item) {
     window.__closeVeteranDetail = closeModal;
 }
 
+// State topics each tab renders; 'training' is always sent by the server and
+// 'race_combined' feeds the session bar's next-race line on every tab.
+const BASE_TOPICS = ['training', 'race_combined'];
+const TAB_TOPICS = {
+    training: ['raw_data', 'supporters', 'event_choices', 'skills_tab'],
+    stats: ['raw_data', 'skills_tab', 'available_skills'],
+    race: ['race_objectives'],
+    'veteran-umalator': ['veteran'],
+    'veteran-sparks': ['veteran'],
+    raw: ['raw_data'],
+    settings: [],
+    debug: ['misc_data'],
+};
+// Cold resources arrive as revision numbers and are fetched only when they change
+const COLD_PATHS = {
+    veteran: ['veteran'],
+    available_skills: ['skills_tab', 'available_skills'],
+    race_objectives: ['race_objectives'],
+};
+let activeTab = 'training';
+let wsState = null;
+let coldData = {};
+let coldRevs = {};
+
+function composeState() {
+    const state = { ...wsState };
+    for (const [name, path] of Object.entries(COLD_PATHS)) {
+        if (!(name in coldData)) continue;
+        if (path.length === 1) {
+            state[path[0]] = coldData[name];
+        } else {
+            state[path[0]] = { ...(state[path[0]] || {}), [path[1]]: coldData[name] };
+        }
+    }
+    return state;
+}
+
+function renderWsState() {
+    if (wsState && wsState.training) updateUI(composeState());
+}
+
+function syncColdResources(revs) {
+    for (const [name, rev] of Object.entries(revs || {})) {
+        if (coldRevs[name] === rev) continue;
+        coldRevs[name] = rev;
+        // Forget the revision if this fetch fails, so the next frame requests it again
+        const forget = () => {
+            if (coldRevs[name] === rev) delete coldRevs[name];
+        };
+        fetch(`/api/state/resources/${name}`)
+            .then(res => {
+                if (!res.ok) throw new Error(`HTTP ${res.status}`);
+                return res.json();
+            })
+            .then(res => {
+                if (res.rev < coldRevs[name]) return;
+                coldData[name] = res.data;
+                renderWsState();
+            })
+            .catch(forget);
+    }
+}
+// Opt into binary msgpack state frames with localStorage bifrost-ws-encoding=msgpack
+// (smaller frames, but JSON.parse is still faster to decode in the browser)
+const WS_ENCODING = (window.msgpackDecode && localStorage.getItem('bifrost-ws-encoding') === 'msgpack') ? 'msgpack' : 'json';
+
+function subscribeTopics(tab) {
+    if (tab) activeTab = tab;
+    if (!ws || ws.readyState !== WebSocket.OPEN) return;
+    const topics = [...BASE_TOPICS, ...(TAB_TOPICS[activeTab] || [])];
+    ws.send(JSON.stringify({ type: 'subscribe', topics }));
+}
+
 function connect() {
     if (ws && (ws.readyState === WebSocket.OPEN || ws.readyState === WebSocket.CONNECTING)) {
         return;
     }
     const proto = location.protocol === 'https:' ? 'wss:' : 'ws:';
     ws = new WebSocket(`${proto}//${location.host}/ws`);
+    ws.binaryType = 'arraybuffer';
 
     ws.onopen = () => {
         $('status-text').textContent = 'Connected';
@@ -3348,6 +3960,12 @@ function connect() {
             clearTimeout(reconnectTimer);
             reconnectTimer = null;
         }
+        wsState = null;
+        coldRevs = {};
+        if (WS_ENCODING !== 'json') {
+            ws.send(JSON.stringify({ type: 'hello', encoding: WS_ENCODING }));
+        }
+        subscribeTopics();
     };
 
     ws.onclose = () => {
@@ -3376,9 +3994,12 @@ function connect() {
     };
 
     ws.onmessage = (e) => {
-        const msg = JSON.parse(e.data);
+        const msg = typeof e.data === 'string' ? JSON.parse(e.data) : window.msgpackDecode(e.data);
         if (msg.type === 'state') {
-            updateUI(msg.data);
+            // Frames carry only the topics that changed; merge into the last state
+            wsState = msg.revs ? { ...(wsState || {}), ...msg.data } : msg.data;
+            syncColdResources(msg.cold);
+            renderWsState();
         } else if (msg.type === 'ping') {
             ws.send('ping');
         }
@@ -11,6 +11,8 @@ if (savedFont) {
     document.body.style.fontFamily = defaultFont;
 }
 
+applyStaticIcons();
+
 // Tab switching
 document.querySelectorAll('.tab').forEach(tab => {
     tab.addEventListener('click', () => {
@@ -18,6 +20,7 @@ document.querySelectorAll('.tab').forEach(tab => {
         document.querySelectorAll('.tab-content').forEach(c => c.classList.remove('active'));
         tab.classList.add('active');
         $('tab-' + tab.dataset.tab).classList.add('active');
+        subscribeTopics(tab.dataset.tab);
 
         if (tab.dataset.tab === 'raw' && lastRawData) {
             $('raw-data').textContent = JSON.stringify(lastRawData, null, 2);
@@ -0,0 +1,109 @@
+// Minimal msgpack decoder for binary /ws state frames.
+// Handles every type the server emits (nil, bool, int, float, str, bin,
+// array, map); ext types decode to null.
+(function () {
+    const textDecoder = new TextDecoder();
+    const SHORT_STRING = 32;
+
+    function msgpackDecode(buffer) {
+        const bytes = buffer instanceof Uint8Array ? buffer : new Uint8Array(buffer);
+        const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+        let pos = 0;
+
+        const str = (len) => {
+            const end = pos + len;
+            if (len <= SHORT_STRING) {
+                // Most keys and values are short ASCII; skip TextDecoder for those
+                let value = '';
+                let i = pos;
+                for (; i < end; i++) {
+                    const c = bytes[i];
+                    if (c & 0x80) break;
+                    value += String.fromCharCode(c);
+                }
+                if (i === end) {
+                    pos = end;
+                    return value;
+                }
+            }
+            const value = textDecoder.decode(bytes.subarray(pos, end));
+            pos = end;
+            return value;
+        };
+        const bin = (len) => {
+            const value = bytes.slice(pos, pos + len);
+            pos += len;
+            return value;
+        };
+        const array = (len) => {
+            const value = new Array(len);
+            for (let i = 0; i < len; i++) value[i] = read();
+            return value;
+        };
+        const map = (len) => {
+            const value = {};
+            for (let i = 0; i < len; i++) {
+                const key = read();
+                value[key] = read();
+            }
+            return value;
+        };
+        const ext = (len) => {
+            pos += 1 + len;
+            return null;
+        };
+        const u8 = () => bytes[pos++];
+        const u16 = () => { const v = view.getUint16(pos); pos += 2; return v; };
+        const u32 = () => { const v = view.getUint32(pos); pos += 4; return v; };
+
+        function read() {
+            const type = bytes[pos++];
+            if (type <= 0x7f) return type;
+            if (type <= 0x8f) return map(type & 0x0f);
+            if (type <= 0x9f) return array(type & 0x0f);
+            if (type <= 0xbf) return str(type & 0x1f);
+            if (type >= 0xe0) return type - 0x100;
+            let v;
+            switch (type) {
+                case 0xc0: return null;
+                case 0xc2: return false;
+                case 0xc3: return true;
+                case 0xc4: return bin(u8());
+                case 0xc5: return bin(u16());
+                case 0xc6: return bin(u32());
+                case 0xc7: return ext(u8());
+                case 0xc8: return ext(u16());
+                case 0xc9: return ext(u32());
+                case 0xca: v = view.getFloat32(pos); pos += 4; return v;
+                case 0xcb: v = view.getFloat64(pos); pos += 8; return v;
+                case 0xcc: return u8();
+                case 0xcd: return u16();
+                case 0xce: return u32();
+                case 0xcf: v = Number(view.getBigUint64(pos)); pos += 8; return v;
+                case 0xd0: v = view.getInt8(pos); pos += 1; return v;
+                case 0xd1: v = view.getInt16(pos); pos += 2; return v;
+                case 0xd2: v = view.getInt32(pos); pos += 4; return v;
+                case 0xd3: v = Number(view.getBigInt64(pos)); pos += 8; return v;
+                case 0xd4: return ext(1);
+                case 0xd5: return ext(2);
+                case 0xd6: return ext(4);
+                case 0xd7: return ext(8);
+                case 0xd8: return ext(16);
+                case 0xd9: return str(u8());
+                case 0xda: return str(u16());
+                case 0xdb: return str(u32());
+                case 0xdc: return array(u16());
+                case 0xdd: return array(u32());
+                case 0xde: return map(u16());
+                case 0xdf: return map(u32());
+                default:
+                    throw new Error(`msgpack: unknown type 0x${type.toString(16)} at ${pos - 1}`);
+            }
+        }
+
+        return read();
+    }
+
+    if (typeof window !== 'undefined') window.msgpackDecode = msgpackDecode;
+    if (typeof module !== 'undefined') module.exports = { msgpackDecode };
+})();